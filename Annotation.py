@@ -4,9 +4,40 @@ import sys
 import re
 import os
 import logging
+import hashlib
+import json
+import datetime
+import tempfile
 from pathlib import Path
+from collections import OrderedDict
 
-from openpyxl import load_workbook
+# Version of MSOrganiser, read from the first heading of NEWS.md when it is first needed
+_msorganiser_version = None
+
+def get_msorganiser_version():
+    """Function to get the version of MSOrganiser from the first heading of NEWS.md
+
+    Returns:
+        msorganiser_version (str): the version, such as 1.1.2.9000, or "unknown" if NEWS.md cannot be read
+
+    Note:
+        NEWS.md is kept next to the python files, and in the folder of the files of the executable file
+    """
+    global _msorganiser_version
+    if _msorganiser_version is None:
+        try:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "NEWS.md"), "r", encoding = "utf-8") as news_file:
+                version_match = re.match(r"#\s*MSOrganiser\s+(\S+)", news_file.readline())
+        except OSError:
+            version_match = None
+        _msorganiser_version = version_match.group(1) if version_match else "unknown"
+    return _msorganiser_version
+
+def load_workbook(*args, **kwargs):
+    # openpyxl is only imported when an excel file is read,
+    # runs that use the annotation snapshot do not need it
+    from openpyxl import load_workbook as openpyxl_load_workbook
+    return openpyxl_load_workbook(*args, **kwargs)
 
 class MS_Template():
     """A class to describe the excel macro sheet MS Template Creator
@@ -17,8 +48,34 @@ class MS_Template():
         ingui (bool): if True, print analysis status to screen
         doing_normalization (bool): if True, check if input file has data. If no data, throws an error
         allow_multiple_istd (bool): if True, allow normalization of data by mulitple internal standards
+
+    Note:
+        The annotation sheets of a workbook are loaded once and kept in a cache shared by every MS_Template object.
+        The cache is keyed by the file path and its modification time, so a workbook that is saved again is read again.
+        By default, the workbook is opened in read only mode and only the annotation sheets are streamed row by row,
+        so the other sheets and the cell formatting are never loaded.
+
+        When use_snapshot is True, the annotation sheets are also written to a snapshot file, in snapshot_directory 
+        or next to the workbook when snapshot_directory is None. Later runs load the snapshot instead of the workbook 
+        as long as the content of the workbook, the MSOrganiser version, read_only_workbook and the snapshot format 
+        have not changed. Otherwise, the snapshot is created again. The snapshot is a text file in JSON, with a header line checked before the sheets are read
+        and one line per sheet with the cell values of each column.
     """
 
+    # Sheets that are kept in the cache as rows of cell values
+    ANNOTATION_SHEETS = ["Transition_Name_Annot", "ISTD_Annot", "Sample_Annot"]
+    # Maximum number of annotation workbooks kept in the cache. Set to 0 to disable the cache
+    max_cached_workbooks = 2
+    # If True, stream the annotation sheets row by row in read only mode. Else, load the whole workbook
+    read_only_workbook = True
+    # If True, keep a snapshot of the annotation sheets for later runs
+    use_snapshot = False
+    # Folder to keep the snapshots. If None, the snapshot is kept next to the workbook
+    snapshot_directory = None
+    # Increase when the content of the snapshot changes
+    SNAPSHOT_FORMAT_VERSION = 2
+    __workbook_cache = OrderedDict()
+
     def __init__(self,filepath,column_name, logger=None,ingui=True, 
                  doing_normalization = False, allow_multiple_istd = False):
         self.__logger = logger
@@ -28,6 +85,12 @@ class MS_Template():
         self.__doing_normalization = doing_normalization
         self.__allow_multiple_istd = allow_multiple_istd
 
+    def clear_workbook_cache():
+        """Remove every annotation workbook kept in the cache
+
+        """
+        MS_Template.__workbook_cache.clear()
+
     def remove_whiteSpaces(df):
         """Strip the whitespaces for each string columns of a df
 
@@ -90,9 +153,28 @@ class MS_Template():
             sys.exit(-1)
 
     def __readExcelWorkbook(self):
+        # Get a dictionary with the rows of the annotation sheets at "sheets". 
+        # Data derived from the sheets, such as the Sample_Annot index, are added to the same dictionary
+        # Reuse it if the workbook has not changed since it was read
+        file_stat = os.stat(self.filepath)
+        cache_key = (os.path.abspath(self.filepath), file_stat.st_mtime_ns, file_stat.st_size)
+        if cache_key in MS_Template.__workbook_cache:
+            MS_Template.__workbook_cache.move_to_end(cache_key)
+            return MS_Template.__workbook_cache[cache_key]
+
+        # Reuse the annotation sheets of the snapshot if the workbook has not changed since it was written
+        if MS_Template.use_snapshot:
+            content_hash = self.__get_content_hash()
+            sheets = self.__read_snapshot(content_hash)
+            if sheets is not None:
+                workbook = {"sheets" : sheets}
+                self.__add_to_workbook_cache(cache_key, workbook)
+                return workbook
+
         # Read the excel file
         try:
-            wb = load_workbook(filename=self.filepath,data_only=True)
+            wb = load_workbook(filename=self.filepath,data_only=True,
+                               read_only=MS_Template.read_only_workbook)
         except Exception as e:
             if self.__logger:
                 self.__logger.error("Unable to read excel file %s",self.filepath)
@@ -101,17 +183,203 @@ class MS_Template():
                 print("Unable to read excel file " + self.filepath,flush=True)
                 print(e,flush=True)
             sys.exit(-1)
-        return wb
 
-    def __checkExcelWorksheet_in_Workbook(self,sheetname,wb):
+        # Keep the cell values of the annotation sheets only
+        sheets = {sheetname : MS_Template.__read_sheet_rows(wb[sheetname])
+                  for sheetname in MS_Template.ANNOTATION_SHEETS if sheetname in wb.sheetnames}
+
+        #Close the workbook
+        wb.close()
+
+        workbook = {"sheets" : sheets}
+        self.__add_to_workbook_cache(cache_key, workbook)
+        if MS_Template.use_snapshot:
+            self.__write_snapshot(content_hash, sheets)
+
+        return workbook
+
+    def __add_to_workbook_cache(self,cache_key,workbook):
+        # Keep the sheets, removing older versions of the same workbook and the least recently used workbooks
+        if MS_Template.max_cached_workbooks > 0:
+            for key in [key for key in MS_Template.__workbook_cache if key[0] == cache_key[0]]:
+                del MS_Template.__workbook_cache[key]
+            MS_Template.__workbook_cache[cache_key] = workbook
+            while len(MS_Template.__workbook_cache) > MS_Template.max_cached_workbooks:
+                MS_Template.__workbook_cache.popitem(last = False)
+
+    def __get_content_hash(self):
+        # Get the SHA-256 of the workbook content, read in blocks of 1 MB
+        file_hash = hashlib.sha256()
+        with open(self.filepath, "rb") as workbook_file:
+            for block in iter(lambda: workbook_file.read(1024 * 1024), b""):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    def get_snapshot_filepath(self):
+        """Get the file path of the snapshot of the annotation sheets
+
+        Returns:
+            snapshot_filepath (str): file path of the snapshot
+
+        Note:
+            In snapshot_directory, the file name also has part of the hash of the workbook file path
+            so that workbooks with the same file name in different folders do not share a snapshot.
+        """
+        workbook_filepath = os.path.abspath(self.filepath)
+        if MS_Template.snapshot_directory is None:
+            return workbook_filepath + ".snapshot"
+        path_hash = hashlib.sha256(workbook_filepath.encode("utf-8")).hexdigest()[0:12]
+        return os.path.join(MS_Template.snapshot_directory,
+                            os.path.basename(workbook_filepath) + "." + path_hash + ".snapshot")
+
+    def __read_snapshot(self,content_hash):
+        # Load the annotation sheets from the snapshot. None if there is no snapshot or it is stale.
+        # The header is checked before the lines with the sheets are read
+        snapshot_filepath = self.get_snapshot_filepath()
+        if not os.path.isfile(snapshot_filepath):
+            return None
+
+        sheets = None
+        try:
+            with open(snapshot_filepath, "r", encoding = "utf-8") as snapshot_file:
+                header = json.loads(snapshot_file.readline())
+                if (isinstance(header, dict) and
+                    header.get("format_version") == MS_Template.SNAPSHOT_FORMAT_VERSION and
+                    header.get("msorganiser_version") == get_msorganiser_version() and
+                    header.get("read_only_workbook") == MS_Template.read_only_workbook and
+                    header.get("content_hash") == content_hash and
+                    isinstance(header.get("sheetnames"), list)):
+                    sheets = {}
+                    for sheetname in header["sheetnames"]:
+                        sheet = json.loads(snapshot_file.readline())
+                        sheets[sheetname] = MS_Template.__decode_sheet_columns(sheetname, sheet)
+        except Exception:
+            sheets = None
+
+        if sheets is None:
+            if self.__logger:
+                self.__logger.info("The snapshot %s is out of date and will be created again.",snapshot_filepath)
+            return None
+
+        return sheets
+
+    def __write_snapshot(self,content_hash,sheets):
+        # Write the annotation sheets to a temporary file first 
+        # so that an unfinished snapshot never replaces a good one
+        snapshot_filepath = self.get_snapshot_filepath()
+        header = {"format_version" : MS_Template.SNAPSHOT_FORMAT_VERSION,
+                  "msorganiser_version" : get_msorganiser_version(),
+                  "read_only_workbook" : MS_Template.read_only_workbook,
+                  "content_hash" : content_hash,
+                  "sheetnames" : list(sheets)}
+        temp_filepath = None
+        try:
+            os.makedirs(os.path.dirname(snapshot_filepath), exist_ok = True)
+            file_descriptor, temp_filepath = tempfile.mkstemp(dir = os.path.dirname(snapshot_filepath), suffix = ".tmp")
+            with os.fdopen(file_descriptor, "w", encoding = "utf-8") as snapshot_file:
+                snapshot_file.write(json.dumps(header) + "\n")
+                for sheetname, rows in sheets.items():
+                    snapshot_file.write(json.dumps(MS_Template.__encode_sheet_columns(sheetname, rows),
+                                                   allow_nan = False) + "\n")
+            os.replace(temp_filepath, snapshot_filepath)
+        except Exception as e:
+            # The snapshot is optional, the analysis can continue without it
+            if self.__logger:
+                self.__logger.warning("Unable to write the snapshot of the annotation file %s. %s",snapshot_filepath,e)
+            if self.__ingui:
+                print("Unable to write the snapshot of the annotation file " + snapshot_filepath + ". " + str(e),flush=True)
+            if temp_filepath and os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+
+    def __encode_sheet_columns(sheetname,rows):
+        # Turn the rows of a sheet into columns of values that json can keep.
+        # Dates and times are kept as a dictionary with their type and their text in ISO format
+        number_of_columns = len(rows[0]) if rows else 0
+        columns = [[MS_Template.__encode_cell_value(row[column_index]) for row in rows]
+                   for column_index in range(number_of_columns)]
+        return {"sheetname" : sheetname, "number_of_rows" : len(rows), "columns" : columns}
+
+    def __decode_sheet_columns(sheetname,sheet):
+        # Turn the columns of a sheet in the snapshot back into rows of cell values.
+        # A ValueError is raised when the columns are not the ones of the sheet written by __encode_sheet_columns
+        if (not isinstance(sheet, dict) or sheet.get("sheetname") != sheetname or
+            not isinstance(sheet.get("number_of_rows"), int) or not isinstance(sheet.get("columns"), list)):
+            raise ValueError("Invalid snapshot sheet " + sheetname)
+        number_of_rows = sheet["number_of_rows"]
+        columns = []
+        for column in sheet["columns"]:
+            if not isinstance(column, list) or len(column) != number_of_rows:
+                raise ValueError("Invalid snapshot column in sheet " + sheetname)
+            columns.append([MS_Template.__decode_cell_value(value) for value in column])
+        if not columns:
+            return tuple(() for _ in range(number_of_rows))
+        return tuple(zip(*columns))
+
+    def __encode_cell_value(value):
+        # Cell values from openpyxl are None, bool, int, float, str or a date, time or duration
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, datetime.datetime):
+            return {"type" : "datetime", "value" : value.isoformat()}
+        if isinstance(value, datetime.date):
+            return {"type" : "date", "value" : value.isoformat()}
+        if isinstance(value, datetime.time):
+            return {"type" : "time", "value" : value.isoformat()}
+        if isinstance(value, datetime.timedelta):
+            return {"type" : "timedelta", "value" : value.total_seconds()}
+        raise ValueError("Unable to keep a cell value of type " + type(value).__name__ + " in the snapshot")
+
+    def __decode_cell_value(value):
+        # Inverse of __encode_cell_value. Any other value raises a ValueError
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, dict) and set(value) == {"type", "value"}:
+            if value["type"] == "datetime" and isinstance(value["value"], str):
+                return datetime.datetime.fromisoformat(value["value"])
+            if value["type"] == "date" and isinstance(value["value"], str):
+                return datetime.date.fromisoformat(value["value"])
+            if value["type"] == "time" and isinstance(value["value"], str):
+                return datetime.time.fromisoformat(value["value"])
+            if value["type"] == "timedelta" and isinstance(value["value"], (int, float)):
+                return datetime.timedelta(seconds = value["value"])
+        raise ValueError("Invalid cell value in the snapshot")
+
+    def __read_sheet_rows(worksheet):
+        # Stream the cell values of a worksheet row by row.
+        # Empty rows at the end of the sheet (usually formatted but unused rows) are not kept
+        rows = []
+        number_of_empty_rows = 0
+        number_of_columns = 0
+        for row in worksheet.values:
+            if all(value is None for value in row):
+                number_of_empty_rows += 1
+                continue
+            rows.extend([()] * number_of_empty_rows)
+            number_of_empty_rows = 0
+            rows.append(row)
+            number_of_columns = max(number_of_columns, len(row))
+
+        # A sheet in read only mode without dimensions may give rows of different lengths
+        return tuple(row + (None,) * (number_of_columns - len(row)) for row in rows)
+
+    def __checkExcelWorksheet_in_Workbook(self,sheetname,sheets):
         # Check if the excel file has the sheet sheetname
-        if sheetname not in wb.sheetnames:
+        if sheetname not in sheets:
             if self.__logger:
                 self.__logger.error('Sheet name ' + sheetname + ' does not exists. Please check the input excel file.')
             if self.__ingui:
                 print('Sheet name ' + sheetname + ' does not exists. Please check the input excel file.',flush=True)
             sys.exit(-1)
 
+    def __get_cell_value(worksheet,cell_position):
+        # Get the value of a cell such as "A2" from the rows of a sheet, None if the cell is outside the sheet
+        column_letter, row_number = re.match(r"([A-Z])(\d+)", cell_position).groups()
+        row_index = int(row_number) - 1
+        column_index = ord(column_letter) - ord("A")
+        if row_index < len(worksheet) and column_index < len(worksheet[row_index]):
+            return worksheet[row_index][column_index]
+        return None
+
     def __check_if_df_is_empty(self,sheetname,df):
         # Validate the input sheet has data
         if df.empty:
@@ -152,16 +420,16 @@ class MS_Template():
         """
 
         #Open the excel file
-        wb = self.__readExcelWorkbook()
+        sheets = self.__readExcelWorkbook()["sheets"]
 
         #Check if the excel file has the sheet "Transition_Name_Annot"
-        self.__checkExcelWorksheet_in_Workbook("Transition_Name_Annot",wb)
+        self.__checkExcelWorksheet_in_Workbook("Transition_Name_Annot",sheets)
         
         #Convert worksheet to a dataframe
-        worksheet = wb["Transition_Name_Annot"]
+        worksheet = sheets["Transition_Name_Annot"]
         #Get the column names in the first row of the excel sheet
-        cols = next(worksheet.values)[0:]
-        Transition_Name_Annot_df = pd.DataFrame(worksheet.values, columns=cols)
+        cols = worksheet[0][0:]
+        Transition_Name_Annot_df = pd.DataFrame(worksheet, columns=cols)
 
         #We remove the first row as the headers as been set up
         Transition_Name_Annot_df = Transition_Name_Annot_df.iloc[1:]
@@ -194,9 +462,6 @@ class MS_Template():
           
         #print(Transition_Name_Annot_df)
 
-        #Close the workbook
-        wb.close()
-
         return Transition_Name_Annot_df
 
     def __validate_Transition_Name_Annot_sheet(self,sheetname,Transition_Name_Annot_df,
@@ -246,23 +511,23 @@ class MS_Template():
         """
 
         #Open the excel file
-        wb = self.__readExcelWorkbook()
+        sheets = self.__readExcelWorkbook()["sheets"]
 
         #Check if the excel file has the sheet "ISTD_Annot"
-        self.__checkExcelWorksheet_in_Workbook("ISTD_Annot",wb)
+        self.__checkExcelWorksheet_in_Workbook("ISTD_Annot",sheets)
         
         #Convert worksheet to a dataframe
-        worksheet = wb["ISTD_Annot"]
+        worksheet = sheets["ISTD_Annot"]
 
         #Check that sheet is valid
         self.__validate_ISTD_Annot_Sheet(worksheet)
 
         #Get the column names
-        istd_conc_name = re.sub("\[.*?\]",worksheet["F3"].value,worksheet["E3"].value)
-        cols = [worksheet["A2"].value, istd_conc_name]
+        istd_conc_name = re.sub(r"\[.*?\]",MS_Template.__get_cell_value(worksheet,"F3"),MS_Template.__get_cell_value(worksheet,"E3"))
+        cols = [MS_Template.__get_cell_value(worksheet,"A2"), istd_conc_name]
 
         #Get the ISTD Table and clean it up
-        ISTD_Annot_df = worksheet.values
+        ISTD_Annot_df = worksheet
         ISTD_Annot_df = pd.DataFrame(ISTD_Annot_df)
         
         #We remove the first three row as the headers as been set up
@@ -293,61 +558,58 @@ class MS_Template():
         #Remove whitespace for each string column
         ISTD_Annot_df = MS_Template.remove_whiteSpaces(ISTD_Annot_df)
 
-        #Close the workbook
-        wb.close()
-        
         return(ISTD_Annot_df)
 
     def __validate_ISTD_Annot_Sheet(self,worksheet):
         #Check if the sheet has been tampled
-        if worksheet["A2"].value != "Transition_Name_ISTD":
+        if MS_Template.__get_cell_value(worksheet,"A2") != "Transition_Name_ISTD":
             if self.__logger:
                 self.__logger.error('The ISTD_Annot sheet is missing the column Transition_Name_ISTD at position A2.')
             if self.__ingui:
                 print('The ISTD_Annot sheet is missing the column Transition_Name_ISTD at position A2.',flush=True)
             sys.exit(-1)
 
-        if worksheet["E3"].value != "ISTD_Conc_[nM]":
+        if MS_Template.__get_cell_value(worksheet,"E3") != "ISTD_Conc_[nM]":
             if self.__logger:
                 self.__logger.error('The ISTD_Annot sheet is missing the column ISTD_Conc_[nM] at position E3.')
             if self.__ingui:
                 print('The ISTD_Annot sheet is missing the column ISTD_Conc_[nM] at position E3.',flush=True)
             sys.exit(-1)
 
-        if worksheet["F2"].value != "Custom_Unit":
+        if MS_Template.__get_cell_value(worksheet,"F2") != "Custom_Unit":
             if self.__logger:
                 self.__logger.error('The ISTD_Annot sheet is missing the column Custom_Unit at position F2.')
             if self.__ingui:
                 print('The ISTD_Annot sheet is missing the column Custom_Unit at position F2.',flush=True)
             sys.exit(-1)
 
-        if worksheet["F3"].value in ["[M]","[mM]","[uM]","[nM]","[pM]",
+        if MS_Template.__get_cell_value(worksheet,"F3") in ["[M]","[mM]","[uM]","[nM]","[pM]",
                                      "[M] or [mmol/mL]", "[mM] or [umol/mL]",
                                      "[uM] or [nmol/mL]", "[nM] or [pmol/mL]",
                                      "[pM] or [fmol/mL]"]:
             if self.__logger:
                 self.__logger.error('Sheet ISTD_Annot\'s column Custom_Unit option ' +
-                                     worksheet["F3"].value + ' ' + 
+                                     MS_Template.__get_cell_value(worksheet,"F3") + ' ' + 
                                     'is no longer accepted in MSOrganiser. ' +
                                     'Please use a later version of MSTemplate_Creator (above 1.0.1).')
             if self.__ingui:
                 print('Sheet ISTD_Annot\'s column Custom_Unit option ' +
-                       worksheet["F3"].value + ' ' + 
+                       MS_Template.__get_cell_value(worksheet,"F3") + ' ' + 
                       'is no longer accepted in MSOrganiser. ' +
                       'Please use a later version of MSTemplate_Creator (above 1.0.1).', 
                       flush=True)
             sys.exit(-1)
 
-        if worksheet["F3"].value not in ["[M]","[mM]","[uM]","[nM]","[pM]",
+        if MS_Template.__get_cell_value(worksheet,"F3") not in ["[M]","[mM]","[uM]","[nM]","[pM]",
                                          "[M] or [umol/uL]", "[mM] or [nmol/uL]",
                                          "[uM] or [pmol/uL]", "[nM] or [fmol/uL]",
                                          "[pM] or [amol/uL]"]:
             if self.__logger:
                 self.__logger.error('Sheet ISTD_Annot\'s column Custom_Unit option ' +
-                                    worksheet["F3"].value + ' is invalid.')
+                                    MS_Template.__get_cell_value(worksheet,"F3") + ' is invalid.')
             if self.__ingui:
                 print('Sheet ISTD_Annot\'s column Custom_Unit option ' +
-                      worksheet["F3"].value + ' is invalid.', 
+                      MS_Template.__get_cell_value(worksheet,"F3") + ' is invalid.', 
                       flush=True)
             sys.exit(-1)
 
@@ -367,42 +629,46 @@ class MS_Template():
         """
 
         #Open the excel file
-        wb = self.__readExcelWorkbook()
+        workbook = self.__readExcelWorkbook()
 
         #Check if the excel file has the sheet "Sample_Annot"
-        self.__checkExcelWorksheet_in_Workbook("Sample_Annot",wb)
-        
-        #Convert worksheet to a dataframe
-        worksheet = wb["Sample_Annot"]
-        #Get the column names in the first row of the excel sheet
-        cols = next(worksheet.values)[0:]
-        Sample_Annot_df = pd.DataFrame(worksheet.values, columns=cols)
+        self.__checkExcelWorksheet_in_Workbook("Sample_Annot",workbook["sheets"])
 
-        #We remove the first row as the headers as been set up
-        Sample_Annot_df = Sample_Annot_df.iloc[1:]
-        #Reset the row index
-        Sample_Annot_df = Sample_Annot_df.reset_index(drop=True)
+        #Convert worksheet to a dataframe once for each workbook
+        if "Sample_Annot_df" not in workbook:
+            worksheet = workbook["sheets"]["Sample_Annot"]
+            #Get the column names in the first row of the excel sheet
+            cols = worksheet[0][0:]
+            Sample_Annot_df = pd.DataFrame(worksheet, columns=cols)
+
+            #We remove the first row as the headers as been set up
+            Sample_Annot_df = Sample_Annot_df.iloc[1:]
+            #Reset the row index
+            Sample_Annot_df = Sample_Annot_df.reset_index(drop=True)
 
-        #Remove rows with all None, NA,NaN
-        Sample_Annot_df = Sample_Annot_df.dropna(axis=0, how='all')
+            #Remove rows with all None, NA,NaN
+            Sample_Annot_df = Sample_Annot_df.dropna(axis=0, how='all')
+            workbook["Sample_Annot_df"] = Sample_Annot_df
+
+        Sample_Annot_df = workbook["Sample_Annot_df"]
 
         #Validate the Sample_Annot sheet is valid 
         # (the columns are not remove in the excel sheet but can be empty)
         self.__validate_Sample_Annot_sheet("Sample_Annot",Sample_Annot_df)
 
+        #Index the row positions of each Data_File_Name once for each workbook
+        if "Data_File_Name_index" not in workbook:
+            workbook["Data_File_Name_index"] = Sample_Annot_df.groupby("Data_File_Name", sort = False).indices
+
         #We take the Sample Annotation data that can be found in the MS_FilePathList
         #Else we just take all of them
         if len(MS_FilePathList) > 0:
-            Sample_Annot_df = Sample_Annot_df[Sample_Annot_df.Data_File_Name.isin(MS_FilePathList)]
-            MS_FilePath_with_no_sample_annot = []
-
-            # Check that the Filtered_Sample_Annot_df is not empty for each of the provided MS_FilePath
-            # If yes, stop the program and inform the user to check the Sample Annot file
-            for MS_FilePath in MS_FilePathList:
-                Filtered_Sample_Annot_df = Sample_Annot_df[Sample_Annot_df.Data_File_Name.isin([MS_FilePath])]
+            Data_File_Name_index = workbook["Data_File_Name_index"]
 
-                if(len(Filtered_Sample_Annot_df.index) == 0 ):
-                    MS_FilePath_with_no_sample_annot.append(MS_FilePath)
+            # Check that the Sample Annotation has rows for each of the provided MS_FilePath
+            # If no, stop the program and inform the user to check the Sample Annot file
+            MS_FilePath_with_no_sample_annot = [MS_FilePath for MS_FilePath in MS_FilePathList
+                                                if MS_FilePath not in Data_File_Name_index]
 
             if(len(MS_FilePath_with_no_sample_annot) > 0 ):
                 if self.__logger:
@@ -416,6 +682,13 @@ class MS_Template():
                           flush = True)
                 sys.exit(-1)
 
+            # Take the rows of the input files, keeping the order of the Sample_Annot sheet
+            row_positions = np.sort(np.concatenate([Data_File_Name_index[MS_FilePath] 
+                                                    for MS_FilePath in dict.fromkeys(MS_FilePathList)]))
+            Sample_Annot_df = Sample_Annot_df.iloc[row_positions].copy()
+        else:
+            Sample_Annot_df = Sample_Annot_df.copy()
+
         #Remove whitespaces in column names
         Sample_Annot_df.columns = Sample_Annot_df.columns.str.strip()
 
@@ -430,9 +703,6 @@ class MS_Template():
         #Remove whitespace for each string column
         Sample_Annot_df = MS_Template.remove_whiteSpaces(Sample_Annot_df)
 
-        #Close the workbook
-        wb.close()
-
         return Sample_Annot_df
 
     def __validate_Sample_Annot_sheet(self,sheetname,Sample_Annot_df):
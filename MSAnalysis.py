@@ -5,6 +5,10 @@ import os
 import sys
 import pandas as pd
 import MSDuplicateCheck
+import MSParallel
+from MSConcatenate import ConcatenationBuilder
+from MSLongTable import LongTableBuilder
+from collections import OrderedDict
 
 class MS_Analysis():
     """
@@ -20,13 +24,20 @@ class MS_Analysis():
         ingui (bool): if True, print analysis status to screen
         longtable (bool): if True, prepare a dataframe to store results in long table
         longtable_annot (bool): if True, prepare a dataframe to store annotation details in long table
+        max_cached_files (int): maximum number of parsed input files kept in memory. Set to 0 to disable the cache
+        number_of_workers (int): number of workers used to read the input files in MS_FilePaths. Set to 1 to read them one after another
+
+    Note:
+        Each input file is parsed once and the parsed data is reused by every output option
+        until it is evicted (least recently used first) or released with release_InputData_cache
     """
 
     def __init__(self, MS_FilePath = None , MS_FilePaths = [],
                  MS_FileType = None, 
                  Annotation_FilePath=None,
                  logger=None, ingui=True,  
-                 longtable = False, longtable_annot = False):
+                 longtable = False, longtable_annot = False,
+                 max_cached_files = 1, number_of_workers = 1):
         self.MS_FilePath = MS_FilePath
         self.MS_FilePaths = MS_FilePaths
         self.MS_FileType = MS_FileType
@@ -36,7 +47,9 @@ class MS_Analysis():
         self.ingui = ingui
 
         #Initialise the data in long table starting with an empty dataframe
+        #The wide data of each output option is collected by LongTable_builder
         self.LongTable_df = pd.DataFrame()
+        self.LongTable_builder = LongTableBuilder()
 
         self.LongTable = longtable
         self.LongTable_Annot = longtable_annot
@@ -48,7 +61,28 @@ class MS_Analysis():
         self.ISTD_map_df = pd.DataFrame()
         self.Sample_Annot_df = pd.DataFrame()
 
+        #Parsed input data, keyed by the input file path
+        self.max_cached_files = max_cached_files
+        self.InputData_cache = OrderedDict()
+
+        #Number of workers used to read multiple input files
+        self.number_of_workers = number_of_workers
+
+    def release_InputData_cache(self):
+        """Function to release the parsed input data held in memory.
+
+        Note:
+            The input files will be parsed again if their data is requested after the release.
+
+        """
+        self.InputData_cache.clear()
+
     def _prepare_InputData(self):
+        # Reuse the parsed input file if it is still in the cache
+        if self.MS_FilePath in self.InputData_cache:
+            self.InputData_cache.move_to_end(self.MS_FilePath)
+            return(self.InputData_cache[self.MS_FilePath])
+
         if self.MS_FileType in ['Agilent Wide Table in csv', 'Agilent Compound Table in csv']:
             if self.MS_FilePath.endswith('.csv'):
                 InputData = AgilentMSRawData(filepath=self.MS_FilePath,logger=self.logger)
@@ -74,61 +108,60 @@ class MS_Analysis():
                           'must have a .txt extention.',
                           flush = True)
                 sys.exit(-1)
+
+        # Keep the parsed input file, removing the least recently used ones when the cache is full
+        if self.max_cached_files > 0:
+            self.InputData_cache[self.MS_FilePath] = InputData
+            while len(self.InputData_cache) > self.max_cached_files:
+                self.InputData_cache.popitem(last = False)
+
         return(InputData)
 
+    def _get_Area_df_list(self):
+        # Read the Area of every input file, in the same order as MS_FilePaths
+        if self.number_of_workers > 1 and len(self.MS_FilePaths) > 1:
+            [Area_df_list, failed_files] = MSParallel.process_files_in_parallel(_get_Area_table,
+                                                                                self.MS_FilePaths,
+                                                                                min(self.number_of_workers, len(self.MS_FilePaths)),
+                                                                                logger = self.logger,
+                                                                                MS_FileType = self.MS_FileType)
+            # Normalisation needs every input file, stop if any of them failed
+            MSParallel.report_failed_files(failed_files, logger = self.logger, ingui = True)
+            # Leave MS_FilePath at the last input file like the sequential reading
+            self.MS_FilePath = self.MS_FilePaths[-1]
+            return(Area_df_list)
+
+        Area_df_list = []
+        for MS_FilePath in self.MS_FilePaths:
+            self.MS_FilePath = MS_FilePath
+            InputData = self._prepare_InputData()
+            Area_df_list.append(InputData.get_table('Area',is_numeric=True))
+        return(Area_df_list)
+
     def _get_Area_df_for_normalisation(self,
                                        using_multiple_input_files = False,
                                        concatenation_type = "rows"):
 
         if using_multiple_input_files:
-            concatenate_Area_df = pd.DataFrame()
-            first_time = True
-
-            for MS_FilePath in self.MS_FilePaths:
-                self.MS_FilePath = MS_FilePath
-                InputData = self._prepare_InputData()
-                Area_df = InputData.get_table('Area',is_numeric=True)
-                #Concantenate Column Wise
-                if first_time:
-                    concatenate_Area_df = Area_df
-                    first_time = False
-                else:
-                    if concatenation_type == "rows":
-                        concatenate_Area_df = pd.concat([concatenate_Area_df, Area_df], 
-                                                        ignore_index=True, 
-                                                        sort=False, 
-                                                        axis = 0)
-                    elif concatenation_type == "columns":
-                        #Remove the Sample_Name column
-                        Area_df = Area_df.loc[:, Area_df.columns != 'Sample_Name']
-                        concatenate_Area_df = pd.concat([concatenate_Area_df, Area_df], 
-                                                        ignore_index=False, 
-                                                        sort=False, 
-                                                        axis = 1)
-                    else:
-                        if self.ingui:
-                            print('Input concatenation type must be "rows" or "columns". Current input is ' + concatenation_type ,flush=True)
-                        if self.logger:
-                            self.logger.error('Input concatenation type must be "rows" or "columns". Current input is %s', concatenation_type)
-                        sys.exit(-1)
 
-            # We check if the concatenated data is valid without
-            # any duplicated columns and sample names, if there are, we should not proceed to calculation
-            # and inform the user of this issue.
             output_option = "Area used for normalisation"
             if concatenation_type == "rows":
                 output_option = "row concatenated Area used for normalisation"
             elif concatenation_type == "columns":
                 output_option = "column concatenated Area used for normalisation"
 
-            # Check for duplicate column names (transition names)
-            MSDuplicateCheck.check_duplicated_columns_in_wide_data(concatenate_Area_df, output_option,
-                                                                 logger = self.logger, ingui = True,
-                                                                 allow_multiple_istd = False)
-            # Check for duplicate row names (sample names)
-            MSDuplicateCheck.check_duplicated_sample_names_in_wide_data(concatenate_Area_df, output_option,
-                                                                      logger = self.logger, ingui = True,
-                                                                      allow_multiple_istd = False)
+            # We check if the concatenated data is valid without
+            # any duplicated columns and sample names while collecting the Area of each input file,
+            # if there are, we should not proceed to calculation and inform the user of this issue.
+            Area_Concatenation = ConcatenationBuilder(concatenation_type = concatenation_type,
+                                                      output_option = output_option,
+                                                      check_duplicates = True,
+                                                      logger = self.logger, ingui = True)
+
+            for MS_FilePath, Area_df in zip(self.MS_FilePaths, MS_Analysis._get_Area_df_list(self)):
+                Area_Concatenation.add(Area_df, source = os.path.basename(MS_FilePath))
+
+            concatenate_Area_df = Area_Concatenation.get_concatenated_df()
 
             return(concatenate_Area_df)
         else:
@@ -150,35 +183,7 @@ class MS_Analysis():
 
     def _add_to_LongTable_df(self,wide_df,column_name,allow_multiple_istd = False):
 
-        if wide_df.empty:
-            return
-
-        if allow_multiple_istd:
-            wide_df = pd.melt(wide_df,id_vars=["Sample_Name"],
-                              var_name= ["Transition_Name","Transition_Name_ISTD"],
-                              value_name=column_name)
-            if self.LongTable_df.empty:
-                self.LongTable_df = wide_df
-            else:
-                # This is handle the case when the LongTable contains 
-                # only columns that do not need calculation like Area
-                # Hence this,LongTable will not have the column "Transition_Name_ISTD"
-                if "Transition_Name_ISTD" not in self.LongTable_df.columns:
-                    self.LongTable_df = pd.merge(self.LongTable_df, wide_df , 
-                                                 on=["Sample_Name","Transition_Name"], 
-                                                 how = 'left')
-                else:
-                    self.LongTable_df = pd.merge(self.LongTable_df, wide_df , 
-                                                 on=["Sample_Name","Transition_Name","Transition_Name_ISTD"], 
-                                                 how = 'left')
-                #print(self.LongTable_df)
-                self.LongTable_df = self.LongTable_df.drop_duplicates()
-        else:
-            wide_df = pd.melt(wide_df,id_vars=["Sample_Name"],var_name="Transition_Name", value_name=column_name)
-            if self.LongTable_df.empty:
-                self.LongTable_df = wide_df
-            else:
-                self.LongTable_df = pd.merge(self.LongTable_df, wide_df , on=["Sample_Name","Transition_Name"], how='left')
+        self.LongTable_builder.add(wide_df,column_name,allow_multiple_istd)
 
     def get_Long_Table(self, allow_multiple_istd = False, concatenation_type = None):
         """Function to get the long table of the extracted or calculated MRM transition name data.
@@ -192,6 +197,9 @@ class MS_Analysis():
 
         """
 
+        #Build the Long Table from the output options collected so far
+        self.LongTable_df = self.LongTable_builder.get_long_table_df()
+
         #Check if the Long Table has data
         if self.LongTable_df.empty:
             # No need to give warning as MSDataOutput.py will give this warning
@@ -201,6 +209,41 @@ class MS_Analysis():
             #    print("Long Table has no data",flush=True)
             return self.LongTable_df
 
+        [ISTD_map_merge_df, Sample_Annot_merge_df] = self._get_Long_Table_Annot(allow_multiple_istd, concatenation_type)
+        self.LongTable_df = self._arrange_Long_Table_df(self.LongTable_df, ISTD_map_merge_df, Sample_Annot_merge_df,
+                                                        allow_multiple_istd)
+
+        return self.LongTable_df
+
+    def iter_Long_Table(self, allow_multiple_istd = False, concatenation_type = None, chunk_size = 100000):
+        """Function to get the long table of the extracted or calculated MRM transition name data a few rows at a time.
+
+        Args:
+            allow_multiple_istd (bool): if True, allow Transition_Annot data by to have mulitple internal standards (in development)
+            concatenation_type (str): "rows or columns or None" to indicate if how Sample_Annot should be cleaned before merging with the Long_Table.
+            chunk_size (int): maximum number of rows in each data frame
+
+        Returns:
+            (generator): A generator of long data frames with the columns of get_Long_Table. Together, they give the rows of get_Long_Table in the same order
+
+        Note:
+            The annotation columns are merged to one data frame at a time, so the whole long table is never created.
+            self.LongTable_df is left unchanged.
+        """
+
+        ISTD_map_merge_df = None
+        for LongTable_chunk_df in self.LongTable_builder.iter_long_table_df(chunk_size):
+            #Read the annotation file once, when the Long Table has data
+            if ISTD_map_merge_df is None:
+                [ISTD_map_merge_df, Sample_Annot_merge_df] = self._get_Long_Table_Annot(allow_multiple_istd, concatenation_type)
+            yield self._arrange_Long_Table_df(LongTable_chunk_df, ISTD_map_merge_df, Sample_Annot_merge_df,
+                                              allow_multiple_istd)
+
+    def _get_Long_Table_Annot(self, allow_multiple_istd = False, concatenation_type = None):
+
+        ISTD_map_merge_df = pd.DataFrame()
+        Sample_Annot_merge_df = pd.DataFrame()
+
         #If we ask for the Sample Type and Transition Name ISTD to be present in the Long Table and an annotation file is given
         if self.LongTable_Annot and self.Annotation_FilePath:
             #To handle the case when no normalization is required but we still need to read the annotation file
@@ -218,36 +261,40 @@ class MS_Analysis():
                 #if allow_multiple_istd:
                 if not allow_multiple_istd:
                     merge_column = ["Transition_Name","Transition_Name_ISTD"]
-                    self.LongTable_df = pd.merge(self.LongTable_df, 
-                                                 self.ISTD_map_df[[item for item in merge_column if item in self.ISTD_map_df.columns.tolist()]] , 
-                                                 on=["Transition_Name"], 
-                                                 how='left')
+                    ISTD_map_merge_df = self.ISTD_map_df[[item for item in merge_column if item in self.ISTD_map_df.columns.tolist()]]
             if not self.Sample_Annot_df.empty:
                 merge_column = ["Sample_Name","Sample_Type","Concentration_Unit"]
-                merged_df = self.Sample_Annot_df[[item for item in merge_column if item in self.Sample_Annot_df.columns.tolist()]]
+                Sample_Annot_merge_df = self.Sample_Annot_df[[item for item in merge_column if item in self.Sample_Annot_df.columns.tolist()]]
                 if concatenation_type == "columns":
                     # When concatenating by column, the Sample_Name will be the same for each input file -> The Sample Annot file is sure to have duplicated Sample Names
-                    merged_df = merged_df.drop_duplicates()
-                #common_columns = list(set(self.LongTable_df.columns).intersection(merged_df.columns))
-                #print(common_columns)
-                self.LongTable_df = pd.merge(self.LongTable_df, 
-                                             merged_df, 
-                                             on=["Sample_Name"], 
-                                             how='left')
+                    Sample_Annot_merge_df = Sample_Annot_merge_df.drop_duplicates()
+
+        return [ISTD_map_merge_df, Sample_Annot_merge_df]
+
+    def _arrange_Long_Table_df(self, LongTable_df, ISTD_map_merge_df, Sample_Annot_merge_df, allow_multiple_istd = False):
+
+        if not ISTD_map_merge_df.empty:
+            LongTable_df = pd.merge(LongTable_df, 
+                                    ISTD_map_merge_df, 
+                                    on=["Transition_Name"], 
+                                    how='left')
+        if not Sample_Annot_merge_df.empty:
+            LongTable_df = pd.merge(LongTable_df, 
+                                    Sample_Annot_merge_df, 
+                                    on=["Sample_Name"], 
+                                    how='left')
         #Reorder the columns
-        col_order = self.LongTable_df.columns.tolist()
+        col_order = LongTable_df.columns.tolist()
         if self.LongTable_Annot and self.Annotation_FilePath:
             first_few_column = ["Transition_Name","Transition_Name_ISTD","Sample_Name","Sample_Type","Concentration_Unit"]
             col_order =  [item for item in first_few_column if item in col_order]  + [item for item in col_order if item not in first_few_column]
         else:
-            if allow_multiple_istd  and "Transition_Name_ISTD" in self.LongTable_df.columns.tolist():
+            if allow_multiple_istd  and "Transition_Name_ISTD" in LongTable_df.columns.tolist():
                 col_order = ["Transition_Name","Transition_Name_ISTD","Sample_Name"] + [item for item in col_order if item not in ["Transition_Name","Transition_Name_ISTD","Sample_Name"]]
             else:
                 col_order = ["Transition_Name","Sample_Name"] + [item for item in col_order if item not in ["Sample_Name","Transition_Name"]]
 
-        self.LongTable_df = self.LongTable_df[col_order] 
-
-        return self.LongTable_df
+        return LongTable_df[col_order]
 
     def get_from_Input_Data(self,column_name,outputdata=True,allow_multiple_istd = False):
         """Function to get a specific column from the input MRM transition name data.
@@ -266,6 +313,39 @@ class MS_Analysis():
         InputData = self._prepare_InputData()
         Output_df = InputData.get_table(column_name,is_numeric=True)
 
+        Output_df = MS_Analysis._process_Input_Data_table(self,Output_df,column_name,allow_multiple_istd)
+
+        if outputdata:
+            return(Output_df)
+
+    def get_tables_from_Input_Data(self,column_names,outputdata=True,allow_multiple_istd = False):
+        """Function to get several columns from the input MRM transition name data in one pass.
+
+        Args:
+            column_names (list): The names of the columns given in the Output_Options.
+            outputdata (bool): if True, return the results as a dictionary of pandas dataframe. Else, nothing is returned
+            allow_multiple_istd (bool): if True, allow normalisation of peak area by mulitple internal standards which leads to an expansion of the Output_df
+
+        Returns:
+            Output_df_dict (dict): A dictionary with the column names as keys and a data frame of sample as rows 
+            and transition names as columns with values from the chosen column name as values
+
+        """
+
+        # We extract the data of all the columns directly from the file and output accordingly
+        InputData = self._prepare_InputData()
+        table_dict = InputData.get_tables(column_names,is_numeric=True)
+
+        Output_df_dict = {}
+        for column_name in column_names:
+            Output_df_dict[column_name] = MS_Analysis._process_Input_Data_table(self,table_dict[column_name],
+                                                                                column_name,allow_multiple_istd)
+
+        if outputdata:
+            return(Output_df_dict)
+
+    def _process_Input_Data_table(self,Output_df,column_name,allow_multiple_istd = False):
+
         if not Output_df.empty:
             # Check for duplicate column names (transition names)
             MSDuplicateCheck.check_duplicated_columns_in_wide_data(Output_df, column_name,
@@ -308,14 +388,14 @@ class MS_Analysis():
         if self.LongTable:
             MS_Analysis._add_to_LongTable_df(self,Output_df,column_name,allow_multiple_istd)
 
-        if outputdata:
-            return(Output_df)
+        return(Output_df)
 
     def get_Normalised_Area(self,analysis_name, 
                             outputdata=True, 
                             allow_multiple_istd = False,
                             using_multiple_input_files = False,
-                            concatenation_type = "rows"):
+                            concatenation_type = "rows",
+                            Area_df = None):
         """Function to calculate the normalised area from the input MRM transition name data and MS Template Creator annotation file.
 
         Args:
@@ -324,6 +404,7 @@ class MS_Analysis():
             allow_multiple_istd (bool): if True, allow normalisation of peak area by mulitple internal standards (in development)
             using_multiple_input_files (bool): if True, the Area df will be constructed from multiple input files, denoted in MS_FilePaths (in development)
             concatenation_type (str): "rows or columns" to indicate if the Area_df is to be concatenated by row wise or column wise respectively
+            Area_df (pandas DataFrame): The Area already extracted from the input files, concatenated if using_multiple_input_files is True. Leave as None to read it from the input files
         
         Returns:
             (list): list containing:
@@ -336,11 +417,12 @@ class MS_Analysis():
         """
 
         #Perform normalisation using ISTD
-        ##Get Area Table
+        ##Get Area Table, unless it has been extracted already
 
-        Area_df = MS_Analysis._get_Area_df_for_normalisation(self, 
-                                                             using_multiple_input_files = using_multiple_input_files,
-                                                             concatenation_type = concatenation_type)
+        if Area_df is None:
+            Area_df = MS_Analysis._get_Area_df_for_normalisation(self, 
+                                                                 using_multiple_input_files = using_multiple_input_files,
+                                                                 concatenation_type = concatenation_type)
 
         #Get ISTD map df
         ISTD_map_df = ISTD_Operations.read_ISTD_map(self.Annotation_FilePath,analysis_name,
@@ -374,7 +456,9 @@ class MS_Analysis():
                                   outputdata=True,
                                   allow_multiple_istd = False,
                                   using_multiple_input_files = False,
-                                  concatenation_type = "rows"):
+                                  concatenation_type = "rows",
+                                  output_intermediate_data = True,
+                                  Area_df = None):
         """Function to calculate the transition names concentration from the input MRM transition name data and MS Template Creator annotation file.
 
         Args:
@@ -383,6 +467,8 @@ class MS_Analysis():
             allow_multiple_istd (bool): if True, allow normalisation of peak area by mulitple internal standards
             using_multiple_input_files (bool): if True, the Area df will be constructed from multiple input files, denoted in MS_FilePaths (in development)
             concatenation_type (str): "rows or columns" to indicate if the Area_df is to be concatenated by row wise or column wise respectively
+            output_intermediate_data (bool): if True, also create ISTD_Conc_df and ISTD_Samp_Ratio_df. Else, they are returned as empty data frames
+            Area_df (pandas DataFrame): The Area already extracted from the input files, concatenated if using_multiple_input_files is True. Only used when the normalised area is not calculated yet
 
         Returns:
             (list): list containing:
@@ -400,7 +486,8 @@ class MS_Analysis():
                                      outputdata=False,
                                      allow_multiple_istd = allow_multiple_istd,
                                      using_multiple_input_files = using_multiple_input_files,
-                                     concatenation_type = concatenation_type)
+                                     concatenation_type = concatenation_type,
+                                     Area_df = Area_df)
 
         # At this stage, the self.norm_Area_df should have been concatenated if option is selected...
 
@@ -423,11 +510,19 @@ class MS_Analysis():
                                                                                          self.Sample_Annot_df,
                                                                                          logger=self.logger,ingui=self.ingui,
                                                                                          allow_multiple_istd = allow_multiple_istd,
-                                                                                         allow_multiple_data_file_path = using_multiple_input_files)
+                                                                                         allow_multiple_data_file_path = using_multiple_input_files,
+                                                                                         output_intermediate_data = output_intermediate_data)
 
         #Create the Long Form dataframe
         if self.LongTable:
             MS_Analysis._add_to_LongTable_df(self,norm_Conc_df,"normConc",allow_multiple_istd)
 
         if outputdata:
-            return([norm_Conc_df,ISTD_Conc_df,ISTD_Samp_Ratio_df,Sample_Annot_df])
\ No newline at end of file
+            return([norm_Conc_df,ISTD_Conc_df,ISTD_Samp_Ratio_df,Sample_Annot_df])
+
+def _get_Area_table(MS_FilePath, logger=None, MS_FileType=None):
+    # Read the Area of one input file in a worker of MSParallel
+    MyData = MS_Analysis(MS_FilePath = MS_FilePath, MS_FileType = MS_FileType,
+                         logger = logger, ingui = True, max_cached_files = 0)
+    InputData = MyData._prepare_InputData()
+    return(InputData.get_table('Area',is_numeric=True))
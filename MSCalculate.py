@@ -3,8 +3,8 @@ import numpy as np
 import sys
 import os
 import logging
+from collections import Counter
 
-from openpyxl import load_workbook
 from Annotation import MS_Template
 
 class ISTD_Operations():
@@ -176,14 +176,19 @@ class ISTD_Operations():
         ISTD_report = []
         Transition_Name_df_column_list = list(Transition_Name_df.columns.values)
 
+        #Look up the Transition_Name_ISTD of every Transition_Name in the annotation 
+        #and count the columns of the input data once, instead of for every transition
+        Transition_Name_ISTD_list_dict = ISTD_Operations._create_Transition_Name_ISTD_list_dict(Transition_Name_Annot_df)
+        Transition_Name_df_column_count = Counter(Transition_Name_df_column_list)
+
         #Create the Transition_Name_dict and ISTD_report
         for Transition_Name in Transition_Name_df_column_list:
             if Transition_Name != 'Sample_Name':
                 [ISTD_report,Transition_Name_dict] = ISTD_Operations._update_Transition_Name_dict(
                     Transition_Name = Transition_Name,
-                    Transition_Name_Annot_df=Transition_Name_Annot_df,
+                    ISTD_list = Transition_Name_ISTD_list_dict.get(Transition_Name, []),
                     Transition_Name_dict=Transition_Name_dict,
-                    Transition_Name_df_column_list = Transition_Name_df_column_list,
+                    Transition_Name_df_column_count = Transition_Name_df_column_count,
                     ISTD_report_list = ISTD_report,
                     logger=logger,ingui=ingui,
                     allow_multiple_istd = allow_multiple_istd
@@ -247,61 +252,41 @@ class ISTD_Operations():
         return [ISTD_report,Transition_Name_dict]
 
             
-    def _create_ISTD_data_from_Transition_Name_df(Transition_Name_df,Transition_Name_dict,
-                                                  logger=None,ingui=False,
-                                                  allow_multiple_istd = False):
-        """
-        Create the ISTD data from Transition_Name df and ISTD map file
+    def _create_Transition_Name_ISTD_list_dict(Transition_Name_Annot_df):
+        """Create a dictionary to map each Transition_Name in the Transition_Name_Annot sheet to its list of Transition_Name_ISTD
 
         Args:
-            Transition_Name_df (pandas DataFrame): A data frame of sample as rows and transition names as columns
-            Transition_Name_dict (dict): A python dictionary to map the Transition_Name to the Transition_Name_ISTD and an ISTD report to map Transition_Name_ISTD to Transition_Name
-            logger (object): logger object created by start_logger in MSOrganiser
-            ingui (bool): if True, print analysis status to screen
-            allow_multiple_istd (bool): if True, ISTD data can have mulitple internal standards for one transition
+            Transition_Name_Annot_df (pandas DataFrame): A data frame of showing the transition names annotation
 
         Notes:
-            It is actually one of the internal function of normalise_by_ISTD. An empty data frame of the same dimension as
-            Transition_Name_df is created, then, the first column "Sample_Name" is filled in. For the subsequent columns,
-            the ISTD area is placed based on what is provided in Transition_Name_dict
+            It is actually one of the internal function of create_Transition_Name_dict. The Transition_Name_ISTD are kept in the 
+            same order as the rows of Transition_Name_Annot_df, including the blank ones.
 
         Returns:
-            (list): list containing:
-
-                * ISTD_data (pandas DataFrame): A data frame of sample as rows and transition names as columns with the ISTD area as values. Output as excel only at testing mode
+            Transition_Name_ISTD_list_dict (dict): A python dictionary to map the Transition_Name to a list of Transition_Name_ISTD
         """
 
-        ISTD_data = pd.DataFrame(columns=Transition_Name_df.columns, index=Transition_Name_df.index)
+        Transition_Name_ISTD_list_dict = {}
+        for Transition_Name, ISTD in zip(Transition_Name_Annot_df['Transition_Name'].tolist(),
+                                         Transition_Name_Annot_df['Transition_Name_ISTD'].tolist()):
+            # A blank Transition_Name cannot be matched to any transition in the input data
+            if Transition_Name is None or pd.isna(Transition_Name):
+                continue
+            Transition_Name_ISTD_list_dict.setdefault(Transition_Name, []).append(ISTD)
 
-        #Sample_Name must be present
-        ISTD_Operations._validate_Transition_Name_df(Transition_Name_df,logger,ingui)
-        
-        #Create a ISTD table from the Transition_Name df
-        ISTD_data["Sample_Name"] = Transition_Name_df["Sample_Name"]
-
-        ISTD_data = ISTD_data.apply(
-            lambda x: ISTD_Operations._update_ISTD_data_from_Transition_Name_df(
-                ISTD_data_column_data = x,
-                Transition_Name_dict=Transition_Name_dict,
-                Transition_Name_df=Transition_Name_df,
-                logger=logger,ingui=ingui,
-                allow_multiple_istd = allow_multiple_istd)
-                if x.name != 'Sample_Name' else x,
-                axis=0)
-
-        return [ISTD_data]
-
-    def _update_Transition_Name_dict(Transition_Name,Transition_Name_Annot_df,Transition_Name_dict,
-                                     Transition_Name_df_column_list, ISTD_report_list,
+        return Transition_Name_ISTD_list_dict
+
+    def _update_Transition_Name_dict(Transition_Name,ISTD_list,Transition_Name_dict,
+                                     Transition_Name_df_column_count, ISTD_report_list,
                                      logger=None,ingui=False,
                                      allow_multiple_istd = False):
         """Updating the Transition_Name dict and ISTD_report_list to map Transition_Name to their Transition_Name_ISTD given a Transition_Name
 
         Args:
             Transition_Name (str): Input transition name
-            Transition_Name_Annot_df (pandas DataFrame): A data frame of showing the transition names annotation
+            ISTD_list (list): A list of Transition_Name_ISTD of the Transition_Name in the Transition_Name_Annot sheet
             Transition_Name_dict (dict): A dictionary to map each transition name to its ISTD. To be updated by each x
-            Transition_Name_df_column_list (list): A list of column names of Transition_Name_df
+            Transition_Name_df_column_count (collections.Counter): The number of times each column name appears in Transition_Name_df
             ISTD_report_list (list): A list of tuples showing (ISTD name or reason why there is no ISTD,Transition name)
             logger (object): logger object created by start_logger in MSOrganiser
             ingui (bool): if True, print analysis status to screen
@@ -319,9 +304,6 @@ class ISTD_Operations():
 
         """
 
-        # Get the mapping of one Transition_Name to exactly one ISTD
-        ISTD_list = Transition_Name_Annot_df.loc[Transition_Name_Annot_df['Transition_Name']==Transition_Name,"Transition_Name_ISTD"].tolist()
-
         if allow_multiple_istd:
             # Check if each ISTD in the ISTD_List is valid
             valid_ISTD = []
@@ -366,12 +348,12 @@ class ISTD_Operations():
                     continue
 
                 if not isinstance(ISTD,float):
-                    if Transition_Name_df_column_list.count(ISTD) == 0:
+                    if Transition_Name_df_column_count[ISTD] == 0:
                         # ISTD is used in Annotation File but not present in the input data
                         ISTD_report_list.append(("!Missing Transition_Name_ISTD in input data", Transition_Name))
                         valid_ISTD.append(ISTD)
                         continue
-                    elif Transition_Name_df_column_list.count(ISTD) > 1:
+                    elif Transition_Name_df_column_count[ISTD] > 1:
                         # ISTD is used in Annotation File but has duplicates in the input data
                         # This check may be redundant because the
                         # duplicate Transition_Name_ISTD in input data has been taken care
@@ -432,12 +414,12 @@ class ISTD_Operations():
         if not isinstance(ISTD_list[0],float):
             # When we have only one valid ISTD
             # Check if the ISTD is valid in the input data set
-            if Transition_Name_df_column_list.count(ISTD_list[0]) == 0:
+            if Transition_Name_df_column_count[ISTD_list[0]] == 0:
                 # ISTD is used in Annotation File but not present in the input data
                 Transition_Name_dict[Transition_Name] = ISTD_list[0]
                 ISTD_report_list.append(("!Missing Transition_Name_ISTD in input data", Transition_Name))
                 return [ISTD_report_list,Transition_Name_dict] 
-            elif Transition_Name_df_column_list.count(ISTD_list[0]) > 1:
+            elif Transition_Name_df_column_count[ISTD_list[0]] > 1:
                 # ISTD is used in Annotation File but has duplicates in the input data
                 # This check may be redundant because the
                 # duplicate Transition_Name_ISTD in input data has been taken care
@@ -466,132 +448,108 @@ class ISTD_Operations():
             sys.exit(-1)
 
 
-    def _update_expanded_Transition_Name_df(expanded_Transition_Name_df_column_data,Transition_Name_df,logger=None):
-        """Update the new Transition_Name df for each Transition_Name so that it can be used for normalisation of multiple ISTD
+    def _get_ISTD_column_positions(Transition_Name_df,Transition_Name_dict,
+                                   logger=None,ingui=False,
+                                   allow_multiple_istd = False):
+        """Find the position of the Transition_Name_ISTD column of each Transition_Name column. Position is -1 when there is an issue
 
         Args:
-            expanded_Transition_Name_df_column_data (pandas Series): A column from the new Transition_Name df to be updated with its corresponding Tranition_Name df values
             Transition_Name_df (pandas DataFrame): A data frame of sample as rows and transition names as columns
+            Transition_Name_dict (dict): A dictionary to map each transition name to its ISTD
             logger (object): logger object created by start_logger in MSOrganiser
+            ingui (bool): if True, print analysis status to screen
+            allow_multiple_istd (bool): if True, Transition_Name_dict can have mulitple internal standards for one transition
 
         Notes:
-            It is actually one of the internal function of expand_Transition_Name_df. 
-            It is meant to be interated over each column of expanded_Transition_Name_df_column_data.
-            expanded_Transition_Name_df_column_data.name should be a Transition_Name that can be found in the columns of Transition_Name_df  
+            It is actually one of the internal function of normalise_by_ISTD. The first column "Sample_Name" is left out, 
+            so the positions refer to the columns of Transition_Name_df.iloc[:,1:]
 
         Returns:
-            expanded_Transition_Name_df_column_data.values (pandas Series): Values remain unchanged if no Transition_Name can be found. 
-            Otherwise the values will be replaced with the Transition_Name values provided by Transition_Name_df
-        
+            ISTD_column_positions (numpy array): An integer array with the position of the Transition_Name_ISTD column for each Transition_Name column
+
         """
 
-        if expanded_Transition_Name_df_column_data.name[0] is None:
-            return(expanded_Transition_Name_df_column_data.values)
+        column_name_list = list(Transition_Name_df.columns.values)
+        column_name_count = Counter(column_name_list)
+        column_position_dict = {column_name : position for position, column_name in enumerate(column_name_list[1:])}
 
-        if list(Transition_Name_df.columns.values).count(expanded_Transition_Name_df_column_data.name[0]) == 1:
-            return(Transition_Name_df.loc[:, expanded_Transition_Name_df_column_data.name[0] ])
-        elif list(Transition_Name_df.columns.values).count(expanded_Transition_Name_df_column_data.name[0]) > 1 :
-            # This check may be redundant because the
-            # duplicate Transition_Name in input data has been taken care
-            # by DuplicateCheck.py
-            if logger:
-                logger.warning(expanded_Transition_Name_df_column_data.name[0] + ' appears more than once in the input data frame. ' + 
-                               'Ignore updating Transition_Name_df.')
-            if ingui:
-                print(expanded_Transition_Name_df_column_data.name[0] + ' appears more than once in the input data frame. ' + 
-                      'Ignore updating Transition_Name_df.',
-                      flush = True)
-        else:
-            # This check may be redundant because the
-            # x is iterated from the columns of Transition_Name_df
-            if logger:
-                logger.warning(expanded_Transition_Name_df_column_data.name[0] + ' cannot be found in the input data frame. ' +
-                               'Ignore updating Transition_Name_df.')
-            if ingui:
-                print(expanded_Transition_Name_df_column_data.name[0] + ' cannot be found in the input data frame. ' +
-                     'Ignore updating Transition_Name_df.',
-                     flush = True)
-        return(expanded_Transition_Name_df_column_data.values)
+        ISTD_column_positions = np.full(len(column_name_list) - 1, -1, dtype = np.intp)
 
-    def _update_ISTD_data_from_Transition_Name_df(ISTD_data_column_data,
-                                                  Transition_Name_dict,Transition_Name_df,
-                                                  logger=None,ingui=False,
-                                                  allow_multiple_istd = False):
-        """Update the ISTD data for each Transition_Name. Value remains as NAN when there is an issue
+        for position, column_name in enumerate(column_name_list[1:]):
 
-        Args:
-            ISTD_data_column_data (pandas Series): A column from the ISTD_data to be updated with its corresponding ISTD values
-            Transition_Name_dict (dict): A dictionary to map each transition name to its ISTD
-            Transition_Name_df (pandas DataFrame): A data frame of sample as rows and transition names as columns
-            logger (object): logger object created by start_logger in MSOrganiser
-            ingui (bool): if True, print analysis status to screen
-            allow_multiple_istd (bool): if True, Transition_Name_dict can have mulitple internal standards for one transition
-        
-        Returns:
-            ISTD_data_column_data.values (pandas Series): Values remain unchanged if no Transition_Name_ISTD can be found. 
-            Otherwise the values will be replaced with the Transition_Name_ISTD values provided by Transition_Name_df
-
-        """
+            # When a Transition_Name name has no/duplicate Transition_Name_ISTD or not found in the map file, just leave it
+            # A warning is already given in update_Transition_Name_dict so we do not need to write this again
+            if not allow_multiple_istd:
+                # column_name is the Transition_Name
+                # Transition_Name_dict[column_name] is Transition_Name_ISTD
+                if column_name == 'Sample_Name' or Transition_Name_dict[column_name] is None:
+                    continue
+                ISTD_column_name = Transition_Name_dict[column_name]
+                ISTD_name = ISTD_column_name
+                column_label = column_name
+            else:
+                # column_name is of the tuple form (Transition_Name, Transition_Name_ISTD)
+                # Transition_Name_dict is not used in this case
+                # column_name[1] will be a string or None
+                if not column_name[1]:
+                    continue
+                ISTD_column_name = (column_name[1], column_name[1])
+                ISTD_name = column_name[1]
+                column_label = str(column_name)
 
-        # When a Transition_Name name has no/duplicate Transition_Name_ISTD or not found in the map file, just leave the funtion
-        # A warning is already given in update_Transition_Name_dict so we do not need to write this again
-
-        #If we do not allow multiple istd, Transition_Name_dict[x.name] will be a string or None
-        if not allow_multiple_istd:
-            # ISTD_data_column_data.name is the Transition_Name
-            # Transition_Name_dict[ISTD_data_column_data.name] is Transition_Name_ISTD
-            if Transition_Name_dict[ISTD_data_column_data.name] is None:
-                return(ISTD_data_column_data.values)
-            if list(Transition_Name_df.columns.values).count(Transition_Name_dict[ISTD_data_column_data.name]) == 1:
-                return(Transition_Name_df.loc[:, Transition_Name_dict[ISTD_data_column_data.name] ])
-            elif list(Transition_Name_df.columns.values).count(Transition_Name_dict[ISTD_data_column_data.name]) > 1 :
+            if column_name_count[ISTD_column_name] == 1 and ISTD_column_name in column_position_dict:
+                ISTD_column_positions[position] = column_position_dict[ISTD_column_name]
+            elif column_name_count[ISTD_column_name] > 1 :
                 # This check may be redundant because the
                 # duplicate Transition_Name_ISTD in input data has been taken care
                 # by DuplicateCheck.py
                 if logger:
-                    logger.warning(Transition_Name_dict[ISTD_data_column_data.name] + ' appears more than once in the input data frame. ' +
-                                   'Ignore normalisation in this column ' + ISTD_data_column_data.name)
+                    logger.warning(ISTD_name + ' appears more than once in the input data frame. ' +
+                                   'Ignore normalisation in this column ' + column_label)
                 if ingui:
-                    print(Transition_Name_dict[ISTD_data_column_data.name] + ' appears more than once in the input data frame. ' +
-                          'Ignore normalisation in this column ' + ISTD_data_column_data.name, 
+                    print(ISTD_name + ' appears more than once in the input data frame. ' +
+                          'Ignore normalisation in this column ' + column_label, 
                           flush = True)
             else:
                 if logger:
-                    logger.warning(Transition_Name_dict[ISTD_data_column_data.name] + ' cannot be found in the input data frame. ' +
-                                   'Ignore normalisation in this column ' + ISTD_data_column_data.name)
-                if ingui:
-                    print(Transition_Name_dict[ISTD_data_column_data.name] + ' cannot be found in the input data frame. ' +
-                          'Ignore normalisation in this column ' + ISTD_data_column_data.name, 
-                          flush = True)
-            return(ISTD_data_column_data.values)
-        else:
-            # ISTD_data_column_data.name is of the tuple form (Transition_Name, Transition_Name_ISTD)
-            # Transition_Name_dict is not used in this case
-            # ISTD_data_column_data.name[1] will be a string or None
-            if not ISTD_data_column_data.name[1]:
-                return(ISTD_data_column_data.values)
-
-            if list(Transition_Name_df.columns.values).count((ISTD_data_column_data.name[1],ISTD_data_column_data.name[1])) == 1:
-                return(Transition_Name_df.loc[:, (ISTD_data_column_data.name[1],ISTD_data_column_data.name[1]) ])
-            elif list(Transition_Name_df.columns.values).count((ISTD_data_column_data.name[1],ISTD_data_column_data.name[1])) > 1 :
-                # This check may be redundant because the
-                # duplicate Transition_Name_ISTD in input data has been taken care
-                # by DuplicateCheck.py
-                if logger:
-                    logger.warning(ISTD_data_column_data.name[1] + ' appears more than once in the input data frame. ' +
-                                   'Ignore normalisation in this column ' + str(ISTD_data_column_data.name))
-                if ingui:
-                    print(ISTD_data_column_data.name[1] + ' appears more than once in the input data frame. ' +
-                          'Ignore normalisation in this column ' + str(ISTD_data_column_data.name), flush = True)
-            else:
-                if logger:
-                    logger.warning(ISTD_data_column_data.name[1] + ' cannot be found in the input data frame. ' + 
-                                   'Ignore normalisation in this column ' + str(ISTD_data_column_data.name))
+                    logger.warning(ISTD_name + ' cannot be found in the input data frame. ' +
+                                   'Ignore normalisation in this column ' + column_label)
                 if ingui:
-                    print(ISTD_data_column_data.name[1] + ' cannot be found in the input data frame. ' + 
-                          'Ignore normalisation in this column ' + str(ISTD_data_column_data.name), 
+                    print(ISTD_name + ' cannot be found in the input data frame. ' +
+                          'Ignore normalisation in this column ' + column_label, 
                           flush = True)
-            return(ISTD_data_column_data.values)
+
+        return ISTD_column_positions
+
+    def _take_columns(input_df, column_positions):
+        """Take the columns of a data frame at the given positions in one step
+
+        Args:
+            input_df (pandas DataFrame): A data frame of sample as rows and transition names as columns
+            column_positions (list): A list of column positions to take. Position -1 gives a column of NaN
+
+        Notes:
+            The columns keep their data type. The output columns are numbered from 0 so that the caller 
+            can put the column names afterwards, even when input_df has duplicated or tuple column names
+
+        Returns:
+            output_df (pandas DataFrame): A data frame with the same index as input_df and the columns at column_positions
+        """
+
+        number_of_columns = input_df.shape[1]
+        input_df = input_df.set_axis(range(number_of_columns), axis=1)
+
+        #An extra column of NaN is only added when needed
+        column_positions = np.asarray(column_positions, dtype = np.intp)
+        if (column_positions < 0).any():
+            input_df = pd.concat([input_df, 
+                                  pd.DataFrame(np.nan, index=input_df.index, columns=[number_of_columns])],
+                                 axis = 1)
+            column_positions = np.where(column_positions < 0, number_of_columns, column_positions)
+
+        output_df = input_df.iloc[:, column_positions]
+        output_df.columns = range(len(column_positions))
+        return output_df
 
     def expand_Transition_Name_df(Transition_Name_df,Transition_Name_dict,
                                   logger=None,ingui=False):
@@ -608,8 +566,7 @@ class ISTD_Operations():
                 * expanded_Transition_Name_df (pandas DataFrame): A data frame of sample as rows and transition names as columns suited for normalisation by multiple ISTD
         """
 
-        #Create empty dataframe with a preset column name and the expanded Transition_Name_df
-        # Initialize empty list
+        #Create the column names (Transition_Name, Transition_Name_ISTD) of the expanded Transition_Name_df
         tuples=[("Sample_Name","")]      
         for Transition_Name in Transition_Name_dict:
             if len(Transition_Name_dict[Transition_Name]) == 0:
@@ -621,16 +578,44 @@ class ISTD_Operations():
                     tuples.append((Transition_Name, Transition_Name_ISTD))
         column_index = pd.MultiIndex.from_tuples(tuples, names=["Transition_Name", "Transition_Name_ISTD"])
 
-        expanded_Transition_Name_df = pd.DataFrame(columns=column_index, index=Transition_Name_df.index)
-        expanded_Transition_Name_df["Sample_Name"] = Transition_Name_df["Sample_Name"]
+        #Find the column of each Transition_Name in Transition_Name_df, -1 when there is an issue
+        column_name_list = list(Transition_Name_df.columns.values)
+        column_name_count = Counter(column_name_list)
+        column_position_dict = {column_name : position for position, column_name in enumerate(column_name_list)}
+
+        column_positions = [column_position_dict["Sample_Name"]]
+        for (Transition_Name, Transition_Name_ISTD) in tuples[1:]:
+            if Transition_Name is None:
+                column_positions.append(-1)
+            elif column_name_count[Transition_Name] == 1:
+                column_positions.append(column_position_dict[Transition_Name])
+            elif column_name_count[Transition_Name] > 1:
+                # This check may be redundant because the
+                # duplicate Transition_Name in input data has been taken care
+                # by DuplicateCheck.py
+                if logger:
+                    logger.warning(Transition_Name + ' appears more than once in the input data frame. ' + 
+                                   'Ignore updating Transition_Name_df.')
+                if ingui:
+                    print(Transition_Name + ' appears more than once in the input data frame. ' + 
+                          'Ignore updating Transition_Name_df.',
+                          flush = True)
+                column_positions.append(-1)
+            else:
+                # This check may be redundant because the
+                # Transition_Name_dict is created from the columns of Transition_Name_df
+                if logger:
+                    logger.warning(Transition_Name + ' cannot be found in the input data frame. ' +
+                                   'Ignore updating Transition_Name_df.')
+                if ingui:
+                    print(Transition_Name + ' cannot be found in the input data frame. ' +
+                          'Ignore updating Transition_Name_df.',
+                          flush = True)
+                column_positions.append(-1)
 
-        expanded_Transition_Name_df = expanded_Transition_Name_df.apply(
-            lambda x: ISTD_Operations._update_expanded_Transition_Name_df(
-                expanded_Transition_Name_df_column_data=x,
-                Transition_Name_df=Transition_Name_df,
-                logger=logger)
-                if x.name != 'Sample_Name' else x,
-                axis=0)
+        #Gather all the columns in one step and put the Transition_Name and Transition_Name_ISTD column names afterwards
+        expanded_Transition_Name_df = ISTD_Operations._take_columns(Transition_Name_df, column_positions)
+        expanded_Transition_Name_df.columns = column_index
 
         return expanded_Transition_Name_df
 
@@ -660,37 +645,61 @@ class ISTD_Operations():
                 print("The input Transition_Name data frame has no data. Skipping normalisation by Transition_Name_ISTD",flush=True)
             return [pd.DataFrame(),pd.DataFrame(),pd.DataFrame()]
 
-        #Create empty dataframe with a preset column name and index
-        ISTD_data = pd.DataFrame(columns=Transition_Name_df.columns, index=Transition_Name_df.index)
-        norm_Transition_Name_df = pd.DataFrame(columns=Transition_Name_df.columns, index=Transition_Name_df.index)
-
         #Sample_Name must be present
         ISTD_Operations._validate_Transition_Name_df(Transition_Name_df,logger,ingui)
-        norm_Transition_Name_df["Sample_Name"] = Transition_Name_df["Sample_Name"]
 
-        #Create the ISTD data from Transition_Name df and ISTD map file
-        [ISTD_data] = ISTD_Operations._create_ISTD_data_from_Transition_Name_df(Transition_Name_df,Transition_Name_dict,
-                                                                                logger=logger,ingui=ingui,
-                                                                                allow_multiple_istd = allow_multiple_istd)
+        #Find the column of the ISTD for each transition, -1 when there is none
+        ISTD_column_positions = ISTD_Operations._get_ISTD_column_positions(Transition_Name_df,Transition_Name_dict,
+                                                                           logger=logger,ingui=ingui,
+                                                                           allow_multiple_istd = allow_multiple_istd)
 
-        #Perform an elementwise normalisation so that it is easy to debug.
-        #To prevent Division by zero error, use astype
-        norm_Transition_Name_df.iloc[:,1:] = Transition_Name_df.iloc[:,1:].astype('float64') / ISTD_data.iloc[:,1:].astype('float64')
+        #Gather the ISTD of every transition in one step. 
+        #The extra column of NaN at the end is taken for the transitions without an ISTD
+        Transition_Name_values = Transition_Name_df.iloc[:,1:].to_numpy(dtype='float64')
+        Transition_Name_values_with_NaN = np.concatenate([Transition_Name_values,
+                                                          np.full((Transition_Name_values.shape[0], 1), np.nan)],
+                                                         axis = 1)
+        ISTD_values = np.take(Transition_Name_values_with_NaN, ISTD_column_positions, axis = 1)
 
-        #Convert relevant columns to numeric
-        ISTD_data = ISTD_data.apply(pd.to_numeric,errors='ignore')
-        norm_Transition_Name_df = norm_Transition_Name_df.apply(pd.to_numeric,errors='ignore')
+        #Division by zero gives infinity or NaN instead of an error
+        with np.errstate(divide='ignore', invalid='ignore'):
+            norm_Transition_Name_values = Transition_Name_values / ISTD_values
 
         #Convert positive and negative infinity to NaN
+        norm_Transition_Name_values[np.isinf(norm_Transition_Name_values)] = np.nan
+
+        #ISTD_data is taken from the input data so that the ISTD columns keep their data type
+        ISTD_data = ISTD_Operations._take_columns(Transition_Name_df.iloc[:,1:], ISTD_column_positions)
+        ISTD_data.columns = Transition_Name_df.columns[1:]
         ISTD_data = ISTD_data.replace([np.inf, -np.inf], np.nan)
-        norm_Transition_Name_df = norm_Transition_Name_df.replace([np.inf, -np.inf], np.nan)
+
+        #Put back the Sample_Name column
+        Sample_Name = pd.to_numeric(Transition_Name_df.iloc[:,0], errors='ignore')
+        ISTD_data.insert(0, Transition_Name_df.columns[0], Sample_Name)
+        norm_Transition_Name_df = pd.DataFrame(norm_Transition_Name_values, columns=Transition_Name_df.columns[1:], index=Transition_Name_df.index)
+        norm_Transition_Name_df.insert(0, Transition_Name_df.columns[0], Sample_Name)
 
         return [norm_Transition_Name_df,ISTD_data]
 
-    def _create_ISTD_Conc_from_Transition_Name_Annot(Transition_Name_df,ISTD_Annot_df,ISTD_column,
-                                                     logger=None,ingui=False,
-                                                     allow_multiple_istd = False):
-        """Create a dataframe of ISTD Concentrations
+    def _create_df_from_values(Transition_Name_df, values):
+        """Create a data frame with the same Sample_Name, column names and index as Transition_Name_df from a block of values
+
+        Args:
+            Transition_Name_df (pandas DataFrame): A data frame of sample as rows and transition names as columns
+            values (numpy array): A float64 array with one row per sample and one column per transition name
+
+        Returns:
+            output_df (pandas DataFrame): A data frame of sample as rows and transition names as columns with the given values
+
+        """
+        output_df = pd.DataFrame(values, columns=Transition_Name_df.columns[1:], index=Transition_Name_df.index)
+        output_df.insert(0, Transition_Name_df.columns[0], Transition_Name_df.iloc[:,0])
+        return output_df
+
+    def _get_ISTD_Conc_values(Transition_Name_df,ISTD_Annot_df,ISTD_column,
+                              logger=None,ingui=False,
+                              allow_multiple_istd = False):
+        """Get the ISTD Concentration of each transition name column
 
         Args:
             Transition_Name_df (pandas DataFrame): A data frame of sample as rows and transition names as columns
@@ -698,18 +707,16 @@ class ISTD_Operations():
             ISTD_column (str): The column from ISTD Annotation that needs to be map to ISTD_data
             logger (object): logger object created by start_logger in MSOrganiser
             ingui (bool): if True, print analysis status to screen
+            allow_multiple_istd (bool): if True, Transition_Name_df has mulitple internal standards for one transition
 
         Returns:
-            ISTD_Conc (pandas DataFrame): A data frame of sample as rows and transition names as columns with the corresponding ISTD Concentration.
+            ISTD_Conc_values (numpy array): A float64 array with the ISTD Concentration of each column of Transition_Name_df.iloc[:,1:].
+            Transition names that are not in ISTD_Annot_df have NaN.
 
         """
 
-        #Create an empty data frame
-        ISTD_Conc = pd.DataFrame(columns=Transition_Name_df.columns, index=Transition_Name_df.index)
-
         #Sample_Name must be present
         ISTD_Operations._validate_Transition_Name_df(Transition_Name_df,logger,ingui)
-        ISTD_Conc["Sample_Name"] = Transition_Name_df["Sample_Name"]
 
         #Compulsory columns Transition_Name and Transition_Name_ISTD and verified when reading the Transition_Name_Annot file
         #We do not need to check for these columns again
@@ -720,28 +727,59 @@ class ISTD_Operations():
                 logger.warning("\"%s\" is not a column in the ISTD_Annot sheet. Returning an empty data frame",ISTD_column)
             if ingui:
                 print("\"" + ISTD_column + "\" is not a column in the ISTD_Annot file. Returning an empty data frame",flush=True)
-            return [ISTD_Conc]
-
-        #Each row of ISTD_Annot_df is a column of transition name, 
-        #a transition name ISTD and its concentration (denoted as ISTD_column)
-        for index, row in ISTD_Annot_df.iterrows():
+            ISTD_Conc_dict = {}
+        else:
+            #Each row of ISTD_Annot_df is a column of transition name, 
+            #a transition name ISTD and its concentration (denoted as ISTD_column)
+            #When a transition appears in more than one row, the last row is used
             if allow_multiple_istd:
-                #For each row, we map the concentration to ISTD_Conc 
-                #which share the same transition name and transition name ISTD
-                if (row['Transition_Name'],row['Transition_Name_ISTD']) in ISTD_Conc.columns:
-                    ISTD_Conc[(row['Transition_Name'],row['Transition_Name_ISTD'])] = row[ISTD_column]
+                #Map the concentration to the column which share the same transition name and transition name ISTD
+                ISTD_Conc_dict = dict(zip(zip(ISTD_Annot_df['Transition_Name'].tolist(), 
+                                              ISTD_Annot_df['Transition_Name_ISTD'].tolist()),
+                                          ISTD_Annot_df[ISTD_column].tolist()))
             else:
-                #For each row, we map the concentration to ISTD_Conc 
-                #which share the same transition name
-                if row['Transition_Name'] in ISTD_Conc.columns:
-                    ISTD_Conc[row['Transition_Name']] = row[ISTD_column]
+                #Map the concentration to the column which share the same transition name
+                ISTD_Conc_dict = dict(zip(ISTD_Annot_df['Transition_Name'].tolist(),
+                                          ISTD_Annot_df[ISTD_column].tolist()))
+
+        #Concentration of each transition name column, NaN when it has none
+        ISTD_Conc_values = pd.Series([ISTD_Conc_dict.get(column_name, np.nan) for column_name in Transition_Name_df.columns[1:]],
+                                     dtype = 'object').astype('float64').to_numpy()
+        return ISTD_Conc_values
+
+    def _create_ISTD_Conc_from_Transition_Name_Annot(Transition_Name_df,ISTD_Annot_df,ISTD_column,
+                                                     logger=None,ingui=False,
+                                                     allow_multiple_istd = False):
+        """Create a dataframe of ISTD Concentrations
+
+        Args:
+            Transition_Name_df (pandas DataFrame): A data frame of sample as rows and transition names as columns
+            ISTD_Annot_df (pandas DataFrame): A panda data frame containing the ISTD Annotation
+            ISTD_column (str): The column from ISTD Annotation that needs to be map to ISTD_data
+            logger (object): logger object created by start_logger in MSOrganiser
+            ingui (bool): if True, print analysis status to screen
+
+        Returns:
+            ISTD_Conc (pandas DataFrame): A data frame of sample as rows and transition names as columns with the corresponding ISTD Concentration.
+            The concentration columns are float64 and are NaN for transition names that are not in ISTD_Annot_df.
+
+        """
+
+        ISTD_Conc_values = ISTD_Operations._get_ISTD_Conc_values(Transition_Name_df,ISTD_Annot_df,ISTD_column,
+                                                                 logger=logger,ingui=ingui,
+                                                                 allow_multiple_istd = allow_multiple_istd)
+
+        #Repeat the concentration for every sample
+        ISTD_Conc = ISTD_Operations._create_df_from_values(Transition_Name_df,
+                                                           np.repeat(ISTD_Conc_values[np.newaxis,:], Transition_Name_df.shape[0], axis = 0))
                     
         return(ISTD_Conc)
 
     def getConc_by_ISTD(Transition_Name_df,ISTD_Annot_df,Sample_Annot_df,
                         logger=None,ingui=False,
                         allow_multiple_istd = False,
-                        allow_multiple_data_file_path = False):
+                        allow_multiple_data_file_path = False,
+                        output_intermediate_data = True):
         """Perform calculation of analyte concentration using values from Transition_Name_Annot_ISTD
         
         Args:
@@ -752,6 +790,7 @@ class ISTD_Operations():
             ingui (bool): if True, print analysis status to screen
             allow_multiple_istd (bool): if True, allow normalisation of Transition_Name_df mulitple internal standards
             allow_multiple_data_file_path (bool): if True, allow calculation of concentration using Sample_Annot_df that has more than one data file name
+            output_intermediate_data (bool): if True, also create ISTD_Conc_df and ISTD_Samp_Ratio_df. Else, they are returned as empty data frames
 
         Returns:
             (list): list containing:
@@ -759,7 +798,10 @@ class ISTD_Operations():
                 * Conc_df (pandas DataFrame): A data frame of sample as rows and transition names as columns with the transition name concentration as values
                 * ISTD_Conc_df (pandas DataFrame): A data frame of sample as rows and transition names as columns with the ISTD concentration as values
                 * ISTD_Samp_Ratio_df (pandas DataFrame): A data frame of with transition names, its corresponding ISTD and ISTD to Sample ratio as columns
- 
+
+        Note:
+            normConc is calculated as normArea x ISTD Concentration of each transition name x ISTD to Sample Amount Ratio of each sample.
+            When a Sample_Name appears more than once in Sample_Annot_df, its rows must give the same ISTD to Sample Amount Ratio. Otherwise normConc is skipped.
         """
 
         #If the Transition_Name_df or Sample_Annot_df is empty, return an empty data frame
@@ -788,11 +830,7 @@ class ISTD_Operations():
         ISTD_Operations._validate_Transition_Name_df(Transition_Name_df,logger,ingui)
         ISTD_Operations._validate_Sample_Annot_df(Sample_Annot_df,logger,ingui)
 
-        #Creating the normConc dataframe
-        Conc_df = pd.DataFrame(columns=Transition_Name_df.columns, index=Transition_Name_df.index)
-        Conc_df["Sample_Name"] = Transition_Name_df["Sample_Name"]
-        
-        #Creating the ISTD_Conc_df
+        #Getting the ISTD Concentration of each transition name
         ISTD_Annot_Columns = list(ISTD_Annot_df.columns.values)
         ISTD_Conc_Column = [col for col in ISTD_Annot_df if col.startswith("ISTD_Conc")]
 
@@ -800,9 +838,9 @@ class ISTD_Operations():
         if len(ISTD_Conc_Column) == 1:
             #Some values may be missing because some transition names have no ISTD, logging it may be unnecessary 
             ISTD_Conc_Column = ISTD_Conc_Column[0]
-            ISTD_Conc_df = ISTD_Operations._create_ISTD_Conc_from_Transition_Name_Annot(Transition_Name_df,ISTD_Annot_df,ISTD_Conc_Column,
-                                                                                        logger=logger,ingui=ingui,
-                                                                                        allow_multiple_istd = allow_multiple_istd)
+            ISTD_Conc_values = ISTD_Operations._get_ISTD_Conc_values(Transition_Name_df,ISTD_Annot_df,ISTD_Conc_Column,
+                                                                     logger=logger,ingui=ingui,
+                                                                     allow_multiple_istd = allow_multiple_istd)
         else:
             #Return empty data set
             if len(ISTD_Conc_Column) == 0:
@@ -815,6 +853,7 @@ class ISTD_Operations():
                     logger.warning("Skipping step to get normConc. ISTD_Annot sheet has more than one column that contains ISTD_Conc")
                 if ingui:
                     print("Skipping step to get normConc. ISTD_Annot sheet has more than one column that contains ISTD_Conc",flush=True)
+            Conc_df = ISTD_Operations._create_df_from_values(Transition_Name_df, np.nan)
             return [Conc_df,Conc_df,Conc_df]
 
         #Creating the ISTD_Samp_Ratio_df
@@ -835,6 +874,7 @@ class ISTD_Operations():
                       , ', '.join(["Data_File_Name","Sample_Name","Sample_Amount",
                                    "Sample_Amount_Unit","ISTD_Mixture_Volume_[uL]",
                                    "Concentration_Unit"]),flush=True)
+            Conc_df = ISTD_Operations._create_df_from_values(Transition_Name_df, np.nan)
             return [Conc_df,Conc_df,Conc_df]
 
         #We cannot accept > 1 Data_File_path if we are not doing concatenation to save memory
@@ -849,6 +889,7 @@ class ISTD_Operations():
                     logger.warning('/"%s/"',things)
                 if ingui:
                     print('\"' + things + '\"',flush=True)
+            Conc_df = ISTD_Operations._create_df_from_values(Transition_Name_df, np.nan)
             return [Conc_df,Conc_df,Conc_df]
 
         # We cannot accept duplicated Data_File_Name and Sample Name in Sample_Annot_df input
@@ -860,6 +901,7 @@ class ISTD_Operations():
             if ingui:
                 print('Skipping step to get normConc. Sample Annotation data frame has non-unique Sample_Name.' ,flush=True)
                 print(Sample_Annot_df[["Data_File_Name","Sample_Name"]][Sample_Annot_df[["Data_File_Name","Sample_Name"]].duplicated(keep=False)].to_string(index=False), flush =True)
+            Conc_df = ISTD_Operations._create_df_from_values(Transition_Name_df, np.nan)
             return [Conc_df,Conc_df,Conc_df]
 
         #Calculate the dilution factor or "ISTD_to_Sample_Amount_Ratio"
@@ -867,6 +909,23 @@ class ISTD_Operations():
         #Convert positive and negative infinity to NaN
         Sample_Annot_df["ISTD_to_Sample_Amount_Ratio"] = Sample_Annot_df["ISTD_to_Sample_Amount_Ratio"].replace([np.inf, -np.inf], np.nan)
 
+        # We cannot accept a Sample_Name with different ISTD to sample amount ratios in different Data_File_Name
+        Ratio_Count = Sample_Annot_df.groupby("Sample_Name")["ISTD_to_Sample_Amount_Ratio"].nunique(dropna=False)
+        Conflicting_Ratio_df = Sample_Annot_df[Sample_Annot_df["Sample_Name"].isin(Ratio_Count.index[Ratio_Count > 1])]
+        if(len(Conflicting_Ratio_df) > 0):
+            #Return empty data set
+            Conflicting_Ratio_Columns = ["Data_File_Name","Sample_Name","Sample_Amount","ISTD_Mixture_Volume_[uL]"]
+            if logger:
+                logger.warning('Skipping step to get normConc. Sample Annotation data frame has Sample_Name with ' +
+                               'different Sample_Amount or ISTD_Mixture_Volume_[uL] in different Data_File_Name.')
+                logger.warning('\n{}'.format(Conflicting_Ratio_df[Conflicting_Ratio_Columns].to_string(index=False) ) )
+            if ingui:
+                print('Skipping step to get normConc. Sample Annotation data frame has Sample_Name with ' +
+                      'different Sample_Amount or ISTD_Mixture_Volume_[uL] in different Data_File_Name.' ,flush=True)
+                print(Conflicting_Ratio_df[Conflicting_Ratio_Columns].to_string(index=False), flush =True)
+            Conc_df = ISTD_Operations._create_df_from_values(Transition_Name_df, np.nan)
+            return [Conc_df,Conc_df,Conc_df]
+
         #Filter the Transition_Name_df to get the Sample_Name column
         if allow_multiple_istd :
             merged_df = Transition_Name_df.loc[:, Transition_Name_df.columns == ("Sample_Name","")]
@@ -884,6 +943,7 @@ class ISTD_Operations():
             if ingui:
                 print('Skipping step to get normConc. Input normalised area has non-unique Sample_Name.' ,flush=True)
                 print(merged_df[["Sample_Name"]][merged_df[["Sample_Name"]].duplicated(keep=False)].to_string(index=False), flush =True)
+            Conc_df = ISTD_Operations._create_df_from_values(Transition_Name_df, np.nan)
             return [Conc_df,Conc_df,Conc_df]
 
         # Now that we have Sample_Name in Transition_Name_df and Sample_Annot_df, we need to check if they can be merged.
@@ -910,26 +970,30 @@ class ISTD_Operations():
                       'Make sure the corresponding Data_File_Name is correct.',
                       flush=True)
 
-        # Merge it with the Sample_Annot_df so that the order of the Sample_name follows Transition_Name_df
-        # We do a left join merge so samples not present in Transition_Name_df will not be used.
-        merged_df = pd.merge(merged_df, Sample_Annot_df.loc[:, ["Sample_Name","ISTD_to_Sample_Amount_Ratio"]], 
-                             how="left", on="Sample_Name")
+        # Map the ratio to the Sample_Name of Transition_Name_df so that the order of the Sample_name follows Transition_Name_df
+        # Samples not present in Transition_Name_df will not be used.
+        ISTD_to_Sample_Amount_Ratio = Sample_Annot_df.drop_duplicates(subset = ["Sample_Name"]).set_index("Sample_Name")["ISTD_to_Sample_Amount_Ratio"]
+        ISTD_Samp_Ratio_values = merged_df["Sample_Name"].map(ISTD_to_Sample_Amount_Ratio).to_numpy(dtype='float64')
 
-        ISTD_Samp_Ratio_df = pd.DataFrame(index=Transition_Name_df.index, columns=Transition_Name_df.columns, dtype='float64')
-        #ISTD_Samp_Ratio_df.apply(lambda x: x.update(merged_df["ISTD_to_Sample_Amount_Ratio"]) , axis=0)
-        ISTD_Samp_Ratio_df = ISTD_Samp_Ratio_df.apply(lambda x: merged_df["ISTD_to_Sample_Amount_Ratio"] , axis=0)
-
-        #Assignment of string must come after df apply
-        ISTD_Samp_Ratio_df['Sample_Name'] = Transition_Name_df['Sample_Name']
-        #print(ISTD_Samp_Ratio_df,flush=True)
-        #print(ISTD_Samp_Ratio_df.info())
-
-        #Perform an elementwise multiplication so that it is easy to debug.
-        Conc_df.iloc[:,1:] = Transition_Name_df.iloc[:,1:].astype('float64') * ISTD_Conc_df.iloc[:,1:].astype('float64') * ISTD_Samp_Ratio_df.iloc[:,1:].astype('float64')
+        #Multiply each column by its ISTD Concentration and each row by its ISTD to Sample Amount Ratio in one step
+        with np.errstate(invalid='ignore', over='ignore'):
+            Conc_values = (Transition_Name_df.iloc[:,1:].to_numpy(dtype='float64') * 
+                           ISTD_Conc_values[np.newaxis,:] * 
+                           ISTD_Samp_Ratio_values[:,np.newaxis])
 
         #Convert positive and negative infinity to NaN
-        Conc_df = Conc_df.replace([np.inf, -np.inf], np.nan)
-        ISTD_Conc_df = ISTD_Conc_df.replace([np.inf, -np.inf], np.nan)
-        ISTD_Samp_Ratio_df = ISTD_Samp_Ratio_df.replace([np.inf, -np.inf], np.nan)
+        Conc_values[np.isinf(Conc_values)] = np.nan
+        Conc_df = ISTD_Operations._create_df_from_values(Transition_Name_df, Conc_values)
+
+        #The ISTD Concentration and ISTD to Sample Amount Ratio data frames are only needed at testing mode
+        if output_intermediate_data:
+            ISTD_Conc_values[np.isinf(ISTD_Conc_values)] = np.nan
+            ISTD_Conc_df = ISTD_Operations._create_df_from_values(Transition_Name_df,
+                                                                  np.repeat(ISTD_Conc_values[np.newaxis,:], Transition_Name_df.shape[0], axis = 0))
+            ISTD_Samp_Ratio_df = ISTD_Operations._create_df_from_values(Transition_Name_df,
+                                                                        np.repeat(ISTD_Samp_Ratio_values[:,np.newaxis], Transition_Name_df.shape[1] - 1, axis = 1))
+        else:
+            ISTD_Conc_df = pd.DataFrame()
+            ISTD_Samp_Ratio_df = pd.DataFrame()
 
         return [Conc_df,ISTD_Conc_df,ISTD_Samp_Ratio_df]
\ No newline at end of file
@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import sys
+import multiprocessing
+from MSOrganiser import start_logger
+from MSOrganiser import run_MSOrganiser
+
+MS_FILETYPE_CHOICES = ['Agilent Wide Table in csv',
+                       'Agilent Compound Table in csv',
+                       'Multiquant Long Table in txt']
+OUTPUT_OPTIONS_CHOICES = ['Area','normArea by ISTD','normConc by ISTD','RT','FWHM','S/N','Symmetry']
+OUTPUT_FORMAT_CHOICES = ['Excel','csv']
+CONCATENATE_CHOICES = ['No Concatenate',
+                       'Concatenate along Sample Name (rows)',
+                       'Concatenate along Transition Name (columns)']
+BOOLEAN_ARGS = ['Transpose_Results', 'Allow_Multiple_ISTD', 'Long_Table', 'Long_Table_Annot']
+# Choices of the options in a config file. argparse does not check default values against choices
+CONFIG_CHOICES = dict({'MS_FileType' : MS_FILETYPE_CHOICES,
+                       'Output_Options' : OUTPUT_OPTIONS_CHOICES,
+                       'Output_Format' : OUTPUT_FORMAT_CHOICES,
+                       'Concatenate' : CONCATENATE_CHOICES},
+                      **{arg_name : ['True','False'] for arg_name in BOOLEAN_ARGS})
+
+def parse_MSOrganiser_args(argv = None):
+    """Function to read the input parameters from the command line and an optional json config file, without the Gooey Interface
+
+    Args:
+        argv (list): The command line arguments. Default is sys.argv[1:]
+
+    Returns:
+        stored_args (dict): A dictionary storing the input parameters.
+
+    Note:
+        The json config file given by --Config has the same format as MSOrganiser-args.json.
+        It is only read and never written, so many jobs can share it. Options given on the
+        command line replace the values in the config file.
+    """
+
+    # Read the config file first as its values are the defaults of the other options
+    config_parser = argparse.ArgumentParser(add_help = False)
+    config_parser.add_argument('--Config')
+    [config_args, _] = config_parser.parse_known_args(argv)
+
+    stored_args = {}
+    if config_args.Config:
+        stored_args = _load_config(config_args.Config)
+
+    parser = _create_argparse_Parser(stored_args)
+    # parse_known_args is used as Gooey replaces ArgumentParser.parse_args
+    # once MSParser.parse_MSOrganiser_args has been called in the same process
+    [args, unknown_args] = parser.parse_known_args(argv)
+    if unknown_args:
+        parser.error('unrecognized arguments: ' + ' '.join(unknown_args))
+    stored_args = vars(args)
+
+    # Verify that the arguments are valid before using them
+    check_MSOrganiser_args(stored_args)
+    convert_MSOrganiser_args(stored_args)
+
+    return stored_args
+
+def check_MSOrganiser_args(stored_args):
+    """Function to check that the input parameters needed to run MSOrganiser are given, the same way as MSParser
+
+    Args:
+        stored_args (dict): A dictionary storing the input parameters.
+
+    Note:
+        The software exits when an input parameter is missing.
+    """
+
+    # Check if MS_Files option is not empty
+    if not stored_args['MS_Files']:
+        print("Please key in at least one input MS file.",flush=True)
+        sys.exit(-1)
+
+    # Check if Output_Directory option is not empty
+    if not stored_args['Output_Directory']:
+        print("Please key in at least one output directory.",flush=True)
+        sys.exit(-1)
+
+    # Check if Output_Options is selected
+    if not stored_args['Output_Options']:
+        print("Please key in at least one result to output.",flush=True)
+        sys.exit(-1)
+    elif any(output_option in ['normArea by ISTD', 'normConc by ISTD'] for output_option in stored_args['Output_Options']):
+        # Check if Annot_File is not empty when normArea by ISTD or
+        # normConc by ISTD or both are selected in Output_Options
+        if not stored_args['Annot_File']:
+            print("Please key in an annotation file when \'normArea by ISTD\' " +
+                  "or \'normConc by ISTD\' are selected in Output_Options.",
+                  flush=True)
+            sys.exit(-1)
+
+def convert_MSOrganiser_args(stored_args):
+    """Function to convert the True or False strings of Transpose_Results, Allow_Multiple_ISTD, Long_Table and Long_Table_Annot to boolean
+
+    Args:
+        stored_args (dict): A dictionary storing the input parameters. It is updated in place.
+
+    """
+
+    for arg_name in BOOLEAN_ARGS:
+        if stored_args[arg_name] == 'True' or stored_args[arg_name] is True:
+            stored_args[arg_name] = True
+        else:
+            stored_args[arg_name] = False
+
+def _load_config(config_file):
+    # Read the input parameters of a json config file as a dictionary
+    try:
+        with open(config_file) as data_file:
+            stored_args = json.load(data_file)
+    except Exception as e:
+        print("Unable to read config file " + config_file + " due to this error message",flush=True)
+        print(e,flush=True)
+        sys.exit(-1)
+
+    # MSOrganiser-args.json keeps the input files as one string separated by ";"
+    if isinstance(stored_args.get('MS_Files'), str):
+        stored_args['MS_Files'] = list(stored_args['MS_Files'].split(";"))
+
+    # Boolean options are given to argparse as strings, like the Gooey Interface
+    for arg_name in BOOLEAN_ARGS:
+        if stored_args.get(arg_name) is not None:
+            stored_args[arg_name] = str(stored_args[arg_name])
+
+    _check_config_choices(stored_args, config_file)
+
+    return stored_args
+
+def _check_config_choices(stored_args, config_file):
+    # Check the values of a config file against the choices of the command line options.
+    # Blank values are left to the default value of the option
+    for arg_name, choices in CONFIG_CHOICES.items():
+        value = stored_args.get(arg_name)
+        if value is None or value == "" or value == []:
+            continue
+        if arg_name == 'Output_Options':
+            invalid_values = [output_option for output_option in value if output_option not in choices] \
+                             if isinstance(value, list) else [value]
+        else:
+            invalid_values = [value] if value not in choices else []
+        if invalid_values:
+            print("Invalid " + arg_name + " in config file " + config_file + ". " +
+                  "Choose from " + ", ".join(choices) + ". " +
+                  "Current input is " + ", ".join(map(str, invalid_values)),flush=True)
+            sys.exit(-1)
+
+def _create_argparse_Parser(stored_args):
+    """Function to create a command line parser with the same options as the Gooey Interface
+
+    Args:
+        stored_args (dict): A dictionary storing the input parameters, used as default values.
+
+    Returns:
+        parser (object): An argparse parser.
+
+    """
+    parser = argparse.ArgumentParser(prog = 'MSCommandLine',
+                                     description = 'Extract and organise MRM transition names data exported ' +
+                                                   'from mass spectrometry software, without the Gooey Interface.')
+
+    parser.add_argument('--Config', action='store',
+                        help='Json file with the input parameters, in the same format as MSOrganiser-args.json.')
+
+    #Required Arguments, they can be given in the config file instead
+    parser.add_argument('--MS_Files', nargs='+', help='Input the MS raw files.',
+                        default=stored_args.get('MS_Files'))
+    parser.add_argument('--MS_FileType', choices=MS_FILETYPE_CHOICES,
+                        help='Input the MS raw file type.',
+                        default=stored_args.get('MS_FileType') or 'Agilent Wide Table in csv')
+    parser.add_argument('--Output_Directory', action='store',
+                        help='Output directory to save summary report.',
+                        default=stored_args.get('Output_Directory'))
+
+    #Analysis Arguments
+    parser.add_argument('--Output_Options', choices=OUTPUT_OPTIONS_CHOICES, nargs='+',
+                        help='Select specific information to output',
+                        default=stored_args.get('Output_Options'))
+    parser.add_argument('--Annot_File', action='store',
+                        help='Input the annotation excel macro file required for normalisation and concentration calculation.',
+                        default=stored_args.get('Annot_File'))
+
+    #Output Arguments
+    parser.add_argument('--Output_Format', choices=OUTPUT_FORMAT_CHOICES,
+                        help='Select specific file type to output csv form will give multiple sheets.',
+                        default=stored_args.get('Output_Format') or 'Excel')
+    parser.add_argument('--Concatenate', choices=CONCATENATE_CHOICES,
+                        help='Concatenate multiple input files into one output file.',
+                        default=stored_args.get('Concatenate') or 'No Concatenate')
+    parser.add_argument('--Transpose_Results', choices=['True','False'],
+                        help='Set this option to True to let the samples to be the columns instead of the Transition_Name.',
+                        default=stored_args.get('Transpose_Results') or 'False')
+    parser.add_argument('--Allow_Multiple_ISTD', choices=['True','False'],
+                        help='Set this option to True to allow normalisation with multiple ISTD.',
+                        default=stored_args.get('Allow_Multiple_ISTD') or 'False')
+    parser.add_argument('--Long_Table', choices=['True','False'],
+                        help='Set this option to True to output the data in Long Table.',
+                        default=stored_args.get('Long_Table') or 'False')
+    parser.add_argument('--Long_Table_Annot', choices=['True','False'],
+                        help='Set this option to True to add ISTD, Sample Type and Concentration Unit ' +
+                             'from Annot_File to the Long Table output.',
+                        default=stored_args.get('Long_Table_Annot') or 'False')
+
+    #Optional Arguments
+    parser.add_argument('--Testing', action='store_true', help='Testing mode will generate more output tables.',
+                        default=bool(stored_args.get('Testing')))
+    parser.add_argument('--Number_of_Workers', type=int,
+                        help='Number of input files to process at the same time.',
+                        default=stored_args.get('Number_of_Workers') or 1)
+    parser.add_argument('--Annot_Snapshot_Directory', action='store',
+                        help='Folder to keep a snapshot of the annotation file. ' +
+                             'Later runs with the same annotation file load the snapshot instead of the excel file.',
+                        default=stored_args.get('Annot_Snapshot_Directory'))
+    parser.add_argument('--Log_Directory', action='store',
+                        help='Directory to create the logfiles folder in. Default is the Output_Directory, ' +
+                             'so that jobs with different output directories do not share a log file.',
+                        default=stored_args.get('Log_Directory'))
+
+    return parser
+
+def main(argv = None):
+    """Function to run MSOrganiser from the command line without the Gooey Interface
+
+    Args:
+        argv (list): The command line arguments. Default is sys.argv[1:]
+
+    """
+    stored_args = parse_MSOrganiser_args(argv)
+
+    #Start log on a job
+    logger = start_logger(os.path.abspath(stored_args['Log_Directory'] or stored_args['Output_Directory']))
+    logger.info("Starting the job.")
+    print("Starting the job.",flush=True)
+
+    run_MSOrganiser(stored_args,logger)
+
+    #End log on a job
+    logger.info("Job is finished.")
+    print("Job is finished",flush=True)
+
+if __name__ == '__main__':
+
+    #Needed by the pool of workers when running as an executable file
+    multiprocessing.freeze_support()
+
+    main()
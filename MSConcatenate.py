@@ -0,0 +1,159 @@
+import sys
+import pandas as pd
+import MSDuplicateCheck
+from collections import Counter
+
+class ConcatenationBuilder:
+    """
+    A class to concatenate the data frames of several input files in one step
+
+    Args:
+        concatenation_type (str): "rows or columns" to indicate if the data frames are to be concatenated by row wise or column wise respectively
+        output_option (str): The name of the contents that the data frames contain, used in the duplicate messages. Example: row concatenated Area
+        check_duplicates (bool): if True, look for duplicate column names (Transition_Name) and sample names while the data frames are added
+        logger (object): logger object created by start_logger in MSOrganiser
+        ingui (bool): if True, print analysis status to screen
+
+    Note:
+        The data frames are only collected by add. They are concatenated once when get_concatenated_df is called,
+        so each input file is copied once no matter how many input files there are.
+    """
+
+    def __init__(self, concatenation_type = "rows", output_option = "",
+                 check_duplicates = True, logger = None, ingui = True):
+
+        if concatenation_type not in ["rows", "columns"]:
+            if ingui:
+                print('Input concatenation type must be "rows" or "columns". Current input is ' + str(concatenation_type) ,flush=True)
+            if logger:
+                logger.error('Input concatenation type must be "rows" or "columns". Current input is %s', concatenation_type)
+            sys.exit(-1)
+
+        self.concatenation_type = concatenation_type
+        self.output_option = output_option
+        self.check_duplicates = check_duplicates
+        self.logger = logger
+        self.ingui = ingui
+
+        self.__df_list = []
+        #Counters keep the order in which the names are first seen
+        self.__column_name_count = Counter()
+        self.__Sample_Name_count = Counter()
+        #The input files in which each name is seen
+        self.__column_name_source = {}
+        self.__Sample_Name_source = {}
+
+    def add(self, input_df, source = None):
+        """Function to add the data frame of the next input file
+
+        Args:
+            input_df (pandas DataFrame): A data frame of sample as rows and transition names as columns
+            source (str): The name of the input file of input_df, used to report where the duplicated names are found
+
+        Note:
+            When concatenating by columns, the Sample_Name column of the second data frame onwards is removed.
+        """
+
+        if self.concatenation_type == "columns" and len(self.__df_list) > 0:
+            #Remove the Sample_Name column
+            input_df = input_df.loc[:, input_df.columns != 'Sample_Name']
+
+        if self.check_duplicates:
+            if self.concatenation_type == "rows":
+                #Every data frame has the same columns, only those repeated within a data frame are duplicated
+                column_name_count = {column_name : count
+                                     for column_name, count in Counter(input_df.columns.values.tolist()).items()
+                                     if count > 1 or column_name not in self.__column_name_count}
+                self.__add_names(column_name_count, self.__column_name_count, self.__column_name_source, source)
+                if 'Sample_Name' in input_df.columns:
+                    self.__add_names(Counter(input_df['Sample_Name'].tolist()), 
+                                     self.__Sample_Name_count, self.__Sample_Name_source, source)
+            else:
+                self.__add_names(Counter(input_df.columns.values.tolist()), 
+                                 self.__column_name_count, self.__column_name_source, source)
+                if len(self.__df_list) == 0 and 'Sample_Name' in input_df.columns:
+                    self.__add_names(Counter(input_df['Sample_Name'].tolist()), 
+                                     self.__Sample_Name_count, self.__Sample_Name_source, source)
+
+        self.__df_list.append(input_df)
+
+    def __add_names(self, name_count, total_name_count, name_source, source):
+        # Add the count of each name of an input file to the total count and remember the input file
+        total_name_count.update(name_count)
+        if source is not None:
+            for name in name_count:
+                name_source.setdefault(name, []).append(source)
+
+    def __get_duplicate_report(self, total_name_count, name_source):
+        # Report the names counted more than once with their input files
+        duplicated_name_list = [key for key, count in total_name_count.items() if count > 1]
+        return(MSDuplicateCheck.DuplicateReport(duplicated_name_list,
+                                                {key : total_name_count[key] for key in duplicated_name_list},
+                                                {key : name_source[key] for key in duplicated_name_list if key in name_source}))
+
+    def get_duplicated_column_report(self):
+        """Function to get a report of the duplicated column names (usually Transition Name) found so far
+
+        Returns:
+            duplicate_report (MSDuplicateCheck.DuplicateReport): The duplicated column names with their counts and input files
+
+        """
+        return(self.__get_duplicate_report(self.__column_name_count, self.__column_name_source))
+
+    def get_duplicated_sample_name_report(self):
+        """Function to get a report of the duplicated sample names found so far
+
+        Returns:
+            duplicate_report (MSDuplicateCheck.DuplicateReport): The duplicated sample names with their counts and input files
+
+        """
+        return(self.__get_duplicate_report(self.__Sample_Name_count, self.__Sample_Name_source))
+
+    def get_duplicated_column_names(self):
+        """Function to get the duplicated column names (usually Transition Name) found so far
+
+        Returns:
+            duplicated_column_name_list (list): A list of duplicated column names, in the order they first appear
+
+        """
+        return(self.get_duplicated_column_report().names)
+
+    def get_duplicated_sample_names(self):
+        """Function to get the duplicated sample names found so far
+
+        Returns:
+            duplicated_Sample_Name_list (list): A list of duplicated sample names, in the order they first appear
+
+        """
+        return(self.get_duplicated_sample_name_report().names)
+
+    def get_concatenated_df(self):
+        """Function to check for duplicates and concatenate the data frames that were added
+
+        Returns:
+            concatenated_df (pandas DataFrame): The data frames concatenated by rows or columns. Empty if nothing was added
+
+        Note:
+            The program stops if there are duplicate column names or sample names and check_duplicates is True.
+        """
+
+        if self.check_duplicates:
+            column_report = self.get_duplicated_column_report()
+            MSDuplicateCheck.report_duplicated_columns(column_report.names, self.output_option,
+                                                       logger = self.logger, ingui = self.ingui,
+                                                       allow_multiple_istd = False,
+                                                       duplicated_column_name_source = column_report.sources)
+            Sample_Name_report = self.get_duplicated_sample_name_report()
+            MSDuplicateCheck.report_duplicated_sample_names(Sample_Name_report.names, self.output_option,
+                                                            logger = self.logger, ingui = self.ingui,
+                                                            duplicated_Sample_Name_source = Sample_Name_report.sources)
+
+        if len(self.__df_list) == 0:
+            return(pd.DataFrame())
+        if len(self.__df_list) == 1:
+            return(self.__df_list[0])
+
+        if self.concatenation_type == "rows":
+            return(pd.concat(self.__df_list, ignore_index=True, sort=False, axis = 0))
+        else:
+            return(pd.concat(self.__df_list, ignore_index=False, sort=False, axis = 1))
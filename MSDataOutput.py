@@ -1,10 +1,8 @@
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font
 from pandas import ExcelWriter
 import os
 import sys
 import pandas as pd
+import numpy as np
 
 
 class MSDataOutput:
@@ -36,7 +34,38 @@ class MSDataOutput:
         Returns:
             MS_df (pandas DataFrame): A panda data frame with data transposed
 
+        Note:
+            The first column is expected to be the Sample_Name. When the other columns are all numeric,
+            only their values are transposed so that the data stays numeric.
         """
+        value_df = MS_df.iloc[:, 1:]
+
+        #Data with text values are transposed cell by cell as before
+        if (not all(dtype.kind in "iuf" for dtype in value_df.dtypes) or
+            isinstance(value_df.columns, pd.MultiIndex) != allow_multiple_istd):
+            return MSDataOutput.__transpose_object_MSdata(MS_df,allow_multiple_istd)
+
+        #The first column (Sample_Name) gives the column names and the
+        #column names (Transition_Name) give the first columns
+        if allow_multiple_istd:
+            Transition_Name_df = value_df.columns.to_frame(index=False)
+            Transition_Name_df.columns = [name if name is not None else "level_" + str(level)
+                                          for level, name in enumerate(value_df.columns.names)]
+        else:
+            first_column_name = str(MS_df.columns[0]).strip()
+            if first_column_name == 'Sample_Name':
+                first_column_name = 'Transition_Name'
+            Transition_Name_df = pd.DataFrame({first_column_name : value_df.columns.to_numpy()})
+
+        #Only the block of numbers is transposed so that it stays numeric
+        colnames = MS_df.iloc[:,0].astype('str').str.strip().to_numpy()
+        Value_df = pd.DataFrame(value_df.to_numpy().T, columns=colnames)
+
+        return pd.concat([Transition_Name_df, Value_df], axis=1)
+
+    def __transpose_object_MSdata(MS_df,allow_multiple_istd=False):
+        """Function to transpose data with text values, one cell at a time"""
+
         #Transpose the data
         MS_df = MS_df.T
 
@@ -170,13 +199,7 @@ class MSDataOutput_csv(MSDataOutput):
         if df.empty:
             return
 
-        if(output_option in ['Sample_Annot', 'Transition_Name_Annot']) :
-            csv_filename = os.path.join(self.output_directory,output_option + '.csv')
-        else:
-            if self.result_name == "":
-                csv_filename = self.writer + '_' + output_option + '.csv'
-            else:
-                csv_filename = self.writer + '_' + self.result_name + '_' + output_option + '.csv'
+        csv_filename = self.__get_csv_filename(output_option)
 
         try:
             df.to_csv(csv_filename,sep=',',index=False)
@@ -188,6 +211,61 @@ class MSDataOutput_csv(MSDataOutput):
                 print("Unable to write df to csv file due to:",flush=True)
                 print(e,flush=True)
 
+    def df_chunks_to_file(self,output_option,df_chunks):
+        """Funtion to write a df given a few rows at a time to a csv file.
+
+        Args:
+            output_option (str): the name of the result csv file. MSOrganiser puts it as the Output_Options value
+            df_chunks (iterable): panda data frames with the same columns, written one after another under the column names of the first one
+
+        Note:
+            Only one data frame of df_chunks is needed in memory at a time, so a large table like the Long_Table
+            can be written without creating the whole table. The data frames are written as they are, without transposing.
+        
+        """
+        if self.writer is None:
+            self.start_writer()
+
+        # Replace '/' as file name cannot have this
+        if output_option == 'S/N':
+            output_option = output_option.replace('/','_to_')
+
+        csv_filename = self.__get_csv_filename(output_option)
+
+        has_data = False
+        try:
+            for df in df_chunks:
+                if df.empty:
+                    continue
+                #The first data frame creates the file with the column names, the rest are appended
+                df.to_csv(csv_filename,sep=',',index=False,
+                          mode = 'a' if has_data else 'w',
+                          header = not has_data)
+                has_data = True
+        except Exception as e:
+            if self.logger:
+                self.logger.error('Unable to write df to csv file due to:')
+                self.logger.error(e)
+            if self.ingui:
+                print("Unable to write df to csv file due to:",flush=True)
+                print(e,flush=True)
+            return
+
+        #Give the same warning as df_to_file when there is no data
+        if not has_data:
+            MSDataOutput.df_to_file_preparation(output_option,pd.DataFrame(),
+                                                logger=self.logger,ingui=self.ingui)
+
+    def __get_csv_filename(self,output_option):
+        if(output_option in ['Sample_Annot', 'Transition_Name_Annot']) :
+            csv_filename = os.path.join(self.output_directory,output_option + '.csv')
+        else:
+            if self.result_name == "":
+                csv_filename = self.writer + '_' + output_option + '.csv'
+            else:
+                csv_filename = self.writer + '_' + self.result_name + '_' + output_option + '.csv'
+        return csv_filename
+
 class MSDataOutput_Excel(MSDataOutput):
     """
     A class to describe the general setup for Data Output to Excel.
@@ -199,8 +277,24 @@ class MSDataOutput_Excel(MSDataOutput):
         ingui (bool): if True, print analysis status to screen
 
     """
+
+    #Maximum number of rows measured in a column of floats to set its width
+    max_width_sample_rows = 200
+
+    #If True, each sheet is streamed to a temporary file as it is written instead of
+    #keeping every cell of the workbook in memory until end_writer
+    write_only = True
+    #Number of rows converted to Excel cell values at a time in write only mode
+    write_only_chunk_rows = 1000
+
     def start_writer(self):
-        """Function to open an Excel writer object using openpyxl"""
+        """Function to open an Excel writer object using openpyxl
+
+        Note:
+            If MSDataOutput_Excel.write_only is True, the writer is an openpyxl workbook in write only mode.
+            Otherwise, it is a pandas ExcelWriter.
+            openpyxl is only imported here so that runs without Excel output do not load it.
+        """
 
         #Set options for excel to not turn strings into formulas
         #From https://stackoverflow.com/questions/54094172/file-corruption-while-writing-using-pandas
@@ -211,6 +305,16 @@ class MSDataOutput_Excel(MSDataOutput):
         self.writer = os.path.join(self.output_directory, self.output_filename + '_' +  self.result_name + '.xlsx' )
 
         try:
+            if self.write_only:
+                from openpyxl import Workbook
+                from openpyxl.styles import Font, Border, Side, Alignment
+                self.writer = Workbook(write_only = True)
+                #Style of the column names and index values, the same as pandas to_excel
+                self.__header_font = Font(bold = True)
+                self.__header_border = Border(left = Side(style = "thin"), right = Side(style = "thin"),
+                                              top = Side(style = "thin"), bottom = Side(style = "thin"))
+                self.__header_alignment = Alignment(horizontal = "center", vertical = "top")
+                return
             self.writer = pd.ExcelWriter(self.writer, engine = 'openpyxl', 
                                          #options = options,
                                          #engine_kwargs = {'options': {'strings_to_formulas': False,
@@ -246,17 +350,24 @@ class MSDataOutput_Excel(MSDataOutput):
 
     def end_writer(self, testing = False):
         """Function to close an Excel writer object"""
-        if self.writer.engine=="xlsxwriter":
+        if not self.write_only and self.writer.engine=="xlsxwriter":
             if self.writer.book.fileclosed:
                 return()
 
         try:
-            self.writer.save()
+            if self.write_only:
+                # Give the same error as pandas when no sheet has been written
+                if len(self.writer.worksheets) == 0:
+                    raise IndexError('At least one sheet must be visible')
+                self.writer.save(os.path.join(self.output_directory, self.output_filename + '_' +  self.result_name + '.xlsx' ))
+            else:
+                self.writer.save()
             # https://stackoverflow.com/questions/61382815/resourcewarning-for-a-file-that-is-unclosed-but-unittest-is-throwing-it
             if testing == True:
                 # If running in unit test, 
                 # close the book to prevent ResourceWarning that the book is not closed
-                self.writer.close()
+                if not self.write_only:
+                    self.writer.close()
                 # Delete the excel file
                 os.remove(os.path.join(self.output_directory, self.output_filename + '_' +  self.result_name + '.xlsx' ))
         except UserWarning as w:
@@ -277,8 +388,9 @@ class MSDataOutput_Excel(MSDataOutput):
                 # If running in unit test, 
                 # close the book to prevent ResourceWarning that the book is not closed
                 #self.writer.close()
-                # Delete the excel file
-                os.remove(os.path.join(self.output_directory, self.output_filename + '_' +  self.result_name + '.xlsx' ))
+                # Delete the excel file, a write only workbook has not created it yet
+                if os.path.isfile(os.path.join(self.output_directory, self.output_filename + '_' +  self.result_name + '.xlsx' )):
+                    os.remove(os.path.join(self.output_directory, self.output_filename + '_' +  self.result_name + '.xlsx' ))
                 return
             sys.exit(-1)
         except Exception as e:
@@ -290,27 +402,59 @@ class MSDataOutput_Excel(MSDataOutput):
                 self.logger.error(e)
             sys.exit(-1)
 
+    def __get_str_lengths(values,sample_rows=None):
+
+        """Function to get the maximum number of characters of an array of values when written as strings"""
+
+        if len(values) == 0:
+            return 0
+
+        if values.dtype == np.float64 and sample_rows is not None:
+            #Floats are measured on the sample rows and on the rows of the largest, smallest and most negative value
+            magnitude = np.abs(values)
+            is_nan = np.isnan(values)
+            extreme_rows = [np.where(is_nan, -1, magnitude).argmax(),
+                            np.where(is_nan | (magnitude == 0), np.inf, magnitude).argmin(),
+                            np.where(is_nan, np.inf, values).argmin()]
+            values = values[np.concatenate([sample_rows, extreme_rows])]
+
+        #Python integers give the same strings as NumPy integers, but faster
+        if values.dtype.kind in "iub":
+            values = values.tolist()
+
+        return max(map(len, map(str, values)))
+
     def __get_col_widths(dataframe,transpose=False,allow_multiple_istd=False):
 
-        """Function to get the correct width to output the excel file nicely"""
+        """Function to get the correct width to output the excel file nicely
+
+        Note:
+            Columns of floats with more than max_width_sample_rows rows are measured on max_width_sample_rows rows
+            spread evenly over the data frame and on the rows of their largest, smallest and most negative value.
+            Formatting every float as a string takes about as long as writing the Excel file.
+        """
+
+        sample_rows = None
+        if len(dataframe.index) > MSDataOutput_Excel.max_width_sample_rows:
+            sample_rows = np.unique(np.linspace(0, len(dataframe.index) - 1,
+                                                MSDataOutput_Excel.max_width_sample_rows).astype(np.int64))
 
         if allow_multiple_istd and not transpose:
             # Assuming multiindex on the columns but not the rows
             # First we find the maximum length of the index column   
             column_index_name_length_list = [len(column_index_name) for column_index_name in dataframe.columns.names]
             row_index_name_length_list = [len(str(dataframe.index.name))]
-            row_index_value_length_list = [len(str(s)) for s in dataframe.index.values] 
+            row_index_value_length_list = [MSDataOutput_Excel.__get_str_lengths(dataframe.index.values)]
             idx_max = max(column_index_name_length_list + 
                           row_index_name_length_list + 
                           row_index_value_length_list
                           )
             #Next we proceed to the other columns
             max_list = []
-            for cols in dataframe.columns:
-                #print(cols)
+            for i, cols in enumerate(dataframe.columns):
                 column_name_length_list = [len(col) for col in cols]            
-                column_value_length_list = [len(str(s)) for s in dataframe[cols].values]
-                max_list.append(max(max(column_name_length_list), max(column_value_length_list)) + 1)
+                column_value_length = MSDataOutput_Excel.__get_str_lengths(dataframe.iloc[:, i].to_numpy(), sample_rows)
+                max_list.append(max(max(column_name_length_list), column_value_length) + 1)
 
             # Then, we concatenate this to the max of the lengths of column name and its values for each column, left to right
             return [idx_max] + max_list
@@ -318,21 +462,19 @@ class MSDataOutput_Excel(MSDataOutput):
             # Assuming multiindex is not present in both row and columns
             # First we find the maximum length of the index column
             row_index_name_length_list = [len(str(dataframe.index.name))]
-            row_index_value_length_list = [len(str(s)) for s in dataframe.index.values]    
+            row_index_value_length_list = [MSDataOutput_Excel.__get_str_lengths(dataframe.index.values)]
             idx_max = max(row_index_name_length_list + 
                           row_index_value_length_list
                           )
             #Next we proceed to the other columns
             max_list = []
-            for col in dataframe.columns:
-                #print(cols)
+            for i, col in enumerate(dataframe.columns):
                 column_name_length = len(col)
-                column_value_length_list = [len(str(s)) for s in dataframe[col].values]
-                max_list.append(max([column_name_length] + column_value_length_list) + 1)
+                column_value_length = MSDataOutput_Excel.__get_str_lengths(dataframe.iloc[:, i].to_numpy(), sample_rows)
+                max_list.append(max(column_name_length, column_value_length) + 1)
 
             # Then, we concatenate this to the max of the lengths of column name and its values for each column, left to right
             return [idx_max] + max_list
-            #return [idx_max] + [max([len(str(s)) for s in dataframe[col].values] + [len(col)]) + 1 for col in dataframe.columns]
 
     def df_to_file(self,output_option,df,
                    transpose=False, allow_multiple_istd=False):
@@ -360,6 +502,12 @@ class MSDataOutput_Excel(MSDataOutput):
             return
 
         try:
+            if self.write_only:
+                self.__write_only_df_to_sheet(output_option,df,transpose,allow_multiple_istd)
+                return
+
+            from openpyxl.utils import get_column_letter
+
             #It is a pity that index must be set to True for outputing df with MultiIndex on columns or rows
             if allow_multiple_istd and not transpose:
                 df.to_excel(excel_writer=self.writer,sheet_name=output_option, 
@@ -398,4 +546,101 @@ class MSDataOutput_Excel(MSDataOutput):
                     worksheet.set_column(column_width_name, width + 1)
         except Exception as e:
             print("Unable to write df to excel file",flush=True)
-            print(e,flush=True)
\ No newline at end of file
+            print(e,flush=True)
+
+    def __write_only_df_to_sheet(self,output_option,df,transpose=False,allow_multiple_istd=False):
+
+        """Function to stream a df to a new sheet of a write only workbook, with the same layout as pandas to_excel"""
+
+        from openpyxl.utils import get_column_letter
+
+        worksheet = self.writer.create_sheet(output_option)
+
+        #The index is only written for the MultiIndex columns
+        has_index = allow_multiple_istd and not transpose
+
+        #Column widths must be set before the first row is written
+        for i, width in enumerate(MSDataOutput_Excel.__get_col_widths(df,transpose,allow_multiple_istd)):
+            if has_index:
+                worksheet.column_dimensions[get_column_letter(i+1)].width = width + 5
+            elif i > 0:
+                #i = 0 is for the index which we do not need to display
+                worksheet.column_dimensions[get_column_letter(i)].width = width + 5
+
+        if has_index:
+            #One row per column level starting with the level name. Repeated column names are merged
+            for level, level_length in enumerate(MSDataOutput_Excel.__get_level_lengths(df.columns)):
+                level_values = df.columns.get_level_values(level)
+                row = [self.__get_header_cell(worksheet, df.columns.names[level])] + [None] * len(df.columns)
+                for i, span in level_length.items():
+                    row[i + 1] = self.__get_header_cell(worksheet, level_values[i])
+                    if span > 1:
+                        worksheet.merged_cells.add(get_column_letter(i + 2) + str(level + 1) + ":" + 
+                                                   get_column_letter(i + span + 1) + str(level + 1))
+                worksheet.append(row)
+            #Followed by a row with the index name
+            if df.index.name:
+                worksheet.append([self.__get_header_cell(worksheet, df.index.name)])
+            else:
+                worksheet.append([])
+        else:
+            worksheet.append([self.__get_header_cell(worksheet, column_name) for column_name in df.columns])
+
+        #Rows are converted to cell values a few at a time and flushed to the sheet
+        for start in range(0, len(df.index), MSDataOutput_Excel.write_only_chunk_rows):
+            chunk_df = df.iloc[start:start + MSDataOutput_Excel.write_only_chunk_rows]
+            cell_values = MSDataOutput_Excel.__get_cell_values(chunk_df)
+            if has_index:
+                for index_value, row in zip(chunk_df.index.to_numpy(dtype = object), cell_values):
+                    worksheet.append([self.__get_header_cell(worksheet, index_value)] + row)
+            else:
+                for row in cell_values:
+                    worksheet.append(row)
+
+    def __get_header_cell(self,worksheet,value):
+
+        """Function to create a cell with the style of the column names"""
+
+        from openpyxl.cell import WriteOnlyCell
+
+        cell = WriteOnlyCell(worksheet, value)
+        cell.font = self.__header_font
+        cell.border = self.__header_border
+        cell.alignment = self.__header_alignment
+        return cell
+
+    def __get_cell_values(dataframe):
+
+        """Function to convert a df to lists of Excel cell values, the same way as pandas to_excel"""
+
+        values = dataframe.to_numpy(dtype = object)
+        #Missing values are left empty and infinity is written as text
+        values[values == np.inf] = "inf"
+        values[values == -np.inf] = "-inf"
+        values[pd.isna(values)] = None
+        return values.tolist()
+
+    def __get_level_lengths(columns):
+
+        """Function to get the position and number of columns of each column name for every level of a MultiIndex
+
+        Note:
+            Column names repeated in adjacent columns are merged the same way as pandas to_excel with merge_cells set to True.
+            A column name of a level is only merged with the previous column when the column names of the levels above are merged too.
+            The column names of the last level are never merged.
+        """
+
+        level_lengths = []
+        #A column starts a new merged cell when its name or any name in the levels above differs from the previous column
+        is_start = np.zeros(len(columns), dtype = bool)
+        is_start[0:1] = True
+        for level, level_codes in enumerate(columns.codes):
+            if level == columns.nlevels - 1:
+                is_start[:] = True
+            else:
+                level_codes = np.asarray(level_codes)
+                is_start[1:] |= level_codes[1:] != level_codes[:-1]
+            start_positions = np.flatnonzero(is_start)
+            spans = np.diff(np.append(start_positions, len(columns)))
+            level_lengths.append(dict(zip(start_positions.tolist(), spans.tolist())))
+        return level_lengths
@@ -26,13 +26,19 @@ def _get_report_dir(dir_name):
         resource_dir = os.path.dirname('__file__')
     return os.path.join(resource_dir, dir_name)
 
-#os.environ['PATH'] = _get_report_dir('cairo_dll') + os.pathsep + os.environ['PATH']
-os.environ['PATH'] = _get_report_dir('etc') + os.pathsep + os.environ['PATH']
-
-#To remove the @font-face not available in Windows warning
-#with warnings.catch_warnings():
-#    warnings.filterwarnings("ignore", category=UserWarning)
-from weasyprint import HTML
+def _import_HTML():
+    # weasyprint loads cairo and pango, which takes a few seconds.
+    # It is only imported when the pdf file is written
+    #os.environ['PATH'] = _get_report_dir('cairo_dll') + os.pathsep + os.environ['PATH']
+    etc_dir = _get_report_dir('etc')
+    if etc_dir not in os.environ['PATH'].split(os.pathsep):
+        os.environ['PATH'] = etc_dir + os.pathsep + os.environ['PATH']
+
+    #To remove the @font-face not available in Windows warning
+    #with warnings.catch_warnings():
+    #    warnings.filterwarnings("ignore", category=UserWarning)
+    from weasyprint import HTML
+    return HTML
 
 class MSDataReport:
     """
@@ -88,6 +94,7 @@ class MSDataReport_PDF(MSDataReport):
     def create_parameters_report(self,Parameters_df):
         """
         A function to generate the parameter inputs from dataframe to html and store it in a list self.__pdf_pages.
+        The html is rendered to a pdf page in output_to_PDF.
 
         Args:
             Parameters_df (pandas DataFrame): A dataframe storing the input parameters
@@ -97,8 +104,7 @@ class MSDataReport_PDF(MSDataReport):
         if not Parameters_df.empty:
             template_vars = {"title": "Parameters", "Parameter_Report": Parameters_df.to_html(index=False)}
             html_string = self.__Parameters_report_template.render(template_vars)
-            html = HTML(string=html_string)
-            self.__pdf_pages.append(html.render(stylesheets=[self.__stylesheet_file]))
+            self.__pdf_pages.append(html_string)
         else:
             if self.logger:
                 self.logger.warning('Parameters_df is empty.')
@@ -108,6 +114,7 @@ class MSDataReport_PDF(MSDataReport):
     def create_ISTD_report(self,ISTD_Report):
         """
         A function to generate ISTD normalisation report from dataframe to html and store it in a list self.__pdf_pages.
+        The html is rendered to a pdf page in output_to_PDF.
 
         Args:
             ISTD_Report (pandas DataFrame): A data frame of with transition names, its corresponding ISTD as columns.
@@ -117,21 +124,25 @@ class MSDataReport_PDF(MSDataReport):
         if not ISTD_Report.empty:
             template_vars = {"title": "ISTD_Normalisation_Report", "ISTD_Report": ISTD_Report.to_html()}
             html_string = self.__ISTD_report_template.render(template_vars)
-            html = HTML(string=html_string)
-            self.__pdf_pages.append(html.render(stylesheets=[self.__stylesheet_file]))
+            self.__pdf_pages.append(html_string)
 
     def output_to_PDF(self):
         """
         A function to convert the list of html in self.__pdf_pages to pages in pdf
 
         """
+        #Render the html of each page, weasyprint is imported here
+        HTML = _import_HTML()
+        pdf_documents = [HTML(string=html_string).render(stylesheets=[self.__stylesheet_file])
+                         for html_string in self.__pdf_pages]
+
         #Output the ISTD report for each file
         val = []
-        for doc in self.__pdf_pages:
+        for doc in pdf_documents:
             for p in doc.pages:
                 val.append(p)
         #print(self.__pdf_pages[0].copy(val))
-        pdf_file = self.__pdf_pages[0].copy(val).write_pdf(self.output_file_path) # use metadata of first pdf
+        pdf_file = pdf_documents[0].copy(val).write_pdf(self.output_file_path) # use metadata of first pdf
 
 
 
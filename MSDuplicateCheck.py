@@ -1,6 +1,115 @@
 import sys
+import weakref
 from collections import Counter
 
+# Reports of the duplicated column names of the column indexes already checked, keyed by the id of the column index.
+# A column index cannot be modified, so its report is kept until the column index is removed from memory
+_column_report_cache = {}
+
+class DuplicateReport():
+    """
+    A structured report of the names (usually Transition Name or Sample Name) that are duplicated
+
+    Args:
+        names (list): A list of duplicated names, in the order they first appear
+        counts (dict): The number of times each duplicated name appears
+        sources (dict): The input files each duplicated name is found in. Empty when the input files are not known
+
+    """
+
+    def __init__(self, names = None, counts = None, sources = None):
+        self.names = names if names is not None else []
+        self.counts = counts if counts is not None else {}
+        self.sources = sources if sources is not None else {}
+
+    def has_duplicates(self):
+        """Function to check if there are duplicated names
+
+        Returns:
+            has_duplicates (bool): True if there is at least one duplicated name
+
+        """
+        return(len(self.names) > 0)
+
+def find_duplicated_names(name_list, source_list = None):
+    """Function to find the duplicated names in a list of names in one pass.
+
+    Args:
+        name_list (list): A list of names (usually Transition Name or Sample Name)
+        source_list (list): A list of the input file of each name in name_list. Leave as None when it is not known
+
+    Returns:
+        duplicate_report (DuplicateReport): A report of the duplicated names in name_list
+
+    """
+
+    name_count = Counter(name_list)
+    duplicated_name_list = [key for key, count in name_count.items() if count > 1]
+    duplicated_name_count = {key : name_count[key] for key in duplicated_name_list}
+
+    duplicated_name_source = {}
+    if source_list is not None and len(duplicated_name_list) > 0:
+        for name, source in zip(name_list, source_list):
+            if name in duplicated_name_count:
+                source_of_name = duplicated_name_source.setdefault(name, [])
+                if source not in source_of_name:
+                    source_of_name.append(source)
+
+    return(DuplicateReport(duplicated_name_list, duplicated_name_count, duplicated_name_source))
+
+def get_duplicated_column_report(input_wide_data):
+    """Function to find the duplicate column names (usually Transition Name) in a given wide data.
+
+    Args:
+        input_wide_data (pandas DataFrame): A data frame of sample as rows and transition names as columns
+
+    Returns:
+        duplicate_report (DuplicateReport): A report of the duplicated column names
+
+    Note:
+        The report is cached against the column index of input_wide_data,
+        so checking the same data frame again, or another data frame with the same column index, is immediate.
+    """
+
+    columns = input_wide_data.columns
+    column_index_id = id(columns)
+    cached_report = _column_report_cache.get(column_index_id)
+    if cached_report is not None and cached_report[0]() is columns:
+        return(cached_report[1])
+
+    if not columns.has_duplicates:
+        duplicate_report = DuplicateReport()
+    else:
+        duplicate_report = find_duplicated_names(columns.values.tolist())
+
+    # The report is removed from the cache together with its column index
+    column_index_ref = weakref.ref(columns, lambda _: _column_report_cache.pop(column_index_id, None))
+    _column_report_cache[column_index_id] = (column_index_ref, duplicate_report)
+
+    return(duplicate_report)
+
+def get_duplicated_sample_name_report(input_wide_data, allow_multiple_istd = False):
+    """Function to find the duplicate sample names in a given wide data.
+
+    Args:
+        input_wide_data (pandas DataFrame): A data frame of sample as rows and transition names as columns
+        allow_multiple_istd (bool): if True, allow input_wide_data to have mulitple internal standards
+
+    Returns:
+        duplicate_report (DuplicateReport): A report of the duplicated sample names
+
+    """
+
+    if allow_multiple_istd:
+        Sample_Name = input_wide_data[("Sample_Name","")]
+    else:
+        Sample_Name = input_wide_data["Sample_Name"]
+
+    if Sample_Name.is_unique:
+        return(DuplicateReport())
+
+    return(find_duplicated_names(Sample_Name.tolist()))
+
 def check_duplicated_columns_in_wide_data(input_wide_data, output_option,
                                           logger = None, ingui = True,
                                           allow_multiple_istd = False):
@@ -13,22 +122,66 @@ def check_duplicated_columns_in_wide_data(input_wide_data, output_option,
         ingui (bool): if True, print analysis status to screen
         allow_multiple_istd (bool): if True, allow input_wide_data to have mulitple internal standards
 
+    Returns:
+        duplicate_report (DuplicateReport): A report of the duplicated column names, which is empty as the program stops when there are any
+
+    """
+
+    duplicate_report = get_duplicated_column_report(input_wide_data)
+
+    report_duplicated_columns(duplicate_report.names, output_option,
+                              logger = logger, ingui = ingui,
+                              allow_multiple_istd = allow_multiple_istd)
+
+    return(duplicate_report)
+
+def check_duplicated_sample_names_in_wide_data(input_wide_data, output_option,
+                                               logger = None, ingui = True,
+                                               allow_multiple_istd = False):
+    """Function to check for duplicate sample names in a given wide data.
+
+    Args:
+        input_wide_data (pandas DataFrame): A data frame of sample as rows and transition names as columns
+        output_option (str): The name of the contents that the data frame contains. Example: Area, RT etc...
+        logger (object): logger object created by start_logger in MSOrganiser
+        ingui (bool): if True, print analysis status to screen
+        allow_multiple_istd (bool): if True, allow input_wide_data to have mulitple internal standards
+
+    Returns:
+        duplicate_report (DuplicateReport): A report of the duplicated sample names, which is empty as the program stops when there are any
+
     """
 
-    # Convert the dataframe column name to a list
-    column_name_list = input_wide_data.columns.values.tolist()
-    # Get a list of duplicated column names
-    duplicated_column_name_list = [key for key in Counter(column_name_list).keys() if Counter(column_name_list)[key] > 1]
+    duplicate_report = get_duplicated_sample_name_report(input_wide_data, 
+                                                         allow_multiple_istd = allow_multiple_istd)
+
+    report_duplicated_sample_names(duplicate_report.names, output_option,
+                                   logger = logger, ingui = ingui)
+
+    return(duplicate_report)
+
+def report_duplicated_columns(duplicated_column_name_list, output_option,
+                              logger = None, ingui = True,
+                              allow_multiple_istd = False,
+                              duplicated_column_name_source = None):
+    """Function to inform the user of duplicate column names (usually Transition Name) and stop the program if there are any.
+
+    Args:
+        duplicated_column_name_list (list): A list of duplicated column names, in the order they first appear
+        output_option (str): The name of the contents that the data frame contains. Example: Area, RT etc...
+        logger (object): logger object created by start_logger in MSOrganiser
+        ingui (bool): if True, print analysis status to screen
+        allow_multiple_istd (bool): if True, the column names may be tuples from mulitple internal standards
+        duplicated_column_name_source (dict): The input files each duplicated column name is found in, given after the column name
+
+    """
 
     # When there are duplicated
     if len(duplicated_column_name_list) > 0:
 
         # Convert the list into a string
-        duplicated_column_name_string = ""
-        if allow_multiple_istd:
-            duplicated_column_name_string = ", ".join(map(str, duplicated_column_name_list))
-        else:
-            duplicated_column_name_string = ", ".join(duplicated_column_name_list)
+        duplicated_column_name_string = _get_duplicated_name_string(duplicated_column_name_list,
+                                                                    duplicated_column_name_source)
 
         # Inform the user and stop the program 
         if logger:
@@ -46,35 +199,26 @@ def check_duplicated_columns_in_wide_data(input_wide_data, output_option,
                   'Duplicated columns are ' + duplicated_column_name_string, flush=True)
         sys.exit(-1)
 
-def check_duplicated_sample_names_in_wide_data(input_wide_data, output_option,
-                                               logger = None, ingui = True,
-                                               allow_multiple_istd = False):
-    """Function to check for duplicate sample names in a given wide data.
+def report_duplicated_sample_names(duplicated_Sample_Name_list, output_option,
+                                   logger = None, ingui = True,
+                                   duplicated_Sample_Name_source = None):
+    """Function to inform the user of duplicate sample names and stop the program if there are any.
 
     Args:
-        input_wide_data (pandas DataFrame): A data frame of sample as rows and transition names as columns
+        duplicated_Sample_Name_list (list): A list of duplicated sample names, in the order they first appear
         output_option (str): The name of the contents that the data frame contains. Example: Area, RT etc...
         logger (object): logger object created by start_logger in MSOrganiser
         ingui (bool): if True, print analysis status to screen
-        allow_multiple_istd (bool): if True, allow input_wide_data to have mulitple internal standards
+        duplicated_Sample_Name_source (dict): The input files each duplicated sample name is found in, given after the sample name
 
     """
 
-    # Convert the sample name column to a list
-    unique_Sample_Name_list = []
-    if allow_multiple_istd:
-        unique_Sample_Name_list = input_wide_data[("Sample_Name","")].tolist()
-    else:
-        unique_Sample_Name_list = input_wide_data["Sample_Name"].tolist()
-
-    # Get a list of duplicated column names
-    duplicated_Sample_Name_list = [key for key in Counter(unique_Sample_Name_list).keys() if Counter(unique_Sample_Name_list)[key] > 1]
-
     # When there are duplicated
     if len(duplicated_Sample_Name_list) > 0:
 
         # Convert the list into a string
-        duplicated_Sample_Name_string = ", ".join(duplicated_Sample_Name_list)
+        duplicated_Sample_Name_string = _get_duplicated_name_string(duplicated_Sample_Name_list,
+                                                                    duplicated_Sample_Name_source)
 
         # Inform the user and stop the program 
         if logger:
@@ -93,4 +237,13 @@ def check_duplicated_sample_names_in_wide_data(input_wide_data, output_option,
 
         sys.exit(-1)
 
-
+def _get_duplicated_name_string(duplicated_name_list, duplicated_name_source = None):
+    # Join the duplicated names, each followed by its input files when they are known
+    duplicated_name_string_list = []
+    for name in duplicated_name_list:
+        if duplicated_name_source and name in duplicated_name_source:
+            duplicated_name_string_list.append(str(name) + " (found in " + 
+                                               ", ".join(map(str, duplicated_name_source[name])) + ")")
+        else:
+            duplicated_name_string_list.append(str(name))
+    return(", ".join(duplicated_name_string_list))
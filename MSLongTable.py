@@ -0,0 +1,338 @@
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+class LongTableBuilder:
+    """
+    A class to build the long table of several output options in one step
+
+    Note:
+        Each row of the long table is kept as the position of its Sample_Name and its transition name
+        (or Transition_Name and Transition_Name_ISTD pair) in the first data frame added. The values of
+        every output option are then taken from their wide data frame by position, instead of melting
+        the wide data frame and merging it with the whole long table. The long table data frame is only
+        created once, when get_long_table_df is called.
+
+        When a wide data frame has duplicated sample names or transition names, the long table is
+        merged one output option at a time as before, so that the rows are matched the same way.
+    """
+
+    KEY_COLUMNS = ["Sample_Name","Transition_Name","Transition_Name_ISTD"]
+
+    def __init__(self):
+        #Sample names and transition names of the long table
+        self.__Sample_Name_values = None
+        self.__Sample_Name_index = None
+        self.__column_index = None
+
+        #Position of the Sample_Name and transition name of each row of the long table
+        self.__Sample_Name_code = None
+        self.__column_code = None
+
+        #Values of each output option, in the row order of the long table
+        self.__value_dict = OrderedDict()
+        #Number of output options before Transition_Name_ISTD, when it is added after the first data frame
+        self.__Transition_Name_ISTD_position = 0
+
+        #Only used when the long table has to be merged one output option at a time
+        self.__LongTable_df = None
+
+    def add(self, wide_df, column_name, allow_multiple_istd = False):
+        """Function to add the wide data frame of an output option to the long table
+
+        Args:
+            wide_df (pandas DataFrame): A data frame of sample as rows and transition names as columns
+            column_name (str): The name of the column of the long table that holds the values of wide_df. Example: Area
+            allow_multiple_istd (bool): if True, the columns of wide_df are (Transition_Name, Transition_Name_ISTD) pairs
+
+        Note:
+            Rows of the long table without a value in wide_df are given NaN, like a left merge.
+            When the long table has no Transition_Name_ISTD yet and wide_df has, each row is repeated
+            for every Transition_Name_ISTD of its transition.
+        """
+
+        if wide_df.empty:
+            return
+
+        if self.__LongTable_df is None:
+            [Sample_Name_values, column_index, values] = self.__split_wide_df(wide_df, allow_multiple_istd)
+            Sample_Name_index = pd.Index(Sample_Name_values)
+            if (Sample_Name_index.is_unique and column_index.is_unique and
+                column_name not in self.__value_dict and column_name not in LongTableBuilder.KEY_COLUMNS):
+                self.__take_by_position(Sample_Name_values, Sample_Name_index, column_index, values, column_name)
+                return
+            self.__LongTable_df = self.get_long_table_df()
+
+        self.__merge_to_LongTable_df(wide_df, column_name, allow_multiple_istd)
+
+    def get_long_table_df(self):
+        """Function to get the long table
+
+        Returns:
+            LongTable_df (pandas DataFrame): A long data frame with column name Sample_Name, Transition_Name, (Transition_Name_ISTD) and one column per output option added
+
+        """
+
+        if self.__LongTable_df is not None:
+            return self.__LongTable_df
+
+        if self.__column_index is None:
+            return pd.DataFrame()
+
+        return self.__get_long_table_rows(0, len(self.__Sample_Name_code))
+
+    def iter_long_table_df(self, chunk_size = 100000):
+        """Function to get the long table a few rows at a time
+
+        Args:
+            chunk_size (int): maximum number of rows in each data frame
+
+        Returns:
+            (generator): A generator of long data frames with the columns of get_long_table_df. Together, they give the rows of get_long_table_df in the same order
+
+        Note:
+            Only the rows of one data frame are created at a time. As the long table is ordered by transition like pandas melt,
+            each data frame holds all the samples of a few transitions.
+        """
+
+        if self.__LongTable_df is not None:
+            for start in range(0, len(self.__LongTable_df), chunk_size):
+                yield self.__LongTable_df.iloc[start:start + chunk_size]
+            return
+
+        if self.__column_index is None:
+            return
+
+        number_of_rows = len(self.__Sample_Name_code)
+        for start in range(0, number_of_rows, chunk_size):
+            yield self.__get_long_table_rows(start, min(start + chunk_size, number_of_rows))
+
+    def __get_long_table_rows(self, start, stop):
+        #Create the data frame of the long table rows from start to stop
+        Sample_Name_code = self.__Sample_Name_code[start:stop]
+        column_code = self.__column_code[start:stop]
+
+        LongTable_dict = OrderedDict()
+        LongTable_dict["Sample_Name"] = self.__Sample_Name_values.take(Sample_Name_code)
+        value_list = [(column_name, values[start:stop]) for column_name, values in self.__value_dict.items()]
+        if isinstance(self.__column_index, pd.MultiIndex):
+            LongTable_dict["Transition_Name"] = self.__column_index.get_level_values(0).to_numpy().take(column_code)
+            LongTable_dict.update(value_list[:self.__Transition_Name_ISTD_position])
+            LongTable_dict["Transition_Name_ISTD"] = self.__column_index.get_level_values(1).to_numpy().take(column_code)
+            LongTable_dict.update(value_list[self.__Transition_Name_ISTD_position:])
+        else:
+            LongTable_dict["Transition_Name"] = self.__column_index.to_numpy().take(column_code)
+            LongTable_dict.update(value_list)
+
+        return pd.DataFrame(LongTable_dict, index = pd.RangeIndex(start, stop))
+
+    def __split_wide_df(self, wide_df, allow_multiple_istd):
+        #Split the wide data frame into its sample names, transition names and values
+        is_Sample_Name = wide_df.columns.get_level_values(0) == "Sample_Name"
+        Sample_Name_values = wide_df.iloc[:, np.flatnonzero(is_Sample_Name)[0]].to_numpy()
+        value_df = wide_df.loc[:, ~is_Sample_Name]
+        column_index = value_df.columns
+        if allow_multiple_istd:
+            column_index = pd.MultiIndex.from_arrays([column_index.get_level_values(0),
+                                                      column_index.get_level_values(1)])
+        return [Sample_Name_values, column_index, value_df.to_numpy()]
+
+    def __take_by_position(self, Sample_Name_values, Sample_Name_index, column_index, values, column_name):
+
+        [number_of_samples, number_of_columns] = values.shape
+
+        #The first data frame gives the rows of the long table, column by column like pandas melt
+        if self.__column_index is None:
+            self.__Sample_Name_values = Sample_Name_values
+            self.__Sample_Name_index = Sample_Name_index
+            self.__column_index = column_index
+            self.__Sample_Name_code = np.tile(np.arange(number_of_samples), number_of_columns)
+            self.__column_code = np.repeat(np.arange(number_of_columns), number_of_samples)
+            self.__value_dict[column_name] = values.ravel(order = "F")
+            return
+
+        #Row of wide_df for each row of the long table, -1 if the sample is not in wide_df
+        Sample_Name_position = Sample_Name_index.get_indexer(self.__Sample_Name_index)[self.__Sample_Name_code]
+
+        if isinstance(column_index, pd.MultiIndex) and not isinstance(self.__column_index, pd.MultiIndex):
+            [column_position, row] = self.__add_Transition_Name_ISTD(column_index, Sample_Name_position)
+            Sample_Name_position = Sample_Name_position[row]
+        elif isinstance(self.__column_index, pd.MultiIndex) and not isinstance(column_index, pd.MultiIndex):
+            column_position = column_index.get_indexer(self.__column_index.get_level_values(0))[self.__column_code]
+        else:
+            column_position = column_index.get_indexer(self.__column_index)[self.__column_code]
+
+        #Take the values from wide_df by position, with NaN for the rows not found in wide_df
+        value_position = Sample_Name_position * number_of_columns + column_position
+        value_position[(Sample_Name_position < 0) | (column_position < 0)] = -1
+        self.__value_dict[column_name] = pd.api.extensions.take(values.ravel(), value_position, allow_fill = True)
+
+    def __add_Transition_Name_ISTD(self, column_index, Sample_Name_position):
+        #Repeat the rows of the long table for every (Transition_Name, Transition_Name_ISTD) of their transition
+        #Returns the column of wide_df for each new row (-1 if the row is not found in wide_df)
+        #and the old row of each new row
+
+        #Columns of wide_df grouped by the transition of the long table, keeping their order within a transition
+        Transition_Name_code = self.__column_index.get_indexer(column_index.get_level_values(0))
+        found_column = np.flatnonzero(Transition_Name_code >= 0)
+        column_order = found_column[np.argsort(Transition_Name_code[found_column], kind = "stable")]
+        column_count = np.bincount(Transition_Name_code[found_column], minlength = len(self.__column_index))
+        column_start = np.cumsum(column_count) - column_count
+
+        #Rows without a match in wide_df are kept once, with NaN as the Transition_Name_ISTD
+        row_count = column_count[self.__column_code]
+        is_found = (Sample_Name_position >= 0) & (row_count > 0)
+        row_count = np.where(is_found, row_count, 1)
+        row = np.repeat(np.arange(len(row_count)), row_count)
+        row_offset = np.arange(len(row)) - np.repeat(np.cumsum(row_count) - row_count, row_count)
+        row_is_found = is_found[row]
+        row_column_code = self.__column_code[row]
+        position = column_start[row_column_code] + row_offset
+
+        column_position = np.full(len(row), -1, dtype = np.int64)
+        column_position[row_is_found] = column_order[position[row_is_found]]
+
+        #The pairs of wide_df come first, followed by a (Transition_Name, NaN) pair for every transition
+        Transition_Name_values = self.__column_index.to_numpy()
+        self.__column_index = pd.MultiIndex.from_arrays([np.concatenate([column_index.get_level_values(0).to_numpy()[column_order], Transition_Name_values]),
+                                                         np.concatenate([column_index.get_level_values(1).to_numpy()[column_order],
+                                                                         np.full(len(Transition_Name_values), np.nan, dtype = object)])])
+        self.__column_code = np.where(row_is_found, position, len(column_order) + row_column_code)
+        self.__Sample_Name_code = self.__Sample_Name_code[row]
+        for column_name in self.__value_dict:
+            self.__value_dict[column_name] = self.__value_dict[column_name][row]
+        self.__Transition_Name_ISTD_position = len(self.__value_dict)
+
+        return [column_position, row]
+
+    def __merge_to_LongTable_df(self, wide_df, column_name, allow_multiple_istd):
+        #Melt the wide data frame and merge it with the whole long table
+        if allow_multiple_istd:
+            wide_df = pd.melt(wide_df,id_vars=["Sample_Name"],
+                              var_name= ["Transition_Name","Transition_Name_ISTD"],
+                              value_name=column_name)
+            if self.__LongTable_df.empty:
+                self.__LongTable_df = wide_df
+            else:
+                # This is handle the case when the LongTable contains
+                # only columns that do not need calculation like Area
+                # Hence this,LongTable will not have the column "Transition_Name_ISTD"
+                if "Transition_Name_ISTD" not in self.__LongTable_df.columns:
+                    self.__LongTable_df = pd.merge(self.__LongTable_df, wide_df ,
+                                                   on=["Sample_Name","Transition_Name"],
+                                                   how = 'left')
+                else:
+                    self.__LongTable_df = pd.merge(self.__LongTable_df, wide_df ,
+                                                   on=["Sample_Name","Transition_Name","Transition_Name_ISTD"],
+                                                   how = 'left')
+                self.__LongTable_df = self.__LongTable_df.drop_duplicates()
+        else:
+            wide_df = pd.melt(wide_df,id_vars=["Sample_Name"],var_name="Transition_Name", value_name=column_name)
+            if self.__LongTable_df.empty:
+                self.__LongTable_df = wide_df
+            else:
+                self.__LongTable_df = pd.merge(self.__LongTable_df, wide_df , on=["Sample_Name","Transition_Name"], how='left')
+
+class ConcatenatedLongTableBuilder:
+    """
+    A class to split the concatenated wide data frames of several input files into the wide data frames of each input file for the long table
+
+    Args:
+        concatenation_type (str): "rows or columns" to indicate if the wide data frames are concatenated by row wise or column wise respectively
+
+    Note:
+        Only the sample names and transition names of each input file are kept by add_input_file.
+        The long table of the concatenated data is then built one input file at a time with a LongTableBuilder,
+        instead of concatenating the long table of every input file and merging it with the long table of the calculated data.
+        Its rows are in the same order as the long tables of the input files one after another.
+    """
+
+    def __init__(self, concatenation_type = "rows"):
+        self.concatenation_type = concatenation_type
+
+        #Sample names, transition names and number of rows of each input file
+        self.__input_file_list = []
+
+        #Wide data frames of each output option, with the name of its column in the long table
+        self.__concatenated_df_list = []
+        self.__calculated_df_list = []
+
+    def add_input_file(self, input_df_list):
+        """Function to add the sample names and transition names of the next input file
+
+        Args:
+            input_df_list (list): The data frames of the input file, in the order they are concatenated. The first non empty one gives the sample names and transition names
+
+        """
+
+        for input_df in input_df_list:
+            if not input_df.empty:
+                self.__input_file_list.append([input_df["Sample_Name"].to_numpy(),
+                                               input_df.columns[input_df.columns != "Sample_Name"]])
+                return
+
+        self.__input_file_list.append([np.array([], dtype = object), pd.Index([])])
+
+    def add_concatenated_df(self, concatenated_df, column_name):
+        """Function to add the concatenated wide data frame of an output option extracted from the input files
+
+        Args:
+            concatenated_df (pandas DataFrame): The wide data frames of every input file added with add_input_file, concatenated by concatenation_type
+            column_name (str): The name of the column of the long table that holds the values of concatenated_df. Example: Area
+
+        """
+        self.__concatenated_df_list.append([concatenated_df, column_name])
+
+    def add_calculated_df(self, calculated_df, column_name, allow_multiple_istd = False):
+        """Function to add the wide data frame of an output option calculated from the concatenated data
+
+        Args:
+            calculated_df (pandas DataFrame): A data frame of sample as rows and transition names as columns. Example: normArea by ISTD
+            column_name (str): The name of the column of the long table that holds the values of calculated_df. Example: normArea
+            allow_multiple_istd (bool): if True, the columns of calculated_df are (Transition_Name, Transition_Name_ISTD) pairs
+
+        """
+        self.__calculated_df_list.append([calculated_df, column_name, allow_multiple_istd])
+
+    def iter_input_file_wide_df_list(self):
+        """Function to get the wide data frames of each input file
+
+        Returns:
+            (generator): A generator of lists of [wide_df, column_name, allow_multiple_istd], one list for each input file
+            in the order they were added, to be added to a LongTableBuilder
+
+        Note:
+            The values extracted from an input file are taken from the concatenated wide data frames by position.
+            The calculated values are taken by the sample names and transition names of the input file.
+        """
+
+        row_start = 0
+        for [Sample_Name_values, column_index] in self.__input_file_list:
+            number_of_rows = len(Sample_Name_values)
+
+            input_file_wide_df_list = []
+            if number_of_rows > 0:
+                #Rows of the input file in the concatenated wide data frames
+                if self.concatenation_type == "rows":
+                    row_position = np.arange(row_start, row_start + number_of_rows)
+                else:
+                    row_position = np.arange(number_of_rows)
+
+                for [concatenated_df, column_name] in self.__concatenated_df_list:
+                    wide_df = concatenated_df.iloc[row_position, concatenated_df.columns.get_indexer(column_index)]
+                    wide_df.insert(0, "Sample_Name", Sample_Name_values)
+                    input_file_wide_df_list.append([wide_df, column_name, False])
+
+                for [calculated_df, column_name, allow_multiple_istd] in self.__calculated_df_list:
+                    if calculated_df.empty:
+                        continue
+                    is_Sample_Name = calculated_df.columns.get_level_values(0) == "Sample_Name"
+                    is_input_file_row = calculated_df.iloc[:, np.flatnonzero(is_Sample_Name)[0]].isin(Sample_Name_values).to_numpy()
+                    is_input_file_column = is_Sample_Name | calculated_df.columns.get_level_values(0).isin(column_index)
+                    input_file_wide_df_list.append([calculated_df.loc[is_input_file_row, is_input_file_column],
+                                                    column_name, allow_multiple_istd])
+
+            if self.concatenation_type == "rows":
+                row_start = row_start + number_of_rows
+
+            yield input_file_wide_df_list
@@ -1,8 +1,10 @@
 # coding: utf-8
 import sys
-import MSDuplicateCheck
-import MSParser
+import MSParallel
+from MSConcatenate import ConcatenationBuilder
+from MSLongTable import ConcatenatedLongTableBuilder
 from MSAnalysis import MS_Analysis
+from Annotation import MS_Template
 from MSDataOutput import MSDataOutput_Excel
 from MSDataOutput import MSDataOutput_csv
 from MSDataReport import MSDataReport_PDF
@@ -12,6 +14,7 @@ from logging.handlers import TimedRotatingFileHandler
 import os
 import sys
 import logging
+import multiprocessing
 import pandas as pd
 
 from datetime import datetime
@@ -154,6 +157,63 @@ def output_concatenated_wide_data(stored_args,
     if stored_args['Output_Format'] == "Excel" :
         DfConcatenateOutput.end_writer()
 
+def iter_concatenated_Long_Table(stored_args, Long_Table_builder, logger=None):
+    """Function to get the Long_Table of the concatenated data a few rows at a time
+
+    Args:
+        stored_args (dict): A dictionary storing the input parameters. The dictionary is created in MSParser
+        Long_Table_builder (ConcatenatedLongTableBuilder): The concatenated data frames collected by the concatenation workflow
+        logger (object): logger object created by start_logger in MSOrganiser
+
+    Returns:
+        (generator): A generator of long data frames. Together, they give the long tables of the input files one after another
+
+    Note:
+        The long table of one input file is built from its part of the concatenated data frames 
+        and the annotation columns are merged to one data frame at a time.
+    """
+
+    ISTD_map_df = pd.DataFrame()
+    for MS_FilePath, input_file_wide_df_list in zip(stored_args['MS_Files'], 
+                                                    Long_Table_builder.iter_input_file_wide_df_list()):
+        MyLongTableData = MS_Analysis(MS_FilePath = MS_FilePath, 
+                                      MS_FileType = stored_args['MS_FileType'], 
+                                      Annotation_FilePath = stored_args['Annot_File'],
+                                      logger = logger, 
+                                      ingui = True, 
+                                      longtable = True, 
+                                      longtable_annot = stored_args['Long_Table_Annot'])
+
+        #The Transition_Name_Annot sheet is the same for every input file, only read it once
+        MyLongTableData.ISTD_map_df = ISTD_map_df
+
+        for [wide_df, column_name, allow_multiple_istd] in input_file_wide_df_list:
+            MyLongTableData._add_to_LongTable_df(wide_df, column_name, allow_multiple_istd)
+
+        yield from MyLongTableData.iter_Long_Table(allow_multiple_istd=stored_args['Allow_Multiple_ISTD'],
+                                                   concatenation_type = None)
+
+        ISTD_map_df = MyLongTableData.ISTD_map_df
+
+def get_concatenated_Long_Table(stored_args, Long_Table_builder, logger=None):
+    """Function to get the whole Long_Table of the concatenated data
+
+    Args:
+        stored_args (dict): A dictionary storing the input parameters. The dictionary is created in MSParser
+        Long_Table_builder (ConcatenatedLongTableBuilder): The concatenated data frames collected by the concatenation workflow
+        logger (object): logger object created by start_logger in MSOrganiser
+
+    Returns:
+        Long_Table_df (pandas DataFrame): A long data frame with the rows of iter_concatenated_Long_Table. Empty if there is no data
+
+    """
+
+    Long_Table_df_list = list(iter_concatenated_Long_Table(stored_args, Long_Table_builder, logger = logger))
+    if len(Long_Table_df_list) == 0:
+        return(pd.DataFrame())
+
+    return(pd.concat(Long_Table_df_list, ignore_index = True, sort = False))
+
 def output_concatenated_long_table(stored_args, 
                                    concatenate_df_list, concatenate_df_sheet_name,
                                    logger=None):
@@ -173,11 +233,257 @@ def output_concatenated_long_table(stored_args,
                                                        result_name = "" ,logger=logger, ingui=True)
         DfConcatenateLongOutput.start_writer()
         Long_Table_index = concatenate_df_sheet_name.index("Long_Table")
+        #The concatenation workflows give the concatenated data frames of the Long_Table instead of the Long_Table
+        Long_Table_builder = concatenate_df_list[Long_Table_index]
         if stored_args['Output_Format'] == "csv" and stored_args['Long_Table_Annot']:
             concatenate_df_sheet_name[Long_Table_index] = "Long_Table_with_Annot"
-        DfConcatenateLongOutput.df_to_file(concatenate_df_sheet_name[Long_Table_index],concatenate_df_list[Long_Table_index])
         if stored_args['Output_Format'] == "Excel" :
+            DfConcatenateLongOutput.df_to_file(concatenate_df_sheet_name[Long_Table_index],
+                                               get_concatenated_Long_Table(stored_args, Long_Table_builder, logger = logger))
             DfConcatenateLongOutput.end_writer()
+        elif stored_args['Output_Format'] == "csv" :
+            #The csv file is written a few rows at a time without creating the whole Long_Table
+            DfConcatenateLongOutput.df_chunks_to_file(concatenate_df_sheet_name[Long_Table_index],
+                                                      iter_concatenated_Long_Table(stored_args, Long_Table_builder, logger = logger))
+
+def set_annotation_snapshot(stored_args):
+    """Function to keep a snapshot of the annotation file for later runs only when Annot_Snapshot_Directory is given
+
+    Args:
+        stored_args (dict): A dictionary storing the input parameters. The dictionary is created in MSParser or MSCommandLine
+
+    Note:
+        The snapshot settings are class attributes of MS_Template. Workers of a pool started with spawn, 
+        such as on Windows, do not inherit them, so each function that processes one input file calls this function again.
+        Both settings are set on every call so that a run without Annot_Snapshot_Directory does not use the snapshot of an earlier run.
+    """
+    MS_Template.use_snapshot = bool(stored_args.get('Annot_Snapshot_Directory'))
+    MS_Template.snapshot_directory = stored_args.get('Annot_Snapshot_Directory') or None
+
+def no_concatenate_one_file(MS_FilePath, stored_args,
+                            no_need_full_data_output_options, need_full_data_output_options,
+                            logger=None, testing = False):
+    """To extract, calculate and output the results of one input file when no concatenation is required
+
+    Args:
+        MS_FilePath (str): The file path to the MRM transition name file.
+        stored_args (dict): A dictionary storing the input parameters. The dictionary is created in MSParser
+        no_need_full_data_output_options (list): Output options that are extracted directly from the input file like Area, RT
+        need_full_data_output_options (list): Output options that require calculation like normArea by ISTD
+        logger (object): logger object created by start_logger in MSOrganiser
+        testing (bool): if True, unit test is currently being perform.
+
+    Returns:
+        (list): list containing:
+
+            * file_data (list): A list of output data frames. Only filled during unit testing
+            * sheet_name (list): A list of sheet names of the output data frames. Only filled during unit testing
+
+    """
+
+    if not testing:
+        print("Working on " + MS_FilePath,flush=True)
+    if logger:
+        logger.info("Working on " + MS_FilePath)
+
+    #Keep a snapshot of the annotation file for later runs
+    set_annotation_snapshot(stored_args)
+
+    MyData = MS_Analysis(MS_FilePath = MS_FilePath, 
+                         MS_FileType = stored_args['MS_FileType'], 
+                         Annotation_FilePath = stored_args['Annot_File'],
+                         logger = logger, 
+                         ingui = True, 
+                         longtable = stored_args['Long_Table'], 
+                         longtable_annot = stored_args['Long_Table_Annot'])
+
+    #Initiate the pdf report file
+    PDFReport = MSDataReport_PDF(output_directory = stored_args['Output_Directory'], 
+                                 input_file_path = MS_FilePath, 
+                                 logger = logger, 
+                                 ingui = True,
+                                 testing = testing)
+
+    #Generate the parameters report
+    Parameters_df = get_Parameters_df(stored_args = stored_args,
+                                      MS_FilePath = MS_FilePath)
+    PDFReport.create_parameters_report(Parameters_df)
+
+    if stored_args['Transpose_Results']:
+        result_name = "TransposeResults"
+    else:
+        result_name = "Results"
+
+    if not testing:
+        #Set up the file writing configuration for Excel, or csv ...
+        if stored_args['Output_Format'] == "Excel":
+            DfOutput = MSDataOutput_Excel(stored_args['Output_Directory'], MS_FilePath, 
+                                          result_name = result_name ,
+                                          logger = logger, ingui = True)
+        elif stored_args['Output_Format'] == "csv":
+            DfOutput = MSDataOutput_csv(stored_args['Output_Directory'], MS_FilePath, 
+                                        result_name = result_name ,
+                                        logger = logger, ingui = True)
+    if not testing:
+        DfOutput.start_writer()
+
+    #Use during unit testing
+    file_data = []
+    sheet_name = []
+
+    if len(no_need_full_data_output_options) > 0:
+        #We extract the data of all output options directly from the file in one pass
+        Output_df_dict = MyData.get_tables_from_Input_Data(no_need_full_data_output_options,
+                                                           allow_multiple_istd=False)
+        for output_option in no_need_full_data_output_options:
+            Output_df = Output_df_dict[output_option]
+
+            #If not doing unit testing,
+            #Output the Output_df results
+            if not testing:
+                DfOutput.df_to_file(output_option,Output_df,
+                                    transpose=stored_args['Transpose_Results'],
+                                    allow_multiple_istd=False)
+
+            #If doing unit testing, output the Output_df
+            #in the file_data list
+            if testing:
+                file_data.append(Output_df)
+                sheet_name.append(output_option)
+
+    if len(need_full_data_output_options) > 0:
+        for output_option in need_full_data_output_options:
+            if output_option == 'normArea by ISTD':
+                # Perform normalisation using ISTD
+                [norm_Area_df,ISTD_Area,ISTD_map_df,ISTD_Report] = MyData.get_Normalised_Area(output_option,stored_args['Annot_File'],
+                                                                                              allow_multiple_istd = stored_args['Allow_Multiple_ISTD'])
+
+                # Output the normalised area results
+
+                # If testing check box is checked and not doing unit testing, 
+                # output the ISTD_Area results
+                if stored_args['Testing'] and not testing:
+                    DfOutput.df_to_file("ISTD_Area",ISTD_Area,
+                                        transpose=stored_args['Transpose_Results'],
+                                        allow_multiple_istd=stored_args['Allow_Multiple_ISTD']
+                                       )
+
+                # If testing check box is checked and doing unit testing, 
+                # output the ISTD_Area in the file_data list
+                if stored_args['Testing'] and testing:
+                    file_data.append(ISTD_Area)
+                    sheet_name.append("ISTD_Area")
+
+                # If not doing unit testing,
+                # output the normalised area and transition annotation results
+                if not testing:
+                    DfOutput.df_to_file("Transition_Name_Annot",ISTD_map_df)
+                    DfOutput.df_to_file("normArea_by_ISTD",norm_Area_df,
+                                        transpose=stored_args['Transpose_Results'],
+                                        allow_multiple_istd=stored_args['Allow_Multiple_ISTD'])
+
+                # If doing unit testing, output the normalised area and 
+                # transition annotation results in the file_data list
+                if testing:
+                    file_data.extend([ISTD_map_df,norm_Area_df])
+                    sheet_name.extend(["Transition_Name_Annot", "normArea_by_ISTD"])
+           
+                # Generate the ISTD normalisation report
+                PDFReport.create_ISTD_report(ISTD_Report)
+
+            elif output_option == 'normConc by ISTD':
+                # Perform concentration need_full_data
+                [norm_Conc_df,ISTD_Conc_df,ISTD_Samp_Ratio_df,Sample_Annot_df] = MyData.get_Analyte_Concentration(output_option,stored_args['Annot_File'],
+                                                                                                                  allow_multiple_istd=stored_args['Allow_Multiple_ISTD'],
+                                                                                                                  output_intermediate_data = stored_args['Testing'])
+
+                # Remove the column "Merge_Status" as it is not relevant
+                # Reorder the column such that "Concentration_Unit" is at the last column
+                Sample_Annot_df = Sample_Annot_df[["Data_File_Name", "Sample_Name",
+                                                   "Sample_Amount", "Sample_Amount_Unit",
+                                                   "ISTD_Mixture_Volume_[uL]", "ISTD_to_Sample_Amount_Ratio",
+                                                   "Concentration_Unit"]]
+
+                # Output the concentration results
+
+                # If testing check box is checked and not doing unit testing, 
+                # output the ISTD_Conc and ISTD_to_Samp_Amt_Ratio results
+                if stored_args['Testing'] and not testing:
+                    DfOutput.df_to_file("ISTD_Conc",ISTD_Conc_df,
+                                        transpose=stored_args['Transpose_Results'],
+                                        allow_multiple_istd=stored_args['Allow_Multiple_ISTD'])
+                    DfOutput.df_to_file("ISTD_to_Samp_Amt_Ratio",ISTD_Samp_Ratio_df,
+                                        transpose=stored_args['Transpose_Results'],
+                                        allow_multiple_istd=stored_args['Allow_Multiple_ISTD'])
+
+                # If testing check box is checked and doing unit testing, 
+                # output the ISTD_Conc and ISTD_to_Samp_Amt_Ratio in the file_data list
+                if stored_args['Testing'] and testing:
+                    file_data.extend([ISTD_Conc_df,ISTD_Samp_Ratio_df])
+                    sheet_name.extend(["ISTD_Conc", "ISTD_to_Samp_Amt_Ratio"])
+
+                # If not doing unit testing,
+                # Output the concentration data and sample annotation results
+                if not testing:
+                    DfOutput.df_to_file("Sample_Annot",Sample_Annot_df)
+                    DfOutput.df_to_file("normConc_by_ISTD",norm_Conc_df,
+                                        transpose=stored_args['Transpose_Results'],
+                                        allow_multiple_istd=stored_args['Allow_Multiple_ISTD'])
+
+                # If doing unit testing, output the Sample_Annot_df and
+                # norm_Conc_df results in the file_data list
+                if testing:
+                    file_data.extend([Sample_Annot_df, norm_Conc_df])
+                    sheet_name.extend(["Sample_Annot", "normConc_by_ISTD"])
+
+    #End the writing configuration for Excel, ...
+    if stored_args['Output_Format'] == "Excel" and not testing:
+        DfOutput.end_writer()
+
+    #Output the report to a pdf file
+    if not testing:
+        PDFReport.output_to_PDF()
+
+    #Output the LongTable Data Table in another csv or excel sheet
+    if stored_args['Long_Table']:
+        #The csv file is written a few rows at a time without creating the whole Long_Table_df
+        if testing or stored_args['Output_Format'] == "Excel":
+            Long_Table_df = MyData.get_Long_Table(allow_multiple_istd=stored_args['Allow_Multiple_ISTD'],
+                                                  concatenation_type = None)
+
+        result_name = "Long_Table" 
+        if stored_args['Long_Table_Annot']:
+            result_name = "Long_Table_with_Annot"
+
+        #If doing unit testing, output the Long_Table_df
+        #in the file_data list
+        if testing:
+            file_data.append(Long_Table_df)
+            sheet_name.append("Long_Table")
+
+        if not testing:
+            #Set up the file writing configuration for Excel, or csv ...
+            if stored_args['Output_Format'] == "Excel":
+                DfLongOutput = MSDataOutput_Excel(stored_args['Output_Directory'], MS_FilePath, 
+                                                  result_name = result_name ,logger=logger, ingui=True)
+            elif stored_args['Output_Format'] == "csv":
+                DfLongOutput = MSDataOutput_csv(stored_args['Output_Directory'], MS_FilePath, 
+                                                result_name = "" ,logger=logger, ingui=True)
+            DfLongOutput.start_writer()
+            if stored_args['Output_Format'] == "Excel":
+                DfLongOutput.df_to_file("Long_Table",Long_Table_df)
+            elif stored_args['Output_Format'] == "csv":
+                DfLongOutput.df_chunks_to_file("Long_Table",
+                                               MyData.iter_Long_Table(allow_multiple_istd=stored_args['Allow_Multiple_ISTD'],
+                                                                      concatenation_type = None))
+
+            if stored_args['Output_Format'] == "Excel" :
+                DfLongOutput.end_writer()
+
+    #The parsed input file is no longer needed
+    MyData.release_InputData_cache()
+
+    return([file_data, sheet_name])
 
 def no_concatenate_workflow(stored_args, logger=None, testing = False):
 
@@ -203,206 +509,136 @@ def no_concatenate_workflow(stored_args, logger=None, testing = False):
                    ]) and 'Area' not in no_need_full_data_output_options:
                 no_need_full_data_output_options.append("Area")
 
+    number_of_workers = MSParallel.get_number_of_workers(stored_args)
+
+    if number_of_workers > 1:
+        # The input files are independent, process them in a pool of workers
+        if logger:
+            logger.info("Working on %s input files with %s workers", str(len(stored_args['MS_Files'])), str(number_of_workers))
+        [results, failed_files] = MSParallel.process_files_in_parallel(no_concatenate_one_file, 
+                                                                      stored_args['MS_Files'],
+                                                                      number_of_workers,
+                                                                      logger = logger,
+                                                                      stored_args = stored_args,
+                                                                      no_need_full_data_output_options = no_need_full_data_output_options,
+                                                                      need_full_data_output_options = need_full_data_output_options,
+                                                                      testing = testing)
+
+        # Inform the user of the input files that failed
+        MSParallel.report_failed_files(failed_files, logger = logger, ingui = True)
+
+        #Use during unit testing
+        if testing:
+            return([results, list(stored_args['MS_Files'])])
+        return
+
     # We do this for every mass hunter file output
     # MS_Files is no longer a long string of paths separated by ;, 
     # we split them into a list
     for MS_FilePath in stored_args['MS_Files']:
 
-        if not testing:
-            print("Working on " + MS_FilePath,flush=True)
-        if logger:
-            logger.info("Working on " + MS_FilePath)
-
-        MyData = MS_Analysis(MS_FilePath = MS_FilePath, 
-                             MS_FileType = stored_args['MS_FileType'], 
-                             Annotation_FilePath = stored_args['Annot_File'],
-                             logger = logger, 
-                             ingui = True, 
-                             longtable = stored_args['Long_Table'], 
-                             longtable_annot = stored_args['Long_Table_Annot'])
-
-        #Initiate the pdf report file
-        PDFReport = MSDataReport_PDF(output_directory = stored_args['Output_Directory'], 
-                                     input_file_path = MS_FilePath, 
-                                     logger = logger, 
-                                     ingui = True,
-                                     testing = testing)
-
-        #Generate the parameters report
-        Parameters_df = get_Parameters_df(stored_args = stored_args,
-                                          MS_FilePath = MS_FilePath)
-        PDFReport.create_parameters_report(Parameters_df)
-
-        if stored_args['Transpose_Results']:
-            result_name = "TransposeResults"
-        else:
-            result_name = "Results"
-
-        if not testing:
-            #Set up the file writing configuration for Excel, or csv ...
-            if stored_args['Output_Format'] == "Excel":
-                DfOutput = MSDataOutput_Excel(stored_args['Output_Directory'], MS_FilePath, 
-                                              result_name = result_name ,
-                                              logger = logger, ingui = True)
-            elif stored_args['Output_Format'] == "csv":
-                DfOutput = MSDataOutput_csv(stored_args['Output_Directory'], MS_FilePath, 
-                                            result_name = result_name ,
-                                            logger = logger, ingui = True)
-        if not testing:
-            DfOutput.start_writer()
+        [file_data, sheet_name] = no_concatenate_one_file(MS_FilePath,
+                                                          stored_args = stored_args,
+                                                          no_need_full_data_output_options = no_need_full_data_output_options,
+                                                          need_full_data_output_options = need_full_data_output_options,
+                                                          logger = logger,
+                                                          testing = testing)
 
         #Use during unit testing
-        file_data = []
-        sheet_name = []
+        if testing:
+            file_name.append(MS_FilePath)
+            file_data_list.append([file_data,sheet_name])
 
-        if len(no_need_full_data_output_options) > 0:
-            for output_option in no_need_full_data_output_options:
-                #We extract the data directly from the file and output accordingly
-                Output_df = MyData.get_from_Input_Data(output_option,
-                                                       allow_multiple_istd=False)
+    #Use during unit testing
+    if testing:
+        return([file_data_list, file_name])
 
-                #If not doing unit testing,
-                #Output the Output_df results
-                if not testing:
-                    DfOutput.df_to_file(output_option,Output_df,
-                                        transpose=stored_args['Transpose_Results'],
-                                        allow_multiple_istd=False)
+def extract_one_file_for_concatenation(MS_FilePath, stored_args,
+                                       no_need_full_data_output_options,
+                                       logger=None):
+    """To extract the output options that do not require calculation from one input file before concatenation
 
-                #If doing unit testing, output the Output_df
-                #in the file_data list
-                if testing:
-                    file_data.append(Output_df)
-                    sheet_name.append(output_option)
-
-        if len(need_full_data_output_options) > 0:
-            for output_option in need_full_data_output_options:
-                if output_option == 'normArea by ISTD':
-                    # Perform normalisation using ISTD
-                    [norm_Area_df,ISTD_Area,ISTD_map_df,ISTD_Report] = MyData.get_Normalised_Area(output_option,stored_args['Annot_File'],
-                                                                                                  allow_multiple_istd = stored_args['Allow_Multiple_ISTD'])
-
-                    # Output the normalised area results
-
-                    # If testing check box is checked and not doing unit testing, 
-                    # output the ISTD_Area results
-                    if stored_args['Testing'] and not testing:
-                        DfOutput.df_to_file("ISTD_Area",ISTD_Area,
-                                            transpose=stored_args['Transpose_Results'],
-                                            allow_multiple_istd=stored_args['Allow_Multiple_ISTD']
-                                           )
-
-                    # If testing check box is checked and doing unit testing, 
-                    # output the ISTD_Area in the file_data list
-                    if stored_args['Testing'] and testing:
-                        file_data.append(ISTD_Area)
-                        sheet_name.append("ISTD_Area")
-
-                    # If not doing unit testing,
-                    # output the normalised area and transition annotation results
-                    if not testing:
-                        DfOutput.df_to_file("Transition_Name_Annot",ISTD_map_df)
-                        DfOutput.df_to_file("normArea_by_ISTD",norm_Area_df,
-                                            transpose=stored_args['Transpose_Results'],
-                                            allow_multiple_istd=stored_args['Allow_Multiple_ISTD'])
-
-                    # If doing unit testing, output the normalised area and 
-                    # transition annotation results in the file_data list
-                    if testing:
-                        file_data.extend([ISTD_map_df,norm_Area_df])
-                        sheet_name.extend(["Transition_Name_Annot", "normArea_by_ISTD"])
-               
-                    # Generate the ISTD normalisation report
-                    PDFReport.create_ISTD_report(ISTD_Report)
-
-                elif output_option == 'normConc by ISTD':
-                    # Perform concentration need_full_data
-                    [norm_Conc_df,ISTD_Conc_df,ISTD_Samp_Ratio_df,Sample_Annot_df] = MyData.get_Analyte_Concentration(output_option,stored_args['Annot_File'],
-                                                                                                                      allow_multiple_istd=stored_args['Allow_Multiple_ISTD'])
-
-                    # Remove the column "Merge_Status" as it is not relevant
-                    # Reorder the column such that "Concentration_Unit" is at the last column
-                    Sample_Annot_df = Sample_Annot_df[["Data_File_Name", "Sample_Name",
-                                                       "Sample_Amount", "Sample_Amount_Unit",
-                                                       "ISTD_Mixture_Volume_[uL]", "ISTD_to_Sample_Amount_Ratio",
-                                                       "Concentration_Unit"]]
-
-                    # Output the concentration results
-
-                    # If testing check box is checked and not doing unit testing, 
-                    # output the ISTD_Conc and ISTD_to_Samp_Amt_Ratio results
-                    if stored_args['Testing'] and not testing:
-                        DfOutput.df_to_file("ISTD_Conc",ISTD_Conc_df,
-                                            transpose=stored_args['Transpose_Results'],
-                                            allow_multiple_istd=stored_args['Allow_Multiple_ISTD'])
-                        DfOutput.df_to_file("ISTD_to_Samp_Amt_Ratio",ISTD_Samp_Ratio_df,
-                                            transpose=stored_args['Transpose_Results'],
-                                            allow_multiple_istd=stored_args['Allow_Multiple_ISTD'])
-
-                    # If testing check box is checked and doing unit testing, 
-                    # output the ISTD_Conc and ISTD_to_Samp_Amt_Ratio in the file_data list
-                    if stored_args['Testing'] and testing:
-                        file_data.extend([ISTD_Conc_df,ISTD_Samp_Ratio_df])
-                        sheet_name.extend(["ISTD_Conc", "ISTD_to_Samp_Amt_Ratio"])
-
-                    # If not doing unit testing,
-                    # Output the concentration data and sample annotation results
-                    if not testing:
-                        DfOutput.df_to_file("Sample_Annot",Sample_Annot_df)
-                        DfOutput.df_to_file("normConc_by_ISTD",norm_Conc_df,
-                                            transpose=stored_args['Transpose_Results'],
-                                            allow_multiple_istd=stored_args['Allow_Multiple_ISTD'])
-
-                    # If doing unit testing, output the Sample_Annot_df and
-                    # norm_Conc_df results in the file_data list
-                    if testing:
-                        file_data.extend([Sample_Annot_df, norm_Conc_df])
-                        sheet_name.extend(["Sample_Annot", "normConc_by_ISTD"])
-
-        #End the writing configuration for Excel, ...
-        if stored_args['Output_Format'] == "Excel" and not testing:
-            DfOutput.end_writer()
+    Args:
+        MS_FilePath (str): The file path to the MRM transition name file.
+        stored_args (dict): A dictionary storing the input parameters. The dictionary is created in MSParser
+        no_need_full_data_output_options (list): Output options that are extracted directly from the input file like Area, RT
+        logger (object): logger object created by start_logger in MSOrganiser
 
-        #Output the report to a pdf file
-        if not testing:
-            PDFReport.output_to_PDF()
+    Returns:
+        (list): list containing:
 
-        #Output the LongTable Data Table in another csv or excel sheet
-        if stored_args['Long_Table']:
-            Long_Table_df = MyData.get_Long_Table(allow_multiple_istd=stored_args['Allow_Multiple_ISTD'],
-                                                  concatenation_type = None)
+            * one_file_df_list (list): A list of data frames, one for each output option
+            * one_file_df_sheet_name (list): A list of sheet names of the data frames
 
-            result_name = "Long_Table" 
-            if stored_args['Long_Table_Annot']:
-                result_name = "Long_Table_with_Annot"
+    Note:
+        The Long_Table is not created here. It is created from the concatenated data frames by iter_concatenated_Long_Table.
+    """
 
-            #If doing unit testing, output the Long_Table_df
-            #in the file_data list
-            if testing:
-                file_data.append(Long_Table_df)
-                sheet_name.append("Long_Table")
+    #Keep a snapshot of the annotation file for later runs
+    set_annotation_snapshot(stored_args)
 
-            if not testing:
-                #Set up the file writing configuration for Excel, or csv ...
-                if stored_args['Output_Format'] == "Excel":
-                    DfLongOutput = MSDataOutput_Excel(stored_args['Output_Directory'], MS_FilePath, 
-                                                      result_name = result_name ,logger=logger, ingui=True)
-                elif stored_args['Output_Format'] == "csv":
-                    DfLongOutput = MSDataOutput_csv(stored_args['Output_Directory'], MS_FilePath, 
-                                                    result_name = "" ,logger=logger, ingui=True)
-                DfLongOutput.start_writer()
-                DfLongOutput.df_to_file("Long_Table",Long_Table_df)
+    MyNoCalcData = MS_Analysis(MS_FilePath = MS_FilePath, 
+                               MS_FileType = stored_args['MS_FileType'], 
+                               Annotation_FilePath = stored_args['Annot_File'],
+                               logger = logger, 
+                               ingui = True, 
+                               longtable = False, 
+                               longtable_annot = stored_args['Long_Table_Annot'])
 
-                if stored_args['Output_Format'] == "Excel" :
-                    DfLongOutput.end_writer()
+    #Initialise a list of df and sheet name
+    one_file_df_list = []
+    one_file_df_sheet_name = []
 
-        #Use during unit testing
-        if testing:
-            file_name.append(MS_FilePath)
-            file_data_list.append([file_data,sheet_name])
+    #We extract the data of all output options directly from the file in one pass
+    Output_df_dict = MyNoCalcData.get_tables_from_Input_Data(no_need_full_data_output_options,
+                                                             allow_multiple_istd = False)
+    for output_option in no_need_full_data_output_options:
+        #Put them in the list accordingly
+        Output_df = Output_df_dict[output_option]
+        one_file_df_list.extend([Output_df])
+        one_file_df_sheet_name.extend([output_option])
 
-    #Use during unit testing
-    if testing:
-        return([file_data_list, file_name])
+    #The parsed input file is no longer needed
+    MyNoCalcData.release_InputData_cache()
+
+    return([one_file_df_list, one_file_df_sheet_name])
+
+def extract_files_for_concatenation(stored_args, no_need_full_data_output_options, logger=None):
+    """To extract the output options that do not require calculation from every input file before concatenation
+
+    Args:
+        stored_args (dict): A dictionary storing the input parameters. The dictionary is created in MSParser
+        no_need_full_data_output_options (list): Output options that are extracted directly from the input file like Area, RT
+        logger (object): logger object created by start_logger in MSOrganiser
+
+    Returns:
+        extracted_files (list): A list of [one_file_df_list, one_file_df_sheet_name], in the same order as stored_args['MS_Files']
+
+    Note:
+        When Number_of_Workers is more than 1, the input files are read in a pool of workers.
+    """
+
+    number_of_workers = MSParallel.get_number_of_workers(stored_args)
+
+    if number_of_workers > 1:
+        if logger:
+            logger.info("Reading %s input files with %s workers", str(len(stored_args['MS_Files'])), str(number_of_workers))
+        [extracted_files, failed_files] = MSParallel.process_files_in_parallel(extract_one_file_for_concatenation,
+                                                                              stored_args['MS_Files'],
+                                                                              number_of_workers,
+                                                                              logger = logger,
+                                                                              stored_args = stored_args,
+                                                                              no_need_full_data_output_options = no_need_full_data_output_options)
+        # Concatenation needs every input file, stop if any of them failed
+        MSParallel.report_failed_files(failed_files, logger = logger, ingui = True)
+        return(extracted_files)
+
+    extracted_files = []
+    for MS_FilePath in stored_args['MS_Files']:
+        extracted_files.append(extract_one_file_for_concatenation(MS_FilePath, stored_args,
+                                                                  no_need_full_data_output_options,
+                                                                  logger = logger))
+    return(extracted_files)
 
 def concatenate_along_rows_workflow(stored_args, logger=None, testing = False):
 
@@ -442,84 +678,60 @@ def concatenate_along_rows_workflow(stored_args, logger=None, testing = False):
     concatenate_df_list = []
     concatenate_df_sheet_name = []
 
+    #The Long_Table is created from the concatenated data frames, one input file at a time
+    Long_Table_builder = ConcatenatedLongTableBuilder(concatenation_type = "rows")
+
     #We first need to concatenate Output Options that do not require full data like
     #Area, RT, etc
     if(len(no_need_full_data_output_options) > 0):
 
         #We do this for every mass hunter file output
         #MS_Files is no longer a long string of paths separated by ;, we split them into a list
-        for MS_FilePath in stored_args['MS_Files']:
-
-            MyNoCalcData = MS_Analysis(MS_FilePath = MS_FilePath, 
-                                       MS_FileType = stored_args['MS_FileType'], 
-                                       Annotation_FilePath = stored_args['Annot_File'],
-                                       logger = logger, 
-                                       ingui = True, 
-                                       longtable = stored_args['Long_Table'], 
-                                       longtable_annot = stored_args['Long_Table_Annot'])
-
-            #Initialise a list of df and sheet name
-            one_file_df_list = []
-            one_file_df_sheet_name = []
-
-            for output_option in no_need_full_data_output_options:
-                #We extract the data directly from the file and put them in the list accordingly
-                Output_df = MyNoCalcData.get_from_Input_Data(output_option,
-                                                             allow_multiple_istd= False)
-                one_file_df_list.extend([Output_df])
-                one_file_df_sheet_name.extend([output_option])
-
-            #Output the LongTable Data Table in another csv or excel sheet
-            if stored_args['Long_Table']:
-                Long_Table_df = MyNoCalcData.get_Long_Table(allow_multiple_istd=stored_args['Allow_Multiple_ISTD'],
-                                                            concatenation_type = None)
-                one_file_df_list.extend([Long_Table_df])
-                one_file_df_sheet_name.extend(["Long_Table"])
-
-            #After creating the one_file_df_list and one_file_df_sheet_name
-            #Start to concatenate when we reach the second file
-            if len(concatenate_df_list) == 0:
-                concatenate_df_list = one_file_df_list
+        concatenation_builder_list = []
+        extracted_files = extract_files_for_concatenation(stored_args,
+                                                          no_need_full_data_output_options,
+                                                          logger = logger)
+        for MS_FilePath, [one_file_df_list, one_file_df_sheet_name] in zip(stored_args['MS_Files'], extracted_files):
+
+            #Create a concatenation builder for each sheet when we reach the first file
+            if len(concatenation_builder_list) == 0:
                 concatenate_df_sheet_name = one_file_df_sheet_name
-            else:
-                #When we have the second file onwards
-                for i in range(len(one_file_df_list)):
-                    #Concatenate Row Wise all df except those indicated
-                    if not one_file_df_sheet_name[i] in ["Transition_Name_Annot"]:
-                        concatenate_df_list[i] = pd.concat([concatenate_df_list[i], one_file_df_list[i]], 
-                                                           ignore_index=True, 
-                                                           sort=False, 
-                                                           axis = 0)
-
-    # We check if the concatenated data is valid without
-    # any duplicated columns and sample names, if there are, we should not proceed to calculation
-    # and inform the user of this issue.
-    for output_option in no_need_full_data_output_options:
-        # Get the data frame that correspond to the column_name like
-        # "Area","RT","FWHM","S/N" etc
-        output_option_index = concatenate_df_sheet_name.index(output_option)
-        concatenated_data = concatenate_df_list[output_option_index]
-        MSDuplicateCheck.check_duplicated_columns_in_wide_data(concatenated_data, 
-                                                             "row concatenated " + output_option,
-                                                             logger = logger, ingui = True,
-                                                             allow_multiple_istd = False)
-        MSDuplicateCheck.check_duplicated_sample_names_in_wide_data(concatenated_data, 
-                                                                  "row concatenated " + output_option,
-                                                                  logger = None, ingui = True,
-                                                                  allow_multiple_istd = False)
+                for sheet_name in one_file_df_sheet_name:
+                    # We check if the concatenated data is valid without
+                    # any duplicated columns and sample names, if there are, we should not proceed to calculation
+                    # and inform the user of this issue.
+                    concatenation_builder_list.append(ConcatenationBuilder(concatenation_type = "rows",
+                                                                           output_option = "row concatenated " + sheet_name,
+                                                                           check_duplicates = sheet_name in no_need_full_data_output_options,
+                                                                           logger = logger, ingui = True))
+
+            #Concatenate Row Wise all df
+            for i in range(len(one_file_df_list)):
+                concatenation_builder_list[i].add(one_file_df_list[i], source = os.path.basename(MS_FilePath))
+            Long_Table_builder.add_input_file(one_file_df_list)
+
+        #The concatenated data frames are created once all input files are collected
+        concatenate_df_list = [concatenation_builder.get_concatenated_df()
+                               for concatenation_builder in concatenation_builder_list]
+        for i in range(len(concatenate_df_list)):
+            Long_Table_builder.add_concatenated_df(concatenate_df_list[i], concatenate_df_sheet_name[i])
 
     #We now create data frame of output options that require the full data like
     #normArea by ISTD, normConc by ISTD, etc
 
     if(len(need_full_data_output_options) > 0):
 
+        #The concatenated Area extracted above is used for normalisation, so the input files are not read again
+        concatenate_Area_df = concatenate_df_list[concatenate_df_sheet_name.index("Area")]
+
         MyCalcData = MS_Analysis(MS_FilePaths = stored_args['MS_Files'], 
                                  MS_FileType = stored_args['MS_FileType'], 
                                  Annotation_FilePath = stored_args['Annot_File'],
                                  logger = logger, 
                                  ingui = True, 
-                                 longtable = stored_args['Long_Table'], 
-                                 longtable_annot = stored_args['Long_Table_Annot'])
+                                 longtable = False, 
+                                 longtable_annot = stored_args['Long_Table_Annot'],
+                                 number_of_workers = MSParallel.get_number_of_workers(stored_args))
 
 
         #print("Working on Output options that needs to be calculated",flush=True)
@@ -530,7 +742,8 @@ def concatenate_along_rows_workflow(stored_args, logger=None, testing = False):
                 [norm_Area_df,ISTD_Area,ISTD_map_df,ISTD_Report] = MyCalcData.get_Normalised_Area(output_option,stored_args['Annot_File'],
                                                                                                   allow_multiple_istd = stored_args['Allow_Multiple_ISTD'],
                                                                                                   using_multiple_input_files = True,
-                                                                                                  concatenation_type = "rows")
+                                                                                                  concatenation_type = "rows",
+                                                                                                  Area_df = concatenate_Area_df)
 
                 #If testing, output the ISTD_Area results in the concatenate_df list
                 if stored_args['Testing']:
@@ -540,6 +753,8 @@ def concatenate_along_rows_workflow(stored_args, logger=None, testing = False):
                 #Put the normalised area and transition annotation results in the concatenate_df list
                 concatenate_df_list.extend([ISTD_map_df,norm_Area_df])
                 concatenate_df_sheet_name.extend(["Transition_Name_Annot","normArea_by_ISTD"])
+                Long_Table_builder.add_calculated_df(norm_Area_df, "normArea",
+                                                     allow_multiple_istd = stored_args['Allow_Multiple_ISTD'])
 
                 #Generate the ISTD normalisation report
                 PDFReport.create_ISTD_report(ISTD_Report)
@@ -549,7 +764,9 @@ def concatenate_along_rows_workflow(stored_args, logger=None, testing = False):
                 [norm_Conc_df,ISTD_Conc_df,ISTD_Samp_Ratio_df,Sample_Annot_df] = MyCalcData.get_Analyte_Concentration(output_option,stored_args['Annot_File'],
                                                                                                                       allow_multiple_istd=stored_args['Allow_Multiple_ISTD'],
                                                                                                                       using_multiple_input_files = True,
-                                                                                                                      concatenation_type = "rows")
+                                                                                                                      concatenation_type = "rows",
+                                                                                                                      output_intermediate_data = stored_args['Testing'],
+                                                                                                                      Area_df = concatenate_Area_df)
 
                 #Remove the column "Merge_Status" as it is not relevant
                 #Reorder the column such that "Concentration_Unit" is at the last column
@@ -566,29 +783,13 @@ def concatenate_along_rows_workflow(stored_args, logger=None, testing = False):
                 #Output the concentration data and sample annotation results in the list
                 concatenate_df_list.extend([Sample_Annot_df,norm_Conc_df])
                 concatenate_df_sheet_name.extend(["Sample_Annot","normConc_by_ISTD"])
+                Long_Table_builder.add_calculated_df(norm_Conc_df, "normConc",
+                                                     allow_multiple_istd = stored_args['Allow_Multiple_ISTD'])
 
-        #Merge the Long_Table created from calculation_columns to the Long_Table created from no_need_full_data_columns
-        if stored_args['Long_Table']:
-            for index, output_option in enumerate(need_full_data_output_options):
-                if output_option == 'normArea by ISTD':
-                    need_full_data_output_options[index] = 'normArea'
-                if output_option == 'normConc by ISTD':
-                    need_full_data_output_options[index] = 'normConc'
-            Long_Table_df = MyCalcData.get_Long_Table(allow_multiple_istd=stored_args['Allow_Multiple_ISTD'],
-                                                      concatenation_type = "rows")
-            if "Long_Table" in concatenate_df_sheet_name:
-                Long_Table_index = concatenate_df_sheet_name.index("Long_Table")
-                common_columns = list(set(concatenate_df_list[Long_Table_index].columns).intersection(Long_Table_df.columns))
-                front_columns = [x for x in Long_Table_df.columns if x not in need_full_data_output_options]
-                concatenate_df_list[Long_Table_index] = pd.merge(concatenate_df_list[Long_Table_index], 
-                                                                 Long_Table_df,
-                                                                 how='inner',
-                                                                 on = common_columns)
-                col_order = front_columns + no_need_full_data_output_options + need_full_data_output_options
-                concatenate_df_list[Long_Table_index] = concatenate_df_list[Long_Table_index][col_order]
-            else:
-                concatenate_df_list.extend([Long_Table_df])
-                concatenate_df_sheet_name.extend(["Long_Table"])
+    #The Long_Table is only created when it is written by output_concatenated_long_table
+    if stored_args['Long_Table']:
+        concatenate_df_list.extend([Long_Table_builder])
+        concatenate_df_sheet_name.extend(["Long_Table"])
 
     return([PDFReport, concatenate_df_list, concatenate_df_sheet_name])
 
@@ -629,6 +830,9 @@ def concatenate_along_columns_workflow(stored_args, logger=None, testing = False
     concatenate_df_list = []
     concatenate_df_sheet_name = []
 
+    #The Long_Table is created from the concatenated data frames, one input file at a time
+    Long_Table_builder = ConcatenatedLongTableBuilder(concatenation_type = "columns")
+
     #We first need to concatenate Output Options that do not require full data like
     #Area, RT, etc
     if(len(no_need_full_data_output_options) > 0):
@@ -636,85 +840,51 @@ def concatenate_along_columns_workflow(stored_args, logger=None, testing = False
 
         #We do this for every mass hunter file output
         #MS_Files is no longer a long string of paths separated by ;, we split them into a list
-        for MS_FilePath in stored_args['MS_Files']:
-
-            MyNoCalcData = MS_Analysis(MS_FilePath = MS_FilePath, 
-                                       MS_FileType = stored_args['MS_FileType'], 
-                                       Annotation_FilePath = stored_args['Annot_File'],
-                                       logger = logger, 
-                                       ingui = True, 
-                                       longtable = stored_args['Long_Table'], 
-                                       longtable_annot = stored_args['Long_Table_Annot'])
-
-            #Initialise a list of df and sheet name
-            one_file_df_list = []
-            one_file_df_sheet_name = []
-
-            for output_option in no_need_full_data_output_options:
-                #We extract the data directly from the file and put them in the list accordingly
-                Output_df = MyNoCalcData.get_from_Input_Data(output_option,
-                                                             allow_multiple_istd = False)
-                one_file_df_list.extend([Output_df])
-                one_file_df_sheet_name.extend([output_option])
-
-            #Output the LongTable Data Table in another csv or excel sheet
-            if stored_args['Long_Table']:
-                Long_Table_df = MyNoCalcData.get_Long_Table(allow_multiple_istd=stored_args['Allow_Multiple_ISTD'],
-                                                            concatenation_type = None)
-                one_file_df_list.extend([Long_Table_df])
-                one_file_df_sheet_name.extend(["Long_Table"])
-
-            #After creating the one_file_df_list and one_file_df_sheet_name
-            #Start to concatenate when we reach the second file
-            if len(concatenate_df_list) == 0:
-                concatenate_df_list = one_file_df_list
+        concatenation_builder_list = []
+        extracted_files = extract_files_for_concatenation(stored_args,
+                                                          no_need_full_data_output_options,
+                                                          logger = logger)
+        for MS_FilePath, [one_file_df_list, one_file_df_sheet_name] in zip(stored_args['MS_Files'], extracted_files):
+
+            #Create a concatenation builder for each sheet when we reach the first file
+            if len(concatenation_builder_list) == 0:
                 concatenate_df_sheet_name = one_file_df_sheet_name
-            else:
-                #When we have the second file onwards
-                for i in range(len(one_file_df_list)):
-                    #Concantenate Row Wise
-                    if one_file_df_sheet_name[i] in ["Long_Table"]:
-                        concatenate_df_list[i] = pd.concat([concatenate_df_list[i], one_file_df_list[i]], 
-                                                           ignore_index=True,
-                                                           sort=False, 
-                                                           axis = 0)
-                    else:
-                        #Concantenate Column Wise
-                        #Remove the Sample_Name column
-                            appending_df = one_file_df_list[i].loc[:, one_file_df_list[i].columns != 'Sample_Name']
-                            concatenate_df_list[i] = pd.concat([concatenate_df_list[i], appending_df], 
-                                                               ignore_index=False, 
-                                                               sort=False, 
-                                                               axis = 1)
-
-        # We check if the concatenated data is valid without
-        # any duplicated columns and sample names, if there are, we should not proceed to calculation
-        # and inform the user of this issue.
-        for output_option in no_need_full_data_output_options:
-            # Get the data frame that correspond to the column_name like
-            # "Area","RT","FWHM","S/N" etc
-            output_option_index = concatenate_df_sheet_name.index(output_option)
-            concatenated_data = concatenate_df_list[output_option_index]
-            MSDuplicateCheck.check_duplicated_columns_in_wide_data(concatenated_data, 
-                                                                 "column concatenated " + output_option,
-                                                                 logger = logger, ingui = True,
-                                                                 allow_multiple_istd = False)
-            MSDuplicateCheck.check_duplicated_sample_names_in_wide_data(concatenated_data, 
-                                                                      "column concatenated " + output_option,
-                                                                      logger = None, ingui = True,
-                                                                      allow_multiple_istd = False)
+                for sheet_name in one_file_df_sheet_name:
+                    # We check if the concatenated data is valid without
+                    # any duplicated columns and sample names, if there are, we should not proceed to calculation
+                    # and inform the user of this issue.
+                    #Concantenate Column Wise
+                    concatenation_builder_list.append(ConcatenationBuilder(concatenation_type = "columns",
+                                                                           output_option = "column concatenated " + sheet_name,
+                                                                           check_duplicates = sheet_name in no_need_full_data_output_options,
+                                                                           logger = logger, ingui = True))
+
+            for i in range(len(one_file_df_list)):
+                concatenation_builder_list[i].add(one_file_df_list[i], source = os.path.basename(MS_FilePath))
+            Long_Table_builder.add_input_file(one_file_df_list)
+
+        #The concatenated data frames are created once all input files are collected
+        concatenate_df_list = [concatenation_builder.get_concatenated_df()
+                               for concatenation_builder in concatenation_builder_list]
+        for i in range(len(concatenate_df_list)):
+            Long_Table_builder.add_concatenated_df(concatenate_df_list[i], concatenate_df_sheet_name[i])
+
     #We now create data frame of output options that require the full data like
     #normArea by ISTD, normConc by ISTD, etc
 
     if(len(need_full_data_output_options) > 0):
 
+        #The concatenated Area extracted above is used for normalisation, so the input files are not read again
+        concatenate_Area_df = concatenate_df_list[concatenate_df_sheet_name.index("Area")]
+
         MyCalcData = MS_Analysis(MS_FilePaths = stored_args['MS_Files'], 
                                  MS_FileType = stored_args['MS_FileType'], 
                                  Annotation_FilePath = stored_args['Annot_File'],
                                  logger = logger, 
                                  ingui = True, 
-                                 longtable = stored_args['Long_Table'], 
-                                 longtable_annot = stored_args['Long_Table_Annot'])
+                                 longtable = False, 
+                                 longtable_annot = stored_args['Long_Table_Annot'],
+                                 number_of_workers = MSParallel.get_number_of_workers(stored_args))
 
 
         #print("Working on Output options that needs to be calculated",flush=True)
@@ -725,7 +895,8 @@ def concatenate_along_columns_workflow(stored_args, logger=None, testing = False
                 [norm_Area_df,ISTD_Area,ISTD_map_df,ISTD_Report] = MyCalcData.get_Normalised_Area(output_option,stored_args['Annot_File'],
                                                                                                   allow_multiple_istd = stored_args['Allow_Multiple_ISTD'],
                                                                                                   using_multiple_input_files = True,
-                                                                                                  concatenation_type = "columns")
+                                                                                                  concatenation_type = "columns",
+                                                                                                  Area_df = concatenate_Area_df)
 
                 #If testing, output the ISTD_Area results in the concatenate_df list
                 if stored_args['Testing']:
@@ -735,6 +906,8 @@ def concatenate_along_columns_workflow(stored_args, logger=None, testing = False
                 #Put the normalised area and transition annotation results in the concatenate_df list
                 concatenate_df_list.extend([ISTD_map_df,norm_Area_df])
                 concatenate_df_sheet_name.extend(["Transition_Name_Annot","normArea_by_ISTD"])
+                Long_Table_builder.add_calculated_df(norm_Area_df, "normArea",
+                                                     allow_multiple_istd = stored_args['Allow_Multiple_ISTD'])
 
                 #Generate the ISTD normalisation report
                 PDFReport.create_ISTD_report(ISTD_Report)
@@ -744,7 +917,9 @@ def concatenate_along_columns_workflow(stored_args, logger=None, testing = False
                 [norm_Conc_df,ISTD_Conc_df,ISTD_Samp_Ratio_df,Sample_Annot_df] = MyCalcData.get_Analyte_Concentration(output_option,stored_args['Annot_File'],
                                                                                                                       allow_multiple_istd=stored_args['Allow_Multiple_ISTD'],
                                                                                                                       using_multiple_input_files = True,
-                                                                                                                      concatenation_type = "columns")
+                                                                                                                      concatenation_type = "columns",
+                                                                                                                      output_intermediate_data = stored_args['Testing'],
+                                                                                                                      Area_df = concatenate_Area_df)
 
                 #Remove the column "Merge_Status" as it is not relevant
                 #Reorder the column such that "Concentration_Unit" is at the last column
@@ -761,47 +936,27 @@ def concatenate_along_columns_workflow(stored_args, logger=None, testing = False
                 #Output the concentration data and sample annotation results in the list
                 concatenate_df_list.extend([Sample_Annot_df,norm_Conc_df])
                 concatenate_df_sheet_name.extend(["Sample_Annot","normConc_by_ISTD"])
+                Long_Table_builder.add_calculated_df(norm_Conc_df, "normConc",
+                                                     allow_multiple_istd = stored_args['Allow_Multiple_ISTD'])
 
-        #Merge the Long_Table created from calculation_columns to the Long_Table created from no_need_full_data_output_options
-        if stored_args['Long_Table']:
-            for index, output_option in enumerate(need_full_data_output_options):
-                if output_option == 'normArea by ISTD':
-                    need_full_data_output_options[index] = 'normArea'
-                if output_option == 'normConc by ISTD':
-                    need_full_data_output_options[index] = 'normConc'
-            Long_Table_df = MyCalcData.get_Long_Table(allow_multiple_istd=stored_args['Allow_Multiple_ISTD'],
-                                                      concatenation_type = "columns")
-            if "Long_Table" in concatenate_df_sheet_name:
-                Long_Table_index = concatenate_df_sheet_name.index("Long_Table")
-                common_columns = list(set(concatenate_df_list[Long_Table_index].columns).intersection(Long_Table_df.columns))
-                front_columns = [x for x in Long_Table_df.columns if x not in need_full_data_output_options]
-                concatenate_df_list[Long_Table_index] = pd.merge(Long_Table_df,
-                                                                 concatenate_df_list[Long_Table_index], 
-                                                                 how = 'inner',
-                                                                 on = common_columns )
-                col_order = front_columns + no_need_full_data_output_options + need_full_data_output_options
-                concatenate_df_list[Long_Table_index] = concatenate_df_list[Long_Table_index][col_order]
-            else:
-                concatenate_df_list.extend([Long_Table_df])
-                concatenate_df_sheet_name.extend(["Long_Table"])
+    #The Long_Table is only created when it is written by output_concatenated_long_table
+    if stored_args['Long_Table']:
+        concatenate_df_list.extend([Long_Table_builder])
+        concatenate_df_sheet_name.extend(["Long_Table"])
 
     return([PDFReport, concatenate_df_list, concatenate_df_sheet_name])
 
-if __name__ == '__main__':
+def run_MSOrganiser(stored_args, logger = None):
+    """Function to run the workflow given by the Concatenate option and write all the output files
 
-    #Read the parser
-    stored_args = MSParser.parse_MSOrganiser_args()
+    Args:
+        stored_args (dict): A dictionary storing the input parameters. The dictionary is created in MSParser or MSCommandLine
+        logger (object): logger object created by start_logger in MSOrganiser
 
-    #Start log on a job
-    #Logfile will be the same directory as the exe file
-    logger = start_logger(os.path.abspath(os.path.dirname(sys.argv[0])))
-    logger.info("Starting the job.")
-    print("Starting the job.",flush=True)
+    """
 
-    #In Gooey 1.0.8, there is no need to split stored_args['MS_Files'] by ";"
-    #As stored_args['MS_Files'] is a list
-    #Find the number of input files
-    input_files_amount = len(stored_args['MS_Files'])
+    #Keep a snapshot of the annotation file for later runs
+    set_annotation_snapshot(stored_args)
 
     if stored_args['Concatenate']=="No Concatenate":
         no_concatenate_workflow(stored_args,logger)
@@ -809,6 +964,11 @@ if __name__ == '__main__':
         [PDFReport, concatenate_df_list, concatenate_df_sheet_name] = concatenate_along_rows_workflow(stored_args,logger)
     elif stored_args['Concatenate']=="Concatenate along Transition Name (columns)":
         [PDFReport, concatenate_df_list, concatenate_df_sheet_name] = concatenate_along_columns_workflow(stored_args, logger)
+    else:
+        if logger:
+            logger.error('Invalid Concatenate option %s', str(stored_args['Concatenate']))
+        print('Invalid Concatenate option ' + str(stored_args['Concatenate']),flush=True)
+        sys.exit(-1)
 
     if stored_args['Concatenate']!="No Concatenate":
         #Output the report to a pdf file
@@ -825,6 +985,24 @@ if __name__ == '__main__':
                                        concatenate_df_sheet_name = concatenate_df_sheet_name,
                                        logger = logger)
 
+if __name__ == '__main__':
+
+    #Needed by the pool of workers when running as an executable file
+    multiprocessing.freeze_support()
+
+    #Read the parser
+    #Gooey is only imported when the interface is started
+    import MSParser
+    stored_args = MSParser.parse_MSOrganiser_args()
+
+    #Start log on a job
+    #Logfile will be the same directory as the exe file
+    logger = start_logger(os.path.abspath(os.path.dirname(sys.argv[0])))
+    logger.info("Starting the job.")
+    print("Starting the job.",flush=True)
+
+    run_MSOrganiser(stored_args,logger)
+
     #End log on a job
     logger.info("Job is finished.")
     print("Job is finished",flush=True)
\ No newline at end of file
@@ -0,0 +1,150 @@
+import os
+import sys
+import logging
+import logging.handlers
+import multiprocessing
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+# Start method of the pool of workers, such as "spawn". None uses the default start method of the platform
+START_METHOD = None
+
+class FileLoggerAdapter(logging.LoggerAdapter):
+    """
+    A logger adapter that adds the input file name in front of each log message
+    so that messages from different input files processed at the same time can be told apart
+
+    Args:
+        logger (object): logger object created by start_logger in MSOrganiser
+        MS_FilePath (str): file path of the input MRM transition name file
+    """
+
+    def __init__(self, logger, MS_FilePath):
+        super().__init__(logger, {"MS_File" : os.path.basename(MS_FilePath)})
+
+    def process(self, msg, kwargs):
+        return '[%s] %s' % (self.extra["MS_File"], msg), kwargs
+
+def get_number_of_workers(stored_args):
+    """Function to get the number of workers used to process the input files
+
+    Args:
+        stored_args (dict): A dictionary storing the input parameters. The dictionary is created in MSParser
+
+    Returns:
+        number_of_workers (int): The number of workers, at least 1 and at most the number of input files
+
+    Note:
+        Number_of_Workers is optional in stored_args. When it is missing, the input files are processed one after another.
+    """
+    try:
+        number_of_workers = int(stored_args.get('Number_of_Workers') or 1)
+    except (TypeError, ValueError):
+        number_of_workers = 1
+    return max(1, min(number_of_workers, len(stored_args['MS_Files'])))
+
+def process_files_in_parallel(function, MS_FilePaths, number_of_workers, logger=None, **kwargs):
+    """Function to run function(MS_FilePath, logger = logger, **kwargs) for each input file in a pool of processes
+
+    Args:
+        function (function): A module level function that processes one input file
+        MS_FilePaths (list): A list of file path to the MRM transition name file.
+        number_of_workers (int): The number of processes in the pool
+        logger (object): logger object created by start_logger in MSOrganiser
+        kwargs: Other arguments given to function
+
+    Returns:
+        (list): list containing:
+
+            * results (list): The results of function, in the same order as MS_FilePaths. None if the file failed
+            * failed_files (list): A list of (MS_FilePath, error message) of the input files that failed
+
+    Note:
+        Log messages from the workers are sent back to the handlers of logger with the input file name in front.
+        An input file that fails (including a sys.exit(-1)) does not stop the other input files.
+        Workers started with spawn, the default on Windows, do not inherit any state of the main process 
+        that is not given in kwargs.
+    """
+
+    mp_context = multiprocessing.get_context(START_METHOD)
+    log_queue = None
+    log_listener = None
+    if logger:
+        log_queue = mp_context.Queue()
+        log_listener = logging.handlers.QueueListener(log_queue, *logger.handlers, respect_handler_level=True)
+        log_listener.start()
+
+    results = [None] * len(MS_FilePaths)
+    failed_files = []
+    try:
+        with ProcessPoolExecutor(max_workers = number_of_workers,
+                                 mp_context = mp_context,
+                                 initializer = _start_worker_logger,
+                                 initargs = (log_queue, logger.name if logger else None)) as executor:
+            futures = [executor.submit(_process_one_file, function, MS_FilePath, 
+                                       logger.name if logger else None, kwargs)
+                       for MS_FilePath in MS_FilePaths]
+            # Collect the results in input order
+            for index, future in enumerate(futures):
+                try:
+                    [status, output] = future.result()
+                except Exception as e:
+                    # The worker process itself has stopped
+                    [status, output] = ["failed", repr(e)]
+                if status == "done":
+                    results[index] = output
+                else:
+                    failed_files.append((MS_FilePaths[index], output))
+    finally:
+        if log_listener:
+            log_listener.stop()
+
+    return([results, failed_files])
+
+def report_failed_files(failed_files, logger=None, ingui=True):
+    """Function to inform the user which input files have failed and stop the program if there are any
+
+    Args:
+        failed_files (list): A list of (MS_FilePath, error message) given by process_files_in_parallel
+        logger (object): logger object created by start_logger in MSOrganiser
+        ingui (bool): if True, print analysis status to screen
+
+    """
+    if len(failed_files) == 0:
+        return
+
+    for MS_FilePath, message in failed_files:
+        if logger:
+            logger.error('Unable to process %s. %s', MS_FilePath, message)
+        if ingui:
+            print('Unable to process ' + MS_FilePath + '. ' + message, flush=True)
+
+    if logger:
+        logger.error('%s out of the input files could not be processed.', str(len(failed_files)))
+    if ingui:
+        print(str(len(failed_files)) + ' out of the input files could not be processed.', flush=True)
+    sys.exit(-1)
+
+def _start_worker_logger(log_queue, logger_name):
+    # Send the log messages of the worker back to the main process
+    if log_queue is None:
+        return
+    logger = logging.getLogger(logger_name)
+    logger.setLevel(logging.INFO)
+    logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    logger.propagate = False
+
+def _process_one_file(function, MS_FilePath, logger_name, kwargs):
+    logger = None
+    if logger_name:
+        logger = FileLoggerAdapter(logging.getLogger(logger_name), MS_FilePath)
+
+    try:
+        return(["done", function(MS_FilePath, logger = logger, **kwargs)])
+    except SystemExit:
+        # The error message has already been given by the function
+        return(["failed", "See the messages above for the details."])
+    except Exception:
+        if logger:
+            logger.error(traceback.format_exc())
+        return(["failed", traceback.format_exc(limit = 1).strip()])
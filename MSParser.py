@@ -187,6 +187,16 @@ def _create_Gooey_Parser(stored_args):
     else:
         Long_Table_Annot = stored_args.get('Long_Table_Annot')
 
+    if not stored_args.get('Number_of_Workers'):
+        Number_of_Workers = 1
+    else:
+        Number_of_Workers = stored_args.get('Number_of_Workers')
+
+    if not stored_args.get('Annot_Snapshot_Directory'):
+        Annot_Snapshot_Directory = None
+    else:
+        Annot_Snapshot_Directory = stored_args.get('Annot_Snapshot_Directory')
+
     required_args = parser.add_argument_group("Required Input", gooey_options={'columns': 1 } )
     analysis_args = parser.add_argument_group("Data Extraction", gooey_options={'columns': 1 } )
     output_args = parser.add_argument_group("Output Settings", gooey_options={ 'columns': 2 } )
@@ -242,5 +252,14 @@ def _create_Gooey_Parser(stored_args):
     
     #Optional Arguments 
     optional_args.add_argument('--Testing', action='store_true', help='Testing mode will generate more output tables.')
+    optional_args.add_argument('--Number_of_Workers', type=int, widget='IntegerField',
+                               help='Number of input files to process at the same time.',
+                               gooey_options={'min': 1, 'max': os.cpu_count() or 1},
+                               default=Number_of_Workers)
+    optional_args.add_argument('--Annot_Snapshot_Directory', action='store', widget='DirChooser',
+                               help='Folder to keep a snapshot of the annotation file. ' + 
+                                    'Later runs with the same annotation file load the snapshot instead of the excel file. ' +
+                                    'Leave blank to always read the excel file.',
+                               default=Annot_Snapshot_Directory)
 
     return parser
\ No newline at end of file
@@ -59,6 +59,83 @@ class MSRawData:
         return df
 
 
+class AgilentHeaderIndex:
+    """
+    A class to index the two header rows of raw data obtained from the Agilent MS machine
+
+    Args:
+        group_row (pandas Series): The first header row (e.g Sample, Compound Method, Qualifier 1 Method) filled forward
+        field_row (pandas Series): The second header row (e.g Data File, Name, Transition, Area)
+
+    Note:
+        Each distinct header text is matched only once and the column positions found are cached.
+        Groups written as "Qualifier 1 Method" or "Qualifier 1 Results" are indexed as the group 
+        "Qualifier Method" or "Qualifier Results" with qualifier number 1.
+    """
+
+    def __init__(self, group_row, field_row):
+        # Give each distinct header text a code, missing text has a code of -1
+        group_codes, group_labels = pd.factorize(group_row)
+        field_codes, field_labels = pd.factorize(field_row)
+        self.__group_codes = group_codes
+        self.__field_codes = field_codes
+        self.__field_labels = pd.Series(field_labels, dtype=object)
+
+        # Find the qualifier groups and their qualifier number
+        group_labels = pd.Series(group_labels, dtype=object)
+        qualifier_parts = group_labels.str.strip().str.extract(r'^Qualifier (\d+) (Method|Results)$')
+        is_qualifier = qualifier_parts[0].notna()
+        self.__group_labels = group_labels.where(~is_qualifier, "Qualifier " + qualifier_parts[1])
+        label_qualifier_numbers = np.append(pd.to_numeric(qualifier_parts[0]).fillna(0).astype(int).values, 0)
+        self.__qualifier_numbers = label_qualifier_numbers[group_codes]
+
+        self.__positions_cache = {}
+
+    def get_positions(self, group=None, field=None, qualifier=None):
+        """Function to get the column positions of a given group, field and qualifier number
+
+        Args:
+            group (str): Text found in the first header row (e.g Sample, Results, Qualifier Method). If None, all groups are used
+            field (str): Text found in the second header row (e.g Data File, Area). If None, all fields are used
+            qualifier (int): The qualifier number of the group. If None, all qualifier numbers are used
+
+        Returns:
+            positions (list): A list of column positions in increasing order
+
+        """
+        key = (group, field, qualifier)
+        if key not in self.__positions_cache:
+            mask = np.ones(len(self.__group_codes), dtype=bool)
+            if group is not None:
+                mask &= AgilentHeaderIndex.__label_mask(self.__group_labels, self.__group_codes, group)
+            if field is not None:
+                mask &= AgilentHeaderIndex.__label_mask(self.__field_labels, self.__field_codes, field)
+            if qualifier is not None:
+                mask &= self.__qualifier_numbers == qualifier
+            self.__positions_cache[key] = np.flatnonzero(mask).tolist()
+        return list(self.__positions_cache[key])
+
+    def get_qualifier_numbers(self, group="Qualifier Method", field=None):
+        """Function to get the qualifier numbers found in a given group and field
+
+        Args:
+            group (str): Either "Qualifier Method" or "Qualifier Results"
+            field (str): Text found in the second header row (e.g Transition). If None, all fields are used
+
+        Returns:
+            qualifier_numbers (list): A sorted list of qualifier numbers
+
+        """
+        positions = self.get_positions(group=group, field=field)
+        return sorted(set(self.__qualifier_numbers[positions].tolist()) - {0})
+
+    def __label_mask(labels, codes, text):
+        """Function to find the columns whose header contains the text. The text is only searched in the distinct labels"""
+        label_mask = labels.str.contains(text, regex=False).fillna(False).values.astype(bool)
+        # Missing header text (code -1) takes the last value which is False
+        return np.append(label_mask, False)[codes]
+
+
 class AgilentMSRawData(MSRawData):
     """
     To describe raw data obtained from the Agilent MS machine
@@ -75,6 +152,7 @@ class AgilentMSRawData(MSRawData):
         self.__ingui = ingui
         self.__readfile(filepath)
         self.__getdataform(filepath)
+        self.HeaderIndex = AgilentHeaderIndex(self.RawData.iloc[0,:], self.RawData.iloc[1,:])
         self.__filename = os.path.basename(filepath)
         self.VALID_COMPOUND_RESULTS = ('Area','RT','FWHM','S/N','Symmetry')
         self.VALID_COMPOUND_METHODS = ('Precursor Ion','Product Ion')
@@ -88,11 +166,28 @@ class AgilentMSRawData(MSRawData):
         Returns:
             A data frame of sample as rows and transition names as columns with values from the chosen column name
 
+        """
+        return self.get_tables([column_name],is_numeric)[column_name]
+
+    def get_tables(self,column_names,is_numeric=True):
+        """Function to get the tables of several columns from MassHunter Raw Data in one pass
+
+        Args:
+            column_names (list): The names of the columns given in the Output_Options.
+            is_numeric (bool): if True, convert text numbers into numeric
+
+        Returns:
+            table_dict (dict): A dictionary with the column names as keys and a data frame of sample as rows 
+            and transition names as columns with values from the chosen column name as values
+
+        Note:
+            The header rows and the sample names are read once and shared by all the tables.
+
         """
         if self.DataForm == "WideTableForm":
-            return self.__get_table_wide(column_name,is_numeric)
+            return self.__get_tables_wide(column_names,is_numeric)
         elif self.DataForm == "CompoundTableForm":
-            return self.__get_table_compound(column_name,is_numeric)
+            return self.__get_tables_compound(column_names,is_numeric)
 
     #def get_data_file_name(self):
     #    """Function to get the list of sample names in a form of a dataframe
@@ -106,17 +201,13 @@ class AgilentMSRawData(MSRawData):
     #    elif self.DataForm == "CompoundTableForm":
     #        return self.__get_data_file_name_compound()
 
-    def __get_table_wide(self,column_name,is_numeric=True):
-        """Function to get the table from MassHunter Raw Data in Wide Table form"""
-
-        # Get the data file name and give error when it cannot be found
-        DataFileName_df = self.__get_data_file_name_wide()
+    def __get_column_group(self,column_name):
+        """Function to check if Column name comes from Results or Methods group"""
 
-        # Check if Column name comes from Results or Methods group
         if column_name in self.VALID_COMPOUND_RESULTS:
-            column_group = "Results"
+            return "Results"
         elif column_name in self.VALID_COMPOUND_METHODS:
-            column_group = "Method"
+            return "Method"
         else:
             if self.__logger:
                 self.__logger.error('Output option ' + column_name + ' ' + 
@@ -129,23 +220,9 @@ class AgilentMSRawData(MSRawData):
                       flush=True)
             sys.exit(-1)
 
-        # Extract the data  with the given column name and group
-        table_index = self.RawData.iloc[0,:].str.contains(column_group) & self.RawData.iloc[1,:].str.contains(column_name)
-        table_df = self.RawData.loc[:,table_index].copy()
-
-        if table_df.empty:
-            return table_df
+    def __finalise_table(self,table_df,DataFileName_df,is_numeric=True):
+        """Function to convert the values of a table and add the sample names to it"""
 
-        # Remove the column group text and whitespaces
-        table_df.iloc[0,:] = table_df.iloc[0,:].str.replace(column_group, "").str.strip()
-
-        # Assign column name
-        colnames = table_df.iloc[0,:].astype('str').str.strip()
-        table_df.columns = colnames
-
-        # We remove the first and second row because the column names are given
-        table_df = table_df.iloc[2:]
-        
         # Reset the row index
         table_df = table_df.reset_index(drop=True)
 
@@ -154,76 +231,88 @@ class AgilentMSRawData(MSRawData):
             table_df = table_df.apply(pd.to_numeric, errors='coerce')
 
         table_df = pd.concat([DataFileName_df, table_df], axis=1)
-        
+
         # Strip the whitespaces for each string columns
         table_df = self.remove_whiteSpaces(table_df)
 
         return table_df
 
-    def __get_table_compound(self,column_name,is_numeric=True):
-        """Function to get the table from MassHunter Raw Data in Compound Table form"""
+    def __get_tables_wide(self,column_names,is_numeric=True):
+        """Function to get the tables from MassHunter Raw Data in Wide Table form"""
+
+        # Get the data file name and give error when it cannot be found
+        DataFileName_df = self.__get_data_file_name_wide()
+
+        table_dict = {}
+        for column_name in column_names:
+            # Check if Column name comes from Results or Methods group
+            column_group = self.__get_column_group(column_name)
+
+            # Extract the data  with the given column name and group
+            table_index = self.HeaderIndex.get_positions(group=column_group, field=column_name)
+            table_df = self.RawData.iloc[:,table_index]
+
+            if table_df.empty:
+                table_dict[column_name] = table_df.copy()
+                continue
+
+            # Remove the column group text and whitespaces
+            colnames = self.RawData.iloc[0,table_index].str.replace(column_group, "").str.strip().astype('str').str.strip()
+
+            # We remove the first and second row because the column names are given
+            table_df = table_df.iloc[2:].copy()
+
+            # Assign column name
+            table_df.columns = colnames
+
+            table_dict[column_name] = self.__finalise_table(table_df,DataFileName_df,is_numeric)
+
+        return table_dict
+
+    def __get_tables_compound(self,column_names,is_numeric=True):
+        """Function to get the tables from MassHunter Raw Data in Compound Table form"""
 
         # Get the data file name and give error when it cannot be found
         DataFileName_df = self.__get_data_file_name_compound()
 
-        # Check if Column name comes from Results or Methods group
-        # TODO try to extract data from VALID_COMPOUND_METHODS
-        if column_name in self.VALID_COMPOUND_RESULTS:
-            column_group = "Results"
-        elif column_name in self.VALID_COMPOUND_METHODS:
-            column_group = "Method"
-        else:
-            if self.__logger:
-                self.__logger.error('Output option ' + column_name + ' ' + 
-                                    'is not a valid column in MassHunter or not ' + 
-                                    'available as a valid output for this program.')
-            if self.__ingui:
-                print('Output option ' + column_name + ' ' + 
-                      'is not a valid column in MassHunter or not ' + 
-                      'available as a valid output for this program.',
-                      flush=True)
-            sys.exit(-1)
+        # The transition and qualifier layout is shared by all the column names
+        Compound_Layout = None
 
-        # Get the compound table df and give error when it cannot be found
-        # CompoundName_df = self.__get_compound_name_compound(column_name)
-        table_df = self.__get_compound_name_compound(column_name)
+        table_dict = {}
+        for column_name in column_names:
+            # Check if Column name comes from Results or Methods group
+            # TODO try to extract data from VALID_COMPOUND_METHODS
+            self.__get_column_group(column_name)
 
-        if table_df.empty:
-            return table_df
+            # Get the compound table layout and give error when it cannot be found
+            if Compound_Layout is None:
+                Compound_Layout = self.__get_compound_layout()
 
-        table_df = table_df.transpose()
+            table_df = self.__get_compound_name_compound(column_name,Compound_Layout)
 
-        # Assign column name
-        colnames = table_df.iloc[0,:].astype('str').str.strip()
-        table_df.columns = colnames
-        
-        # We remove the first row because the column names are given
-        table_df = table_df.iloc[1:]
+            if table_df.empty:
+                table_dict[column_name] = table_df
+                continue
 
-        # If column name is a compound method, only the first row has data, we need to replicate data for all the rows
-        if column_name in self.VALID_COMPOUND_METHODS:
-            table_df = pd.concat([table_df]*DataFileName_df.shape[0], ignore_index=True)
-        
-        # Reset the row index
-        table_df = table_df.reset_index(drop=True)
+            # If column name is a compound method, only the first row has data, we need to replicate data for all the rows
+            if column_name in self.VALID_COMPOUND_METHODS:
+                table_df = pd.concat([table_df]*DataFileName_df.shape[0], ignore_index=True)
 
-        # Convert text numbers into numeric
-        if is_numeric:
-            table_df = table_df.apply(pd.to_numeric, errors='coerce')
+            table_dict[column_name] = self.__finalise_table(table_df,DataFileName_df,is_numeric)
 
-        table_df = pd.concat([DataFileName_df, table_df], axis=1)
+        return table_dict
 
-        # Strip the whitespaces for each string columns
-        table_df = self.remove_whiteSpaces(table_df)
+    def __get_compound_layout(self):
+        """Function to get the position of the transitions and qualifiers in MassHunter Raw Data in Compound Table form
 
-        return table_df
+        Returns:
+            Compound_Layout (dict): A dictionary with the header column indexes, the transition and qualifier names 
+            and the slots (one per transition followed by one per qualifier) that are present in the data
 
-    def __get_compound_name_compound(self,column_name):
-        """Function to get the df Transition Name as Rows, Sample Name as Columns with values from the chosen column_name. E.g Area """
+        """
 
         # Get the column index of where the Transition Names are. We know for sure that it is on the third row
-        Compound_Col = self.RawData.iloc[0,:].str.contains("Compound Method") & self.RawData.iloc[1,:].str.contains("Name")
-        Compound_Col_Index = Compound_Col.index[Compound_Col == True].tolist()
+        Compound_Col_Index = self.HeaderIndex.get_positions(group="Compound Method", field="Name")
 
         # Give an error if we can't get any transition name
         if len(Compound_Col_Index) == 0 :
@@ -239,112 +328,97 @@ class AgilentMSRawData(MSRawData):
             sys.exit(-1)
 
         # Find cols with Transition in second row and Qualifier Method in the first row
-        Qualifier_Method_Col = self.RawData.iloc[0,:].str.contains("Qualifier \d Method", regex=True) & self.RawData.iloc[1,:].str.contains("Transition")
-        # Get the column index where the group of Qualifier Method first appeared.
-        Qualifier_Method_Col_Index = Qualifier_Method_Col.index[Qualifier_Method_Col == True].tolist()
+        Qualifier_Method_Col_Index = self.HeaderIndex.get_positions(group="Qualifier Method", field="Transition")
 
-        # Find cols with Data File in the second row
-        DataFileName_Col = self.RawData.iloc[1,:].str.contains("Data File")
-        # Find the number of Qualifiers each Transition is entitled to have
-        No_of_Qual_per_Transition = int((Qualifier_Method_Col.values == True).sum() / (DataFileName_Col.values == True).sum() )
+        # Find the Qualifiers each Transition is entitled to have
+        Qualifier_Numbers = self.HeaderIndex.get_qualifier_numbers(group="Qualifier Method", field="Transition")
 
-        # We start a new Compound_list
-        Compound_list = []
+        # Get the column index where each Qualifier Method first appeared.
+        Qualifier_Transition_Col_Index = [self.HeaderIndex.get_positions(group="Qualifier Method", field="Transition", qualifier=qualifier)[0]
+                                          for qualifier in Qualifier_Numbers]
+
+        # Transition from Compound Method (They should not be used to get the Qualifer Area)
+        CpdMethod_Transition_Col_Index = self.HeaderIndex.get_positions(group="Compound Method", field="Transition")
 
         # We start on row three
-        self.RawData.iloc[2:,sorted(Compound_Col_Index + Qualifier_Method_Col_Index[0:No_of_Qual_per_Transition] )].apply(lambda x: AgilentMSRawData._get_Compound_List(x=x,
-                                                                                                                                                                        Compound_list=Compound_list),
-                                                                                                                          axis=1)
+        RawValues = self.RawData.values[2:,:]
+        No_of_Transitions = RawValues.shape[0]
 
-        CompoundName_df = pd.DataFrame(Compound_list)
-        CompoundName_df = self.remove_whiteSpaces(CompoundName_df)
+        # A qualifier is kept when the first sample lists its transition,
+        # we stop at the first qualifier that has no transition
+        Qualifier_Transition = RawValues[:,Qualifier_Transition_Col_Index]
+        Qualifier_Present = np.cumprod(pd.notna(Qualifier_Transition), axis=1).astype(bool)
 
-        # All Column Name (e.g Area) and Transition index
-        ColName_Col = self.RawData.iloc[1,:].str.contains(column_name) | self.RawData.iloc[1,:].str.contains("Transition")
-        ColName_Col_Index = ColName_Col.index[ColName_Col == True].tolist()
+        # Each transition takes one slot followed by one slot per qualifier
+        Slot_Present = np.column_stack([np.ones(No_of_Transitions, dtype=bool), Qualifier_Present])
 
-        # Transition from Compound Method (They should not be used to get the Qualifer Area)
-        CpdMethod_Transition_Col = self.RawData.iloc[0,:].str.contains("Compound Method") & self.RawData.iloc[1,:].str.contains("Transition")
-        CpdMethod_Transition_Col_Index = CpdMethod_Transition_Col.index[CpdMethod_Transition_Col == True].tolist()
+        # Transition and qualifier names in each slot
+        Name_Block = np.column_stack([RawValues[:,Compound_Col_Index[0]], Qualifier_Transition]).astype(object)
+        Is_Qualifier = pd.DataFrame(Name_Block).apply(lambda x: x.str.contains("->", regex=False)).fillna(False).values
+        Name_Block[Is_Qualifier] = "Qualifier (" + Name_Block[Is_Qualifier] + ")"
+        Transition_Names = pd.Series(Name_Block[Slot_Present]).astype('str').str.strip()
 
-        # Column Name (e.g Area) found for the Qualifier
-        ColName_Qualifier_Col = self.RawData.iloc[0,:].str.contains("Qualifier \d Results", regex=True) & self.RawData.iloc[1,:].str.contains(column_name)
-        ColName_Qualifier_Col_Index = ColName_Qualifier_Col.index[ColName_Qualifier_Col == True].tolist()
+        return {"Qualifier_Method_Col_Index" : Qualifier_Method_Col_Index,
+                "CpdMethod_Transition_Col_Index" : CpdMethod_Transition_Col_Index,
+                "Qualifier_Numbers" : Qualifier_Numbers,
+                "Slot_Present" : Slot_Present,
+                "Transition_Names" : Transition_Names}
 
-        # Column Name (e.g Area), found for the Transitions
-        ColName_Compound_Col_Index = [x for x in ColName_Col_Index if x not in sorted(CpdMethod_Transition_Col_Index + Qualifier_Method_Col_Index + ColName_Qualifier_Col_Index, key = int)]
+    def __get_compound_name_compound(self,column_name,Compound_Layout):
+        """Function to get the df Sample Name as Rows, Transition Name as Columns with values from the chosen column_name. E.g Area
+
+        Note:
+            The values of every sample are sliced out as whole blocks using the positions in Compound_Layout.
+        """
 
-        table_list = []
+        Qualifier_Numbers = Compound_Layout["Qualifier_Numbers"]
+        Slot_Present = Compound_Layout["Slot_Present"]
 
-        # We start on row three, update the table list with the column_name
-        self.RawData.iloc[2:,sorted(ColName_Col_Index, key=int)].apply(lambda x: AgilentMSRawData._get_Compound_Data(x=x,
-                                                                                                                     table_list=table_list, 
-                                                                                                                     ColName_Compound_Col_Index = ColName_Compound_Col_Index,
-                                                                                                                     Qualifier_Method_Col_Index = Qualifier_Method_Col_Index,
-                                                                                                                     ColName_Qualifier_Col_Index = ColName_Qualifier_Col_Index,
-                                                                                                                     No_of_Qual_per_Transition = No_of_Qual_per_Transition)
-                                                                       ,axis=1)
+        # All Column Name (e.g Area) and Transition index
+        ColName_Col_Index = sorted(set(self.HeaderIndex.get_positions(field=column_name) + 
+                                       self.HeaderIndex.get_positions(field="Transition")))
 
-        if pd.DataFrame(table_list).empty:
-            return(pd.DataFrame(table_list))
-        else:
-            # TODO
-            # Check if the number of rows in the table_list of values, 
-            # matches the number of rows (Transition and Qualifier Names) in the CompoundName_df
-            # If not, give an error of a possible corrupted csv input.
-            #print(len(CompoundName_df.index))
-            #print(len(pd.DataFrame(table_list)))
-            return(pd.concat([CompoundName_df, pd.DataFrame(table_list) ], axis=1))
-        return(pd.DataFrame()) 
-
-    def _get_Compound_Data(x,table_list,ColName_Compound_Col_Index,Qualifier_Method_Col_Index,ColName_Qualifier_Col_Index,No_of_Qual_per_Transition):
-        """Function to get the values from the chosen column_name. E.g(Area) from a given row from the raw MRM data from Agilent in Compound Table form. table_list will be updated"""
-
-        #Get Compound row
-        Compound_df = pd.DataFrame(x[x.index.isin(ColName_Compound_Col_Index)])
-        Compound_df = Compound_df.T.values.tolist()
-        #Append to table_list
-        table_list.extend(Compound_df)
-
-        #Get Qualifier row
-        for i in range(0,No_of_Qual_per_Transition):
-            #Check if there is a transition 
-            #print([Qualifier_Method_Col_Index[i]])
-            #print(x[ x.index.isin([Qualifier_Method_Col_Index[i]])].values.tolist()[0])
-            #sys.exit(0)
-            Transition = x[ x.index.isin([Qualifier_Method_Col_Index[i]])].values.tolist()[0]
-            if(pd.isna(Transition)):
-                break
-            else:
-                #When there is a transition, we need to collect a subset of ColName_Qualifier_Col_Index that correspond to this transition
-                #ColName_Qualifier_Col_Index_subset = [ColName_Qualifier_Col_Index[index] for index in range(0+i,int(len(ColName_Qualifier_Col_Index)/No_of_Qual_per_Transition),No_of_Qual_per_Transition)]
-                ColName_Qualifier_Col_Index_subset = [ColName_Qualifier_Col_Index[index] for index in range(0+i,int(len(ColName_Qualifier_Col_Index)),No_of_Qual_per_Transition)]
-                Qualifier_df = pd.DataFrame(x[x.index.isin(ColName_Qualifier_Col_Index_subset)])
-                Qualifier_df = Qualifier_df.T.values.tolist()
-
-                #Append to table_list
-                table_list.extend(Qualifier_df)
-
-                #if i == 0:
-                #    print(Transition)
-                #    print(Qualifier_df)
-                #    sys.exit(0)
-
-    def _get_Compound_List(x,Compound_list):
-        """Function to get the Transition Names and Qualifiers from a given row from the raw MRM data from Agilent in Compound Table form. Compound_list will be updated"""
-        #x is a series
-        #Remove NA if any
-        s = x.dropna().copy()
-        #Update the Qualifer name if there is any
-        s[s.str.contains("->")] = "Qualifier (" + s[s.str.contains("->")].values + ")"
-        Compound_list.extend(s.values.tolist())
+        # Column Name (e.g Area) found for each Qualifier
+        ColName_Qualifier_Col_Index_List = [self.HeaderIndex.get_positions(group="Qualifier Results", field=column_name, qualifier=qualifier)
+                                            for qualifier in Qualifier_Numbers]
 
+        # Column Name (e.g Area), found for the Transitions
+        Excluded_Col_Index = set(Compound_Layout["CpdMethod_Transition_Col_Index"] + Compound_Layout["Qualifier_Method_Col_Index"] + 
+                                 self.HeaderIndex.get_positions(group="Qualifier Results", field=column_name))
+        ColName_Compound_Col_Index = [x for x in ColName_Col_Index if x not in Excluded_Col_Index]
+
+        # We start on row three
+        RawValues = self.RawData.values[2:,:]
+        No_of_Transitions = RawValues.shape[0]
+
+        # No values found for the column name
+        if No_of_Transitions == 0 or len(ColName_Compound_Col_Index) == 0:
+            return pd.DataFrame()
+
+        # Values of the column name (e.g Area) in each slot.
+        # Qualifier results are stored per sample as Qualifier 1, Qualifier 2, ...
+        Compound_Values = RawValues[:,ColName_Compound_Col_Index]
+        Qualifier_Values = [RawValues[:,ColName_Qualifier_Col_Index] 
+                            for ColName_Qualifier_Col_Index in ColName_Qualifier_Col_Index_List]
+        No_of_Value_Cols = max([Compound_Values.shape[1]] + [block.shape[1] for block in Qualifier_Values])
+        Value_Block = np.full((No_of_Transitions, 1 + len(Qualifier_Numbers), No_of_Value_Cols), np.nan, dtype=object)
+        Value_Block[:,0,:Compound_Values.shape[1]] = Compound_Values
+        for i, block in enumerate(Qualifier_Values):
+            Value_Block[:,i+1,:block.shape[1]] = block
+
+        # Keep the used slots in transition order and put the samples as rows
+        table_df = pd.DataFrame(Value_Block[Slot_Present].T)
+
+        # Assign column name
+        table_df.columns = Compound_Layout["Transition_Names"]
+
+        return table_df
 
     def __get_data_file_name_wide(self):
         """Function to get the list of sample names from MassHunter Raw Data in Wide Table form"""
 
-        DataFileName_Col = self.RawData.iloc[0,:].str.contains("Sample") & self.RawData.iloc[1,:].str.contains("Data File")
-        DataFileName_df = self.RawData.loc[:,DataFileName_Col].copy()
+        DataFileName_Col_Index = self.HeaderIndex.get_positions(group="Sample", field="Data File")
+        DataFileName_df = self.RawData.iloc[:,DataFileName_Col_Index].copy()
 
         if DataFileName_df.empty:
             if self.__logger:
@@ -379,9 +453,9 @@ class AgilentMSRawData(MSRawData):
     def __get_data_file_name_compound(self):
         """Function to get the list of sample names from MassHunter Raw Data in Compound Table form"""
 
-        DataFileName_Col = self.RawData.iloc[1,:].str.contains("Data File")
+        DataFileName_Col_Index = self.HeaderIndex.get_positions(field="Data File")
         #We take the copy of the original dataframe, convert the Series output into a Dataframe
-        DataFileName_df = self.RawData.loc[2,DataFileName_Col].copy().to_frame()
+        DataFileName_df = self.RawData.iloc[2,DataFileName_Col_Index].copy().to_frame()
         
         if DataFileName_df.empty:
             if self.__logger:
@@ -520,12 +594,29 @@ class SciexMSRawData(MSRawData):
             A data frame of sample as rows and transition names as columns with values from the chosen column name
 
         """
-        column_name = self.AgilentColumnName_to_SciexColumnName(column_name)
+        return self.get_tables([column_name],is_numeric)[column_name]
+
+    def get_tables(self,column_names,is_numeric=True):
+        """Function to get the tables of several columns from Sciex MultiQuant Raw Data in one pass
+
+        Args:
+            column_names (list): The names of the columns given in the Output_Options.
+
+        Returns:
+            table_dict (dict): A dictionary with the column names as keys and a data frame of sample as rows 
+            and transition names as columns with values from the chosen column name as values
+
+        Note:
+            The duplicate check and the (Sample Name, Component Name) index are done once and shared by all the tables.
+
+        """
+        sciex_column_names = [self.AgilentColumnName_to_SciexColumnName(column_name) for column_name in column_names]
 
         #Catch any duplicated data that prevent us from pivoting.
         self.RawData.index = np.arange(2,len(self.RawData)+2)
         duplicate_df = [g for _, g in self.RawData.groupby(['Sample Name','Component Name']) if len(g) > 1]
         if(len(duplicate_df)>0):
+            column_name = sciex_column_names[0]
             duplicate_df = pd.concat(duplicate_df)
             duplicate_df_filename = os.path.splitext(os.path.basename(self.__filename))[0] + "_" + column_name + "_Duplicate.csv"
             self.__logger.error('There are duplicate %s for a given sample name and component name. See %s for more info',column_name,duplicate_df_filename)
@@ -535,11 +626,16 @@ class SciexMSRawData(MSRawData):
             duplicate_df.to_csv(duplicate_df_filename,sep=',',index=True)
             sys.exit(-1)
 
-        Table_df = self.RawData.pivot(index='Sample Name' ,columns='Component Name',values=column_name).reset_index()
-        Table_df.columns.name = None
-        Table_df.rename(columns={'Sample Name':'Sample_Name'}, inplace=True)
+        Indexed_df = self.RawData.set_index(['Sample Name','Component Name'])
+
+        table_dict = {}
+        for column_name, sciex_column_name in zip(column_names, sciex_column_names):
+            Table_df = Indexed_df[sciex_column_name].unstack('Component Name').reset_index()
+            Table_df.columns.name = None
+            Table_df.rename(columns={'Sample Name':'Sample_Name'}, inplace=True)
+            table_dict[column_name] = Table_df
 
-        return(Table_df)
+        return table_dict
 
     def AgilentColumnName_to_SciexColumnName(self,column_name):
         """Function to convert the column_name (Output Option) from Agilent to Sciex form
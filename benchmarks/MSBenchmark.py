@@ -0,0 +1,470 @@
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PACKAGE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PACKAGE_DIRECTORY not in sys.path:
+    sys.path.insert(0, PACKAGE_DIRECTORY)
+
+import numpy as np
+import pandas as pd
+
+import MSOrganiser
+from Annotation import MS_Template
+from Annotation import get_msorganiser_version
+from MSRawData import AgilentMSRawData
+from MSRawData import SciexMSRawData
+from MSCalculate import ISTD_Operations
+from MSDataOutput import MSDataOutput
+from MSDataOutput import MSDataOutput_csv
+from MSDataOutput import MSDataOutput_Excel
+from MSDataGenerator import MSDataGenerator
+
+MS_FILETYPE_LIST = ['Agilent Wide Table in csv',
+                    'Agilent Compound Table in csv',
+                    'Multiquant Long Table in txt']
+
+#Concatenate option of each workflow and the layout of the input files it needs
+WORKFLOW_LAYOUT_DICT = {'No Concatenate' : None,
+                        'Concatenate along Sample Name (rows)' : None,
+                        'Concatenate along Transition Name (columns)' : "columns"}
+
+WORKFLOW_OUTPUT_OPTIONS = ['Area', 'RT', 'normArea by ISTD', 'normConc by ISTD']
+
+#Maximum time in seconds to start python and import MSOrganiser, most of it is spent importing pandas
+IMPORT_TIME_BUDGET = 3
+
+#Benchmarks whose minimum time must stay within a budget in seconds
+BENCHMARK_BUDGET_DICT = {"MSOrganiser.import" : IMPORT_TIME_BUDGET}
+
+class MSBenchmark:
+    """
+    A class to time the workflows of MSOrganiser and its hot functions on generated datasets
+
+    Args:
+        data_directory (str): directory to write the generated datasets and the output files to
+        generator (MSDataGenerator): generator of the input files and annotation workbooks
+        repeat (int): number of timed runs of each benchmark
+        track_memory (bool): if True, each benchmark is run once more with tracemalloc to get its peak memory
+
+    Note:
+        The timed runs and the memory run are separate as tracemalloc slows down the code it traces.
+        The annotation workbook cache is cleared before every run so that each run reads the workbook again.
+    """
+
+    def __init__(self, data_directory, generator, repeat = 3, track_memory = True):
+        self.data_directory = data_directory
+        self.generator = generator
+        self.repeat = repeat
+        self.track_memory = track_memory
+        self.__dataset_dict = {}
+        self.__calculation_input = None
+
+    def get_dataset(self, MS_FileType, concatenation = None):
+        """Function to get the input files and annotation workbook of a dataset, generated on first use
+
+        Args:
+            MS_FileType (str): 'Agilent Wide Table in csv', 'Agilent Compound Table in csv' or 'Multiquant Long Table in txt'
+            concatenation (str): "columns" for input files with the same samples and different transitions
+
+        Returns:
+            (list): list containing:
+
+                * MS_FilePath_list (list): file paths of the input files
+                * Annotation_FilePath (str): file path of the annotation workbook
+
+        """
+        dataset_key = (MS_FileType, concatenation)
+        if dataset_key not in self.__dataset_dict:
+            self.__dataset_dict[dataset_key] = self.generator.generate_dataset(os.path.join(self.data_directory, "input"),
+                                                                               MS_FileType, concatenation)
+        return self.__dataset_dict[dataset_key]
+
+    def measure(self, function, setup = None):
+        """Function to time a function and measure its peak memory
+
+        Args:
+            function (function): function to benchmark. It is called with the result of setup
+            setup (function): function called before each run and not timed
+
+        Returns:
+            result (dict): the time of each run in seconds, their minimum and mean, the peak memory in MB,
+                           and the error message if the function failed
+
+        """
+        result = {"times" : []}
+        try:
+            for _ in range(self.repeat):
+                argument = setup() if setup else None
+                gc.collect()
+                start_time = time.perf_counter()
+                function(argument)
+                result["times"].append(time.perf_counter() - start_time)
+
+            if self.track_memory:
+                argument = setup() if setup else None
+                gc.collect()
+                tracemalloc.start()
+                try:
+                    function(argument)
+                    result["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                finally:
+                    tracemalloc.stop()
+        except (Exception, SystemExit) as e:
+            #MSOrganiser exits with sys.exit(-1) on invalid input
+            result["error"] = type(e).__name__ + ": " + str(e)
+
+        if result["times"]:
+            result["min_seconds"] = min(result["times"])
+            result["mean_seconds"] = sum(result["times"]) / len(result["times"])
+        return result
+
+    def get_startup_benchmarks(self):
+        """Function to get the benchmark of the time to start MSOrganiser
+
+        Returns:
+            benchmark_list (list): list of [name, function, setup] of each benchmark
+
+        Note:
+            MSOrganiser is imported in a new python process for each run, 
+            so the time includes the start of python itself. The peak memory is not meaningful for this benchmark.
+        """
+        return [["MSOrganiser.import", self.__import_MSOrganiser, None]]
+
+    def __import_MSOrganiser(self, argument):
+        result = subprocess.run([sys.executable, "-c", "import MSOrganiser"],
+                                cwd = PACKAGE_DIRECTORY, capture_output = True, text = True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+
+    def get_workflow_benchmarks(self):
+        """Function to get the benchmarks of each workflow in MSOrganiser for each input file type
+
+        Returns:
+            benchmark_list (list): list of [name, function, setup] of each benchmark
+
+        """
+        benchmark_list = []
+        for MS_FileType in MS_FILETYPE_LIST:
+            for Concatenate, concatenation in WORKFLOW_LAYOUT_DICT.items():
+                name = "MSOrganiser.run_MSOrganiser[" + MS_FileType + ", " + Concatenate + "]"
+                benchmark_list.append([name, self.__run_workflow, self.__get_workflow_setup(MS_FileType, Concatenate, concatenation)])
+        return benchmark_list
+
+    def __get_workflow_setup(self, MS_FileType, Concatenate, concatenation):
+        def setup():
+            [MS_FilePath_list, Annotation_FilePath] = self.get_dataset(MS_FileType, concatenation)
+            MS_Template.clear_workbook_cache()
+            Output_Directory = tempfile.mkdtemp(dir = self.data_directory, prefix = "output_")
+            return {"MS_Files" : MS_FilePath_list,
+                    "MS_FileType" : MS_FileType,
+                    "Output_Directory" : Output_Directory,
+                    "Output_Options" : WORKFLOW_OUTPUT_OPTIONS,
+                    "Annot_File" : Annotation_FilePath,
+                    "Output_Format" : "Excel",
+                    "Concatenate" : Concatenate,
+                    "Transpose_Results" : False,
+                    "Allow_Multiple_ISTD" : False,
+                    "Long_Table" : True,
+                    "Long_Table_Annot" : False,
+                    "Testing" : False,
+                    "Number_of_Workers" : 1,
+                    "Annot_Snapshot_Directory" : None}
+        return setup
+
+    def __run_workflow(self, stored_args):
+        #The workflows print their progress, and the concatenation workflows also log it
+        logger = logging.getLogger("MSBenchmark")
+        if not logger.handlers:
+            logger.addHandler(logging.NullHandler())
+            logger.propagate = False
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            MSOrganiser.run_MSOrganiser(stored_args, logger)
+
+    def get_function_benchmarks(self):
+        """Function to get the benchmarks of the hot functions in MSRawData, MSCalculate and MSDataOutput
+
+        Returns:
+            benchmark_list (list): list of [name, function, setup] of each benchmark
+
+        Note:
+            The MSCalculate and MSDataOutput benchmarks use the first Agilent Wide Table input file.
+            Their inputs are created once, outside of the timed runs.
+        """
+        benchmark_list = []
+
+        #Reading the input files and extracting the output options
+        for MS_FileType in MS_FILETYPE_LIST:
+            MSRawData_class = SciexMSRawData if MS_FileType == 'Multiquant Long Table in txt' else AgilentMSRawData
+            benchmark_list.append(["MSRawData." + MSRawData_class.__name__ + "[" + MS_FileType + "]",
+                                   self.__read_input_file, self.__get_input_file_setup(MS_FileType, read = False)])
+            benchmark_list.append(["MSRawData." + MSRawData_class.__name__ + ".get_tables[" + MS_FileType + "]",
+                                   lambda RawData : RawData.get_tables(['Area', 'RT']),
+                                   self.__get_input_file_setup(MS_FileType, read = True)])
+
+        #Normalisation and concentration calculation
+        benchmark_list.extend([
+            ["MSCalculate.ISTD_Operations.read_ISTD_map",
+             lambda argument : ISTD_Operations.read_ISTD_map(argument["Annotation_FilePath"], 'normConc by ISTD',
+                                                             doing_normalization = True),
+             self.__get_calculation_setup(clear_workbook_cache = True)],
+            ["MSCalculate.ISTD_Operations.read_Sample_Annot",
+             lambda argument : ISTD_Operations.read_Sample_Annot(argument["Annotation_FilePath"],
+                                                                 [os.path.basename(argument["MS_FilePath"])], 'normConc by ISTD'),
+             self.__get_calculation_setup(clear_workbook_cache = True)],
+            ["MSCalculate.ISTD_Operations.create_Transition_Name_dict",
+             lambda argument : ISTD_Operations.create_Transition_Name_dict(argument["Area_df"], argument["ISTD_map_df"]),
+             self.__get_calculation_setup()],
+            ["MSCalculate.ISTD_Operations.expand_Transition_Name_df",
+             lambda argument : ISTD_Operations.expand_Transition_Name_df(argument["Area_df"], argument["Transition_Name_dict"]),
+             self.__get_calculation_setup()],
+            ["MSCalculate.ISTD_Operations.normalise_by_ISTD",
+             lambda argument : ISTD_Operations.normalise_by_ISTD(argument["Area_df"], argument["Transition_Name_dict"]),
+             self.__get_calculation_setup()],
+            ["MSCalculate.ISTD_Operations.getConc_by_ISTD",
+             lambda argument : ISTD_Operations.getConc_by_ISTD(argument["norm_Area_df"], argument["ISTD_map_df"],
+                                                               argument["Sample_Annot_df"], output_intermediate_data = False),
+             self.__get_calculation_setup()]])
+
+        #Writing the results
+        benchmark_list.extend([
+            ["MSDataOutput.MSDataOutput.transpose_MSdata",
+             lambda argument : MSDataOutput.transpose_MSdata(argument["norm_Area_df"]),
+             self.__get_calculation_setup()],
+            ["MSDataOutput.MSDataOutput_Excel",
+             lambda argument : self.__write_results(MSDataOutput_Excel, argument),
+             self.__get_calculation_setup()],
+            ["MSDataOutput.MSDataOutput_csv",
+             lambda argument : self.__write_results(MSDataOutput_csv, argument),
+             self.__get_calculation_setup()]])
+
+        return benchmark_list
+
+    def __get_input_file_setup(self, MS_FileType, read = False):
+        def setup():
+            MS_FilePath = self.get_dataset(MS_FileType)[0][0]
+            if not read:
+                return [MS_FileType, MS_FilePath]
+            return self.__read_input_file([MS_FileType, MS_FilePath])
+        return setup
+
+    def __read_input_file(self, argument):
+        [MS_FileType, MS_FilePath] = argument
+        if MS_FileType == 'Multiquant Long Table in txt':
+            return SciexMSRawData(MS_FilePath, ingui = False)
+        return AgilentMSRawData(MS_FilePath, ingui = False)
+
+    def __get_calculation_setup(self, clear_workbook_cache = False):
+        def setup():
+            if self.__calculation_input is None:
+                self.__calculation_input = self.__create_calculation_input()
+            if clear_workbook_cache:
+                MS_Template.clear_workbook_cache()
+            return self.__calculation_input
+        return setup
+
+    def __create_calculation_input(self):
+        #Inputs of the MSCalculate and MSDataOutput functions, created the same way as MS_Analysis
+        [MS_FilePath_list, Annotation_FilePath] = self.get_dataset('Agilent Wide Table in csv')
+        MS_FilePath = MS_FilePath_list[0]
+        Area_df = AgilentMSRawData(MS_FilePath, ingui = False).get_table('Area')
+        ISTD_map_df = ISTD_Operations.read_ISTD_map(Annotation_FilePath, 'normConc by ISTD', doing_normalization = True)
+        Sample_Annot_df = ISTD_Operations.read_Sample_Annot(Annotation_FilePath, [os.path.basename(MS_FilePath)], 'normConc by ISTD')
+        [_, Transition_Name_dict] = ISTD_Operations.create_Transition_Name_dict(Area_df, ISTD_map_df)
+        [norm_Area_df, _] = ISTD_Operations.normalise_by_ISTD(Area_df, Transition_Name_dict)
+        return {"MS_FilePath" : MS_FilePath,
+                "Annotation_FilePath" : Annotation_FilePath,
+                "Area_df" : Area_df,
+                "ISTD_map_df" : ISTD_map_df,
+                "Sample_Annot_df" : Sample_Annot_df,
+                "Transition_Name_dict" : Transition_Name_dict,
+                "norm_Area_df" : norm_Area_df}
+
+    def __write_results(self, MSDataOutput_class, argument):
+        output_directory = tempfile.mkdtemp(dir = self.data_directory, prefix = "output_")
+        DfOutput = MSDataOutput_class(output_directory, argument["MS_FilePath"], result_name = "", ingui = False)
+        DfOutput.start_writer()
+        DfOutput.df_to_file("Area", argument["Area_df"])
+        DfOutput.df_to_file("normArea_by_ISTD", argument["norm_Area_df"], transpose = True)
+        if MSDataOutput_class is MSDataOutput_Excel:
+            DfOutput.end_writer()
+
+    def run(self, name_filter = None, print_progress = True):
+        """Function to run the benchmarks
+
+        Args:
+            name_filter (str): if given, only run the benchmarks with this text in their name
+            print_progress (bool): if True, print the result of each benchmark when it is done
+
+        Returns:
+            benchmark_result_list (list): the result of each benchmark given by measure, with its name.
+                                          Benchmarks in BENCHMARK_BUDGET_DICT also have their budget and whether it is exceeded
+
+        Note:
+            The workflows read the pdf report templates relative to the current directory,
+            so the benchmarks are run from the MSOrganiser directory.
+        """
+        benchmark_result_list = []
+        current_directory = os.getcwd()
+        os.chdir(PACKAGE_DIRECTORY)
+        try:
+            for [name, function, setup] in (self.get_startup_benchmarks() + self.get_function_benchmarks() + 
+                                            self.get_workflow_benchmarks()):
+                if name_filter and name_filter not in name:
+                    continue
+                result = self.measure(function, setup)
+                result["name"] = name
+                if name in BENCHMARK_BUDGET_DICT and "min_seconds" in result:
+                    result["budget_seconds"] = BENCHMARK_BUDGET_DICT[name]
+                    result["over_budget"] = result["min_seconds"] > result["budget_seconds"]
+                benchmark_result_list.append(result)
+                if print_progress:
+                    print(format_result(result), flush = True)
+        finally:
+            os.chdir(current_directory)
+        return benchmark_result_list
+
+def format_result(result):
+    """Function to show the result of a benchmark in one line
+
+    Args:
+        result (dict): the result of a benchmark given by MSBenchmark.run
+
+    Returns:
+        (str): the minimum and mean time and the peak memory of the benchmark, or its error message.
+               A benchmark that exceeds its budget is marked with the budget
+
+    """
+    if "error" in result:
+        return "{:<90} failed with {}".format(result["name"], result["error"])
+    peak_memory = "{:9.1f} MB".format(result["peak_memory_mb"]) if "peak_memory_mb" in result else ""
+    over_budget = "  over the budget of {:.3f} s".format(result["budget_seconds"]) if result.get("over_budget") else ""
+    return "{:<90} min {:9.3f} s  mean {:9.3f} s  {}{}".format(result["name"], result["min_seconds"],
+                                                                result["mean_seconds"], peak_memory, over_budget)
+
+def get_environment():
+    """Function to get the versions of MSOrganiser, Python, pandas and numpy, to store with the results
+
+    Returns:
+        environment (dict): the versions, the git commit of the MSOrganiser directory if there is one, and the date
+
+    """
+    try:
+        git_commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd = PACKAGE_DIRECTORY,
+                                    capture_output = True, text = True).stdout.strip() or None
+    except OSError:
+        git_commit = None
+    return {"msorganiser_version" : get_msorganiser_version(),
+            "git_commit" : git_commit,
+            "python_version" : platform.python_version(),
+            "pandas_version" : pd.__version__,
+            "numpy_version" : np.__version__,
+            "platform" : platform.platform(),
+            "date" : datetime.datetime.now().isoformat(timespec = "seconds")}
+
+def compare_results(benchmark_result_list, baseline_result_list):
+    """Function to compare the results of the benchmarks with the results of another version
+
+    Args:
+        benchmark_result_list (list): the results of MSBenchmark.run
+        baseline_result_list (list): the results of an earlier run, read from its json file
+
+    Returns:
+        comparison_df (pandas DataFrame): the minimum time and peak memory of each benchmark run in both,
+                                          with their ratio to the baseline. A time ratio below 1 is faster than the baseline
+
+    """
+    baseline_dict = {result["name"] : result for result in baseline_result_list}
+    comparison_list = []
+    for result in benchmark_result_list:
+        baseline = baseline_dict.get(result["name"])
+        if baseline is None or "error" in result or "error" in baseline:
+            continue
+        comparison = {"Benchmark" : result["name"],
+                      "Baseline_Seconds" : baseline["min_seconds"],
+                      "Seconds" : result["min_seconds"],
+                      "Time_Ratio" : result["min_seconds"] / baseline["min_seconds"]}
+        if "peak_memory_mb" in result and "peak_memory_mb" in baseline:
+            comparison["Baseline_Peak_Memory_MB"] = baseline["peak_memory_mb"]
+            comparison["Peak_Memory_MB"] = result["peak_memory_mb"]
+            comparison["Memory_Ratio"] = result["peak_memory_mb"] / baseline["peak_memory_mb"]
+        comparison_list.append(comparison)
+    return pd.DataFrame(comparison_list)
+
+def main(argv = None):
+    """Function to generate the datasets, run the benchmarks and store their results in a json file
+
+    Args:
+        argv (list): The command line arguments. Default is sys.argv[1:]
+
+    Note:
+        The program exits with sys.exit(-1) after the results are saved if a benchmark exceeds its budget in BENCHMARK_BUDGET_DICT.
+    """
+    parser = argparse.ArgumentParser(prog = 'MSBenchmark',
+                                     description = 'Time the workflows and hot functions of MSOrganiser on generated datasets.')
+    parser.add_argument('--Transitions', type = int, default = 200, help = 'Number of transitions in each dataset.')
+    parser.add_argument('--Samples', type = int, default = 100, help = 'Number of samples in each input file.')
+    parser.add_argument('--Files', type = int, default = 2, help = 'Number of input files in each dataset.')
+    parser.add_argument('--ISTD', type = int, default = 8, help = 'Number of ISTD among the transitions.')
+    parser.add_argument('--Qualifiers', type = int, default = 2,
+                        help = 'Maximum number of qualifiers of each analyte in Agilent Compound Table files.')
+    parser.add_argument('--Seed', type = int, default = 1, help = 'Seed of the generated values.')
+    parser.add_argument('--Repeat', type = int, default = 3, help = 'Number of timed runs of each benchmark.')
+    parser.add_argument('--No_Memory', action = 'store_true', help = 'Do not measure the peak memory with tracemalloc.')
+    parser.add_argument('--Filter', help = 'Only run the benchmarks with this text in their name.')
+    parser.add_argument('--Data_Directory', help = 'Directory to keep the generated datasets. Default is a temporary directory.')
+    parser.add_argument('--Results_Directory', default = os.path.join(PACKAGE_DIRECTORY, "benchmarks", "results"),
+                        help = 'Directory to save the json file of the results.')
+    parser.add_argument('--Compare', help = 'Json file of an earlier run to compare the results with.')
+    args = parser.parse_args(argv)
+
+    generator = MSDataGenerator(number_of_transitions = args.Transitions, number_of_samples = args.Samples,
+                                number_of_files = args.Files, number_of_istd = args.ISTD,
+                                number_of_qualifiers = args.Qualifiers, seed = args.Seed)
+
+    with contextlib.ExitStack() as stack:
+        data_directory = args.Data_Directory or stack.enter_context(tempfile.TemporaryDirectory(prefix = "MSBenchmark_"))
+        os.makedirs(data_directory, exist_ok = True)
+        benchmark_result_list = MSBenchmark(os.path.abspath(data_directory), generator,
+                                            repeat = args.Repeat, track_memory = not args.No_Memory).run(args.Filter)
+
+    environment = get_environment()
+    results = {"environment" : environment,
+               "parameters" : {"transitions" : args.Transitions, "samples" : args.Samples, "files" : args.Files,
+                               "istd" : args.ISTD, "qualifiers" : args.Qualifiers, "seed" : args.Seed,
+                               "repeat" : args.Repeat},
+               "benchmarks" : benchmark_result_list}
+    os.makedirs(args.Results_Directory, exist_ok = True)
+    results_filename = "MSBenchmark_" + environment["msorganiser_version"] + "_" + (environment["git_commit"] or "nogit") + \
+                       "_" + datetime.datetime.now().strftime("%Y%m%d_%H%M%S") + ".json"
+    results_filepath = os.path.join(args.Results_Directory, results_filename)
+    with open(results_filepath, "w") as results_file:
+        json.dump(results, results_file, indent = 2)
+    print("Results are saved in " + results_filepath, flush = True)
+
+    if args.Compare:
+        with open(args.Compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline["parameters"] != results["parameters"]:
+            print("The datasets of " + args.Compare + " have different parameters " + str(baseline["parameters"]), flush = True)
+        comparison_df = compare_results(benchmark_result_list, baseline["benchmarks"])
+        with pd.option_context("display.max_rows", None, "display.width", 250, "display.max_colwidth", 90):
+            print(comparison_df.to_string(index = False, float_format = "{:.3f}".format), flush = True)
+
+    over_budget_list = [result["name"] for result in benchmark_result_list if result.get("over_budget")]
+    if len(over_budget_list) > 0:
+        print("These benchmarks exceed their time budget: " + ", ".join(over_budget_list), flush = True)
+        sys.exit(-1)
+
+if __name__ == '__main__':
+    main()
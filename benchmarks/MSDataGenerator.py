@@ -0,0 +1,329 @@
+import os
+import numpy as np
+import pandas as pd
+
+MS_FILETYPE_EXTENSION = {'Agilent Wide Table in csv' : '.csv',
+                         'Agilent Compound Table in csv' : '.csv',
+                         'Multiquant Long Table in txt' : '.txt'}
+
+#Lipid classes used to give realistic transition names
+LIPID_CLASSES = ['LPC','PC','PE','Cer','SM','TG','DG','PI']
+
+#Sample types of the Sample_Annot sheet, in the order they are given to the samples
+SAMPLE_TYPES = ['Sample','Sample','Sample','QC','Sample','Sample','Sample','BQC','Sample','Sample','Sample','BLANK']
+
+class MSDataGenerator:
+    """
+    A class to generate synthetic input files and a matching MSTemplate annotation workbook at a given scale
+
+    Args:
+        number_of_transitions (int): number of transitions (analytes and ISTD) in the dataset
+        number_of_samples (int): number of samples in each input file
+        number_of_files (int): number of input files
+        number_of_istd (int): number of ISTD among the transitions
+        number_of_qualifiers (int): maximum number of qualifiers of each analyte in Agilent Compound Table files
+        missing_fraction (float): fraction of the values left empty
+        seed (int): seed of the random number generator, the same seed gives the same files
+
+    Note:
+        The transitions are named like lipids (e.g. "PC 12:3") and each ISTD is named "{lipid class} {chain}d7 (IS)".
+        Every analyte is normalised by the ISTD of its lipid class in the Transition_Name_Annot sheet.
+    """
+
+    def __init__(self, number_of_transitions = 200, number_of_samples = 100, number_of_files = 2,
+                 number_of_istd = 8, number_of_qualifiers = 2, missing_fraction = 0.01, seed = 1):
+        self.number_of_transitions = number_of_transitions
+        self.number_of_samples = number_of_samples
+        self.number_of_files = number_of_files
+        self.number_of_istd = max(1, min(number_of_istd, number_of_transitions - 1))
+        self.number_of_qualifiers = number_of_qualifiers
+        self.missing_fraction = missing_fraction
+        self.seed = seed
+
+        [self.Transition_Name_list, self.Transition_Name_ISTD_list] = self.__get_transition_names()
+
+        #Each analyte keeps the same number of qualifiers in every input file. ISTD have no qualifiers
+        rng = np.random.default_rng(seed)
+        self.Qualifier_Count_list = [0 if i < self.number_of_istd else int(rng.integers(0, number_of_qualifiers + 1))
+                                     for i in range(number_of_transitions)]
+
+    def __get_transition_names(self):
+        #Give each transition a unique lipid name. The ISTD come first
+        Transition_Name_list = []
+        Transition_Name_ISTD_list = []
+        for i in range(self.number_of_transitions):
+            lipid_class = LIPID_CLASSES[i % len(LIPID_CLASSES)]
+            position = i // len(LIPID_CLASSES)
+            if i < self.number_of_istd:
+                Transition_Name_list.append(lipid_class + " " + str(17 + position) + ":0d7 (IS)")
+            else:
+                Transition_Name_list.append(lipid_class + " " + str(10 + position // 7) + ":" + str(position % 7))
+
+        #Each analyte is normalised by an ISTD of the same lipid class when there is one
+        ISTD_list = Transition_Name_list[:self.number_of_istd]
+        for i, Transition_Name in enumerate(Transition_Name_list):
+            same_class_ISTD_list = [ISTD for j, ISTD in enumerate(ISTD_list) if j % len(LIPID_CLASSES) == i % len(LIPID_CLASSES)]
+            if same_class_ISTD_list:
+                Transition_Name_ISTD_list.append(same_class_ISTD_list[0])
+            else:
+                Transition_Name_ISTD_list.append(ISTD_list[i % len(ISTD_list)])
+
+        return [Transition_Name_list, Transition_Name_ISTD_list]
+
+    def get_file_layout(self, concatenation = None):
+        """Function to get the transitions and samples of each input file
+
+        Args:
+            concatenation (str): "columns" to give each input file the same samples and different transitions.
+                                 Otherwise each input file has all the transitions and different samples
+
+        Returns:
+            file_layout_list (list): list of [Transition_Name_list, Sample_Name_list] for each input file
+
+        Note:
+            When concatenating along columns, the ISTD are in the first input file
+        """
+        file_layout_list = []
+        for file_number in range(self.number_of_files):
+            if concatenation == "columns":
+                analyte_list = self.Transition_Name_list[self.number_of_istd:]
+                Transition_Name_list = list(np.array_split(np.array(analyte_list, dtype = object), self.number_of_files)[file_number])
+                if file_number == 0:
+                    Transition_Name_list = self.Transition_Name_list[:self.number_of_istd] + Transition_Name_list
+                Sample_Name_list = ["Sample_" + str(sample_number + 1).zfill(4)
+                                    for sample_number in range(self.number_of_samples)]
+            else:
+                Transition_Name_list = list(self.Transition_Name_list)
+                Sample_Name_list = ["File" + str(file_number + 1) + "_Sample_" + str(sample_number + 1).zfill(4)
+                                    for sample_number in range(self.number_of_samples)]
+            file_layout_list.append([Transition_Name_list, Sample_Name_list])
+        return file_layout_list
+
+    def generate_dataset(self, output_directory, MS_FileType = 'Agilent Wide Table in csv', concatenation = None):
+        """Function to write the input files and the annotation workbook of a dataset
+
+        Args:
+            output_directory (str): directory to write the files to. It is created if it does not exist
+            MS_FileType (str): 'Agilent Wide Table in csv', 'Agilent Compound Table in csv' or 'Multiquant Long Table in txt'
+            concatenation (str): "columns" to give each input file the same samples and different transitions. See get_file_layout
+
+        Returns:
+            (list): list containing:
+
+                * MS_FilePath_list (list): file paths of the input files
+                * Annotation_FilePath (str): file path of the annotation workbook
+
+        """
+        os.makedirs(output_directory, exist_ok = True)
+        file_name_prefix = MS_FileType.split(" in ")[0].replace(" ", "")
+        if concatenation:
+            file_name_prefix = file_name_prefix + "_" + concatenation
+
+        rng = np.random.default_rng(self.seed)
+        MS_FilePath_list = []
+        for file_number, [Transition_Name_list, Sample_Name_list] in enumerate(self.get_file_layout(concatenation)):
+            MS_FilePath = os.path.join(output_directory, file_name_prefix + str(file_number + 1) + MS_FILETYPE_EXTENSION[MS_FileType])
+            if MS_FileType == 'Agilent Wide Table in csv':
+                self.write_Agilent_Wide_Table(MS_FilePath, Transition_Name_list, Sample_Name_list, rng)
+            elif MS_FileType == 'Agilent Compound Table in csv':
+                self.write_Agilent_Compound_Table(MS_FilePath, Transition_Name_list, Sample_Name_list, rng)
+            elif MS_FileType == 'Multiquant Long Table in txt':
+                self.write_Multiquant_Long_Table(MS_FilePath, Transition_Name_list, Sample_Name_list, rng)
+            else:
+                raise ValueError("Unknown MS_FileType " + str(MS_FileType))
+            MS_FilePath_list.append(MS_FilePath)
+
+        Annotation_FilePath = os.path.join(output_directory, file_name_prefix + "_Annotation.xlsx")
+        self.write_Annotation_Workbook(Annotation_FilePath, MS_FilePath_list, concatenation,
+                                       with_qualifiers = MS_FileType == 'Agilent Compound Table in csv')
+
+        return [MS_FilePath_list, Annotation_FilePath]
+
+    def __get_values(self, rng, number_of_samples, Transition_Name_list):
+        #Values of each result, samples as rows and transitions as columns
+        number_of_transitions = len(Transition_Name_list)
+        is_ISTD = np.array([Transition_Name.endswith("(IS)") for Transition_Name in Transition_Name_list])
+        #ISTD have a larger and less variable area than the analytes
+        transition_level = np.where(is_ISTD, rng.uniform(12, 13, number_of_transitions), rng.uniform(6, 11, number_of_transitions))
+        Area = np.round(np.exp(transition_level + rng.normal(0, np.where(is_ISTD, 0.1, 0.4), (number_of_samples, number_of_transitions))))
+        RT = np.round(rng.uniform(1, 12, number_of_transitions) + rng.normal(0, 0.01, (number_of_samples, number_of_transitions)), 3)
+        FWHM = np.round(rng.uniform(0.05, 0.2, (number_of_samples, number_of_transitions)), 3)
+        SN = np.round(Area / rng.uniform(20, 200, (number_of_samples, number_of_transitions)), 1)
+        Symmetry = np.round(rng.uniform(0.7, 1.5, (number_of_samples, number_of_transitions)), 2)
+
+        #Leave some analyte values empty as if the peak was not found
+        is_missing = (rng.random((number_of_samples, number_of_transitions)) < self.missing_fraction) & ~is_ISTD
+        value_dict = {"Area" : Area, "RT" : RT, "FWHM" : FWHM, "S/N" : SN, "Symmetry" : Symmetry}
+        for values in value_dict.values():
+            values[is_missing] = np.nan
+        return value_dict
+
+    def __get_acquisition_times(self, number_of_samples):
+        #Samples are acquired every 12 minutes
+        acquisition_times = pd.date_range("2016-06-14 18:59", periods = number_of_samples, freq = "12min")
+        return [acquisition_time.strftime("%m/%d/%Y %H:%M").lstrip("0").replace("/0", "/") for acquisition_time in acquisition_times]
+
+    def write_Agilent_Wide_Table(self, MS_FilePath, Transition_Name_list, Sample_Name_list, rng):
+        """Function to write an Agilent MassHunter file in Wide Table form
+
+        Args:
+            MS_FilePath (str): file path of the csv file
+            Transition_Name_list (list): transitions of the file
+            Sample_Name_list (list): samples of the file
+            rng (object): numpy random number generator
+
+        """
+        field_list = ["Area", "FWHM", "RT", "S/N", "Symmetry"]
+        value_dict = self.__get_values(rng, len(Sample_Name_list), Transition_Name_list)
+
+        #Two header rows, the transitions with their results and the fields of each result
+        sample_field_list = ["", "", "Name", "Data File", "Type", "Level", "Acq. Date-Time"]
+        group_row = ["Sample"] + [""] * (len(sample_field_list) - 1)
+        field_row = list(sample_field_list)
+        for Transition_Name in Transition_Name_list:
+            group_row.extend([Transition_Name + " Results"] + [""] * (len(field_list) - 1))
+            field_row.extend(field_list)
+
+        Sample_df = pd.DataFrame({"Flag" : "!", "Blank" : "",
+                                  "Name" : [SAMPLE_TYPES[i % len(SAMPLE_TYPES)] for i in range(len(Sample_Name_list))],
+                                  "Data File" : [Sample_Name + ".d" for Sample_Name in Sample_Name_list],
+                                  "Type" : "Sample", "Level" : "",
+                                  "Acq. Date-Time" : self.__get_acquisition_times(len(Sample_Name_list))})
+
+        #Fields of a transition are next to each other
+        values = np.stack([value_dict[field] for field in field_list], axis = 2).reshape(len(Sample_Name_list), -1)
+        Value_df = pd.DataFrame(values)
+
+        with open(MS_FilePath, "w", newline = "", encoding = "utf-8") as MS_File:
+            pd.DataFrame([group_row, field_row]).to_csv(MS_File, header = False, index = False)
+            pd.concat([Sample_df, Value_df], axis = 1).to_csv(MS_File, header = False, index = False,
+                                                              float_format = "%.15g")
+
+    def write_Agilent_Compound_Table(self, MS_FilePath, Transition_Name_list, Sample_Name_list, rng):
+        """Function to write an Agilent MassHunter file in Compound Table form with qualifiers
+
+        Args:
+            MS_FilePath (str): file path of the csv file
+            Transition_Name_list (list): transitions of the file
+            Sample_Name_list (list): samples of the file
+            rng (object): numpy random number generator
+
+        Note:
+            Each row is a transition, followed by the samples one after another. Each analyte has up to
+            number_of_qualifiers qualifiers, written after the results of each sample. ISTD have no qualifiers.
+        """
+        result_field_list = ["Area", "RT", "FWHM", "S/N", "Symmetry"]
+        number_of_transitions = len(Transition_Name_list)
+        number_of_samples = len(Sample_Name_list)
+        value_dict = self.__get_values(rng, number_of_samples, Transition_Name_list)
+
+        #The precursor ion of each transition is unique so that the qualifier transitions are unique as well
+        transition_position = np.array([self.Transition_Name_list.index(Transition_Name) for Transition_Name in Transition_Name_list])
+        Precursor_Ion = np.char.mod("%.1f", 300 + 0.5 * transition_position)
+        Product_Ion = np.char.mod("%.1f", 184.1 + (transition_position % 50))
+        number_of_qualifiers = np.array([self.Qualifier_Count_list[position] for position in transition_position])
+        Qualifier_Area = np.round(value_dict["Area"][:, :, None] * rng.uniform(0.05, 0.5, (1, number_of_transitions, max(self.number_of_qualifiers, 1))))
+
+        group_row = ["Compound Method"] + [""] * 5
+        field_row = ["Cmpd. Group", "Name", "Transition", "Precursor Ion", "Product Ion", "Collision Energy"]
+        Compound_Method_block = np.column_stack([[Transition_Name.split(" ")[0] for Transition_Name in Transition_Name_list],
+                                                 Transition_Name_list,
+                                                 np.char.add(np.char.add(Precursor_Ion, " -> "), Product_Ion),
+                                                 Precursor_Ion, Product_Ion,
+                                                 rng.integers(5, 40, number_of_transitions).astype(str)]).astype(object)
+
+        acquisition_time_list = self.__get_acquisition_times(number_of_samples)
+        block_list = [Compound_Method_block]
+        for sample_number, Sample_Name in enumerate(Sample_Name_list):
+            group_row.extend([Sample_Name, ""] + [Sample_Name] * len(result_field_list))
+            field_row.extend(["Data File", "Acq. Date-Time"] + result_field_list)
+            Sample_block = np.empty((number_of_transitions, 2 + len(result_field_list)), dtype = object)
+            Sample_block[:, 0] = Sample_Name + ".d"
+            Sample_block[:, 1] = acquisition_time_list[sample_number]
+            for field_number, field in enumerate(result_field_list):
+                Sample_block[:, 2 + field_number] = value_dict[field][sample_number]
+            block_list.append(Sample_block)
+
+            for qualifier in range(1, self.number_of_qualifiers + 1):
+                group_row.extend(["Qualifier " + str(qualifier) + " Method", "", "", "Qualifier " + str(qualifier) + " Results"])
+                field_row.extend(["Fragmentor", "Transition", "Qualifier Name", "Area"])
+                Qualifier_block = np.full((number_of_transitions, 4), np.nan, dtype = object)
+                has_qualifier = number_of_qualifiers >= qualifier
+                Qualifier_block[has_qualifier, 0] = 380
+                Qualifier_block[has_qualifier, 1] = np.char.add(np.char.add(Precursor_Ion[has_qualifier], " -> "),
+                                                                np.char.mod("%.1f", 60.1 + 10 * qualifier + (transition_position[has_qualifier] % 50)))
+                Qualifier_block[has_qualifier, 3] = Qualifier_Area[sample_number, has_qualifier, qualifier - 1]
+                block_list.append(Qualifier_block)
+
+        with open(MS_FilePath, "w", newline = "", encoding = "utf-8") as MS_File:
+            pd.DataFrame([group_row, field_row]).to_csv(MS_File, header = False, index = False)
+            pd.DataFrame(np.concatenate(block_list, axis = 1)).to_csv(MS_File, header = False, index = False,
+                                                                      float_format = "%.15g")
+
+    def write_Multiquant_Long_Table(self, MS_FilePath, Transition_Name_list, Sample_Name_list, rng):
+        """Function to write a Sciex MultiQuant file in Long Table form
+
+        Args:
+            MS_FilePath (str): file path of the tab separated txt file
+            Transition_Name_list (list): transitions of the file
+            Sample_Name_list (list): samples of the file
+            rng (object): numpy random number generator
+
+        Note:
+            Each row is a sample and transition pair, with N/A for the values that are not found
+        """
+        value_dict = self.__get_values(rng, len(Sample_Name_list), Transition_Name_list)
+        Long_df = pd.DataFrame({"Sample Name" : np.repeat(np.array(Sample_Name_list, dtype = object), len(Transition_Name_list)),
+                                "Component Name" : np.tile(np.array(Transition_Name_list, dtype = object), len(Sample_Name_list)),
+                                "Area" : value_dict["Area"].ravel(),
+                                "Retention Time" : value_dict["RT"].ravel(),
+                                "Width at 50%" : value_dict["FWHM"].ravel(),
+                                "Signal / Noise" : value_dict["S/N"].ravel()})
+        Long_df.to_csv(MS_FilePath, sep = "\t", index = False, na_rep = "N/A", float_format = "%.15g")
+
+    def write_Annotation_Workbook(self, Annotation_FilePath, MS_FilePath_list, concatenation = None, with_qualifiers = False):
+        """Function to write an MSTemplate annotation workbook for the input files
+
+        Args:
+            Annotation_FilePath (str): file path of the xlsx file
+            MS_FilePath_list (list): file paths of the input files, in the order given by get_file_layout
+            concatenation (str): "columns" if the input files have the same samples and different transitions
+            with_qualifiers (bool): if True, the qualifiers of the Agilent Compound Table files are normalised by the ISTD of their transition
+
+        Note:
+            The workbook has the Transition_Name_Annot, ISTD_Annot and Sample_Annot sheets laid out like the MSTemplate_Creator workbook
+        """
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+
+        worksheet = workbook.active
+        worksheet.title = "Transition_Name_Annot"
+        worksheet.append(["Transition_Name", "Transition_Name_ISTD"])
+        for i, [Transition_Name, Transition_Name_ISTD] in enumerate(zip(self.Transition_Name_list, self.Transition_Name_ISTD_list)):
+            worksheet.append([Transition_Name, Transition_Name_ISTD])
+            if with_qualifiers:
+                #Same qualifier transitions as write_Agilent_Compound_Table
+                for qualifier in range(1, self.Qualifier_Count_list[i] + 1):
+                    worksheet.append(["Qualifier (" + "%.1f" % (300 + 0.5 * i) + " -> " + "%.1f" % (60.1 + 10 * qualifier + (i % 50)) + ")",
+                                      Transition_Name_ISTD])
+
+        worksheet = workbook.create_sheet("ISTD_Annot")
+        worksheet.append(["ISTD_Table "])
+        worksheet.append(["Transition_Name_ISTD", "ISTD_Concentration", None, None, None, "Custom_Unit"])
+        worksheet.append([None, "ISTD_Conc_[ng/mL]", "ISTD_[MW]", "to", "ISTD_Conc_[nM]", "[uM] or [pmol/uL]"])
+        for i, Transition_Name_ISTD in enumerate(self.Transition_Name_list[:self.number_of_istd]):
+            ISTD_Conc_ng_per_mL = 50 + 10 * i
+            ISTD_MW = 0.5 + 0.01 * i
+            ISTD_Conc_nM = ISTD_Conc_ng_per_mL / ISTD_MW * 1000
+            worksheet.append([Transition_Name_ISTD, ISTD_Conc_ng_per_mL, ISTD_MW, None, ISTD_Conc_nM, ISTD_Conc_nM / 1000])
+
+        worksheet = workbook.create_sheet("Sample_Annot")
+        worksheet.append(["Data_File_Name", "Merge_Status", "Sample_Name", "Sample_Type", "Sample_Amount",
+                          "Sample_Amount_Unit", "ISTD_Mixture_Volume_[uL]", "Concentration_Unit"])
+        for MS_FilePath, [_, Sample_Name_list] in zip(MS_FilePath_list, self.get_file_layout(concatenation)):
+            for i, Sample_Name in enumerate(Sample_Name_list):
+                worksheet.append([os.path.basename(MS_FilePath), "Valid", Sample_Name, SAMPLE_TYPES[i % len(SAMPLE_TYPES)],
+                                  10, "uL", 100, "pmol/uL"])
+
+        workbook.save(Annotation_FilePath)
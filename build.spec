@@ -41,6 +41,8 @@ pyphen_dictionaries = Tree(os.path.join(pyphen_root, 'dictionaries'), prefix = '
 
 etc_toc = Tree(os.path.join(os.getcwd(),'etc'), prefix = 'etc' )
 extras_toc = Tree(os.path.join(os.getcwd(),'msreport'), prefix = 'msreport' )
+#NEWS.md gives the MSOrganiser version kept in the annotation snapshot
+news_toc = [('NEWS.md', os.path.join(os.getcwd(),'NEWS.md'), 'DATA')]
 #print(extras_toc)
 
 a = Analysis(['MSOrganiser.py'],
@@ -69,6 +71,7 @@ exe = EXE(pyz,
 		  pyphen_dictionaries,
           etc_toc,
 		  extras_toc,
+		  news_toc,
           name='MSOrganiser',
           debug=False,
           strip=None,
@@ -17,6 +17,7 @@ import sys
 # sys.path.insert(0, os.path.abspath('.'))
 sys.path.append(os.path.abspath('../..'))
 sys.path.append(os.path.abspath('../../tests'))
+sys.path.append(os.path.abspath('../../benchmarks'))
 
 
 
@@ -0,0 +1,129 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+import pandas as pd
+import numpy as np
+from MSRawData import AgilentMSRawData
+from MSRawData import SciexMSRawData
+from MSCalculate import ISTD_Operations
+
+BENCHMARK_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+sys.path.insert(0, BENCHMARK_DIRECTORY)
+
+from MSDataGenerator import MSDataGenerator
+from MSBenchmark import MSBenchmark
+from MSBenchmark import compare_results
+from MSBenchmark import format_result
+from MSBenchmark import IMPORT_TIME_BUDGET
+from MSBenchmark import BENCHMARK_BUDGET_DICT
+
+class Benchmark_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = MSDataGenerator(number_of_transitions = 30, number_of_samples = 12,
+                                         number_of_files = 2, number_of_istd = 4,
+                                         number_of_qualifiers = 2, missing_fraction = 0.05)
+        self.temporary_directory = tempfile.TemporaryDirectory()
+
+    def test_generate_dataset(self):
+        """Check if the generated input files and annotation workbooks can be read and normalised
+
+        * Each input file has the transitions and samples given by MSDataGenerator.get_file_layout
+        * When concatenating along columns, the input files share the samples and together have every transition
+        * Every transition, including the qualifiers of Agilent Compound Table files, is normalised by its ISTD
+        """
+
+        for MS_FileType in ['Agilent Wide Table in csv', 'Agilent Compound Table in csv', 'Multiquant Long Table in txt']:
+            for concatenation in [None, "columns"]:
+                [MS_FilePath_list, Annotation_FilePath] = self.generator.generate_dataset(self.temporary_directory.name,
+                                                                                          MS_FileType, concatenation)
+                self.assertEqual(len(MS_FilePath_list), 2)
+                ISTD_map_df = ISTD_Operations.read_ISTD_map(Annotation_FilePath, 'normArea by ISTD',
+                                                            doing_normalization = True)
+
+                Transition_Name_list = []
+                Area_df_list = []
+                for MS_FilePath, [layout_Transition_Name_list, layout_Sample_Name_list] in zip(MS_FilePath_list,
+                                                                                               self.generator.get_file_layout(concatenation)):
+                    if MS_FileType == 'Multiquant Long Table in txt':
+                        Area_df = SciexMSRawData(MS_FilePath, ingui = False).get_table('Area')
+                    else:
+                        Area_df = AgilentMSRawData(MS_FilePath, ingui = False).get_table('Area')
+
+                    self.assertEqual(Area_df["Sample_Name"].tolist(), layout_Sample_Name_list)
+                    analyte_list = [column for column in Area_df.columns[1:] if not column.startswith("Qualifier")]
+                    self.assertEqual(sorted(analyte_list), sorted(layout_Transition_Name_list))
+                    Transition_Name_list.extend(analyte_list)
+                    Area_df_list.append(Area_df)
+
+                if concatenation == "columns":
+                    self.assertEqual(sorted(Transition_Name_list), sorted(self.generator.Transition_Name_list))
+                    #The ISTD are only in the first input file, so the files are normalised together
+                    Area_df_list = [pd.merge(Area_df_list[0], Area_df_list[1], on = "Sample_Name")]
+                else:
+                    self.assertEqual(sorted(Transition_Name_list), sorted(self.generator.Transition_Name_list * 2))
+
+                for Area_df in Area_df_list:
+                    [_, Transition_Name_dict] = ISTD_Operations.create_Transition_Name_dict(Area_df, ISTD_map_df)
+                    self.assertEqual(sorted(Transition_Name_dict), sorted(Area_df.columns[1:]))
+                    [norm_Area_df, _] = ISTD_Operations.normalise_by_ISTD(Area_df, Transition_Name_dict)
+                    self.assertTrue(norm_Area_df.iloc[:, 1:].notna().any().all())
+
+                    #The ISTD normalised by themselves are always 1
+                    ISTD_list = [column for column in Area_df.columns[1:] if column.endswith("(IS)")]
+                    self.assertTrue(np.allclose(norm_Area_df[ISTD_list].to_numpy(dtype = float), 1))
+
+    def test_measure(self):
+        """Check if the benchmarks are timed and compared with an earlier run
+
+        * MSBenchmark.measure gives the time of each run and the peak memory
+        * A function that exits with sys.exit(-1) is reported as failed instead of stopping the benchmarks
+        * compare_results gives the ratio of the minimum time to the baseline
+        """
+
+        benchmark = MSBenchmark(self.temporary_directory.name, self.generator, repeat = 2, track_memory = True)
+        result = benchmark.measure(lambda argument : np.ones(argument), setup = lambda : 1000)
+        self.assertEqual(len(result["times"]), 2)
+        self.assertEqual(result["min_seconds"], min(result["times"]))
+        self.assertGreater(result["peak_memory_mb"], 0)
+        self.assertNotIn("error", result)
+
+        failed_result = benchmark.measure(lambda argument : sys.exit(-1))
+        self.assertEqual(failed_result["error"], "SystemExit: -1")
+        self.assertNotIn("min_seconds", failed_result)
+
+        result["name"] = "ones"
+        baseline_result = dict(result, min_seconds = result["min_seconds"] * 2)
+        comparison_df = compare_results([result], [baseline_result])
+        self.assertEqual(comparison_df["Benchmark"].tolist(), ["ones"])
+        self.assertAlmostEqual(comparison_df["Time_Ratio"].iloc[0], 0.5)
+
+    def test_startup_benchmark(self):
+        """Check if the time to import MSOrganiser is one of the benchmarks
+
+        * The import is timed in a new python process and does not fail
+        * The import time is compared with IMPORT_TIME_BUDGET
+        * A benchmark that exceeds its budget is flagged
+        """
+
+        benchmark = MSBenchmark(self.temporary_directory.name, self.generator, repeat = 1, track_memory = False)
+        benchmark_result_list = benchmark.run(name_filter = "MSOrganiser.import", print_progress = False)
+        self.assertEqual([result["name"] for result in benchmark_result_list], ["MSOrganiser.import"])
+        result = benchmark_result_list[0]
+        self.assertNotIn("error", result)
+        self.assertGreater(result["min_seconds"], 0)
+        self.assertEqual(result["budget_seconds"], IMPORT_TIME_BUDGET)
+        self.assertEqual(result["over_budget"], result["min_seconds"] > IMPORT_TIME_BUDGET)
+
+        with patch.dict(BENCHMARK_BUDGET_DICT, {"MSOrganiser.import" : 0}):
+            result = benchmark.run(name_filter = "MSOrganiser.import", print_progress = False)[0]
+        self.assertTrue(result["over_budget"])
+        self.assertIn("over the budget of 0.000 s", format_result(result))
+
+    def tearDown(self):
+        self.temporary_directory.cleanup()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import unittest
+import os
+import json
+import tempfile
+from unittest.mock import patch
+import MSCommandLine
+
+NO_ANNOT_FILE_JSONFILENAME = os.path.join(os.path.dirname(__file__),"testdata",
+                                          "test_bad_input", 'No_Annot_File.json')
+
+WIDETABLEFORMROW1_FILENAME = os.path.join(os.path.dirname(__file__),"testdata",
+                                          "test_no_concatenate", 'WideTableFormRow1.csv')
+
+WIDETABLEFORMROW2_FILENAME = os.path.join(os.path.dirname(__file__),"testdata",
+                                          "test_no_concatenate", 'WideTableFormRow2.csv')
+
+WIDETABLEFORMROW_ANNOTATION = os.path.join(os.path.dirname(__file__),"testdata",
+                                           "test_no_concatenate", 'WideTableFormRow_Annotation.xlsx')
+
+class CommandLine_Test(unittest.TestCase):
+
+    def test_parse_args(self):
+        """Check if the software reads the input parameters from the command line and a json config file
+
+        * Input files given as one string separated by ";" in the config file are split into a list
+        * Options given on the command line replace the values of the config file
+        * True or False strings are converted to boolean
+        * The config file is not written
+        """
+
+        stored_args = {"MS_Files" : WIDETABLEFORMROW1_FILENAME + ";" + WIDETABLEFORMROW2_FILENAME,
+                       "MS_FileType" : "Agilent Wide Table in csv",
+                       "Output_Directory" : "Config_Output_Directory",
+                       "Output_Options" : ["Area", "normArea by ISTD"],
+                       "Annot_File" : WIDETABLEFORMROW_ANNOTATION,
+                       "Output_Format" : "Excel",
+                       "Concatenate" : "No Concatenate",
+                       "Transpose_Results" : "True",
+                       "Allow_Multiple_ISTD" : False,
+                       "Long_Table" : "False",
+                       "Long_Table_Annot" : "False"}
+
+        with tempfile.TemporaryDirectory() as config_directory:
+            config_file = os.path.join(config_directory, "config.json")
+            with open(config_file, 'w') as data_file:
+                json.dump(stored_args, data_file)
+
+            stored_args = MSCommandLine.parse_MSOrganiser_args(["--Config", config_file,
+                                                                "--Output_Directory", "Output_Directory",
+                                                                "--Output_Format", "csv",
+                                                                "--Long_Table", "True",
+                                                                "--Number_of_Workers", "4"])
+
+            self.assertEqual(os.listdir(config_directory), ["config.json"])
+
+        self.assertEqual(stored_args["MS_Files"], [WIDETABLEFORMROW1_FILENAME, WIDETABLEFORMROW2_FILENAME])
+        self.assertEqual(stored_args["Output_Directory"], "Output_Directory")
+        self.assertEqual(stored_args["Output_Options"], ["Area", "normArea by ISTD"])
+        self.assertEqual(stored_args["Output_Format"], "csv")
+        self.assertEqual(stored_args["Concatenate"], "No Concatenate")
+        self.assertEqual(stored_args["Number_of_Workers"], 4)
+        self.assertIs(stored_args["Transpose_Results"], True)
+        self.assertIs(stored_args["Allow_Multiple_ISTD"], False)
+        self.assertIs(stored_args["Long_Table"], True)
+        self.assertIs(stored_args["Long_Table_Annot"], False)
+        self.assertIs(stored_args["Testing"], False)
+
+        #Without a config file, every option is given on the command line
+        stored_args = MSCommandLine.parse_MSOrganiser_args(["--MS_Files", WIDETABLEFORMROW1_FILENAME,
+                                                            "--Output_Directory", "Output_Directory",
+                                                            "--Output_Options", "Area", "RT"])
+        self.assertEqual(stored_args["MS_Files"], [WIDETABLEFORMROW1_FILENAME])
+        self.assertEqual(stored_args["MS_FileType"], "Agilent Wide Table in csv")
+        self.assertEqual(stored_args["Output_Options"], ["Area", "RT"])
+        self.assertEqual(stored_args["Output_Format"], "Excel")
+        self.assertEqual(stored_args["Number_of_Workers"], 1)
+        self.assertIs(stored_args["Transpose_Results"], False)
+
+    def test_invalid_args(self):
+        """Check if the software exits when an input parameter needed to run MSOrganiser is missing
+
+        * No annotation file when normArea by ISTD is selected
+        * No input MS file
+        """
+
+        # Replace the print function in MSCommandLine.py file to a mock
+        self.patcher = patch('MSCommandLine.print')
+        mock_print = self.patcher.start()
+
+        with self.assertRaises(SystemExit) as cm:
+            stored_args = MSCommandLine.parse_MSOrganiser_args(["--Config", NO_ANNOT_FILE_JSONFILENAME])
+
+        # Ensure that the system ends with a -1 to indicate an error
+        self.assertEqual(cm.exception.code, -1)
+
+        # Ensure that the error was due to no annotation file input
+        mock_print.assert_called_with("Please key in an annotation file when \'normArea by ISTD\' " +
+                                      "or \'normConc by ISTD\' are selected in Output_Options.",
+                                      flush = True)
+
+        with self.assertRaises(SystemExit) as cm:
+            stored_args = MSCommandLine.parse_MSOrganiser_args(["--Output_Directory", "Output_Directory",
+                                                                "--Output_Options", "Area"])
+
+        self.assertEqual(cm.exception.code, -1)
+        mock_print.assert_called_with('Please key in at least one input MS file.',
+                                      flush = True)
+
+    def test_invalid_config(self):
+        """Check if the software exits when a value in the json config file is not one of the choices of the option
+
+        * MS_FileType, Output_Options, Output_Format and Concatenate that are not in their choices
+        * Transpose_Results, Allow_Multiple_ISTD, Long_Table and Long_Table_Annot that are not True or False
+        """
+
+        valid_stored_args = {"MS_Files" : WIDETABLEFORMROW1_FILENAME,
+                             "MS_FileType" : "Agilent Wide Table in csv",
+                             "Output_Directory" : "Output_Directory",
+                             "Output_Options" : ["Area"],
+                             "Output_Format" : "Excel",
+                             "Concatenate" : "No Concatenate",
+                             "Transpose_Results" : False,
+                             "Allow_Multiple_ISTD" : "False",
+                             "Long_Table" : "False",
+                             "Long_Table_Annot" : "False"}
+
+        invalid_value_list = [["MS_FileType", "Agilent Wide Table in xlsx", "Agilent Wide Table in xlsx"],
+                              ["Output_Options", ["Area", "Bogus"], "Bogus"],
+                              ["Output_Options", "Area", "Area"],
+                              ["Output_Format", "xls", "xls"],
+                              ["Concatenate", "Concatenate sideways", "Concatenate sideways"],
+                              ["Transpose_Results", "yes", "yes"],
+                              ["Long_Table", 1, "1"]]
+
+        self.patcher = patch('MSCommandLine.print')
+        mock_print = self.patcher.start()
+
+        with tempfile.TemporaryDirectory() as config_directory:
+            config_file = os.path.join(config_directory, "config.json")
+            for [arg_name, invalid_value, current_input] in invalid_value_list:
+                with open(config_file, 'w') as data_file:
+                    json.dump(dict(valid_stored_args, **{arg_name : invalid_value}), data_file)
+
+                with self.assertRaises(SystemExit) as cm:
+                    MSCommandLine.parse_MSOrganiser_args(["--Config", config_file])
+                self.assertEqual(cm.exception.code, -1)
+                mock_print.assert_called_with("Invalid " + arg_name + " in config file " + config_file + ". " +
+                                              "Choose from " + ", ".join(MSCommandLine.CONFIG_CHOICES[arg_name]) + ". " +
+                                              "Current input is " + current_input,
+                                              flush = True)
+
+            # The valid config file is read
+            with open(config_file, 'w') as data_file:
+                json.dump(valid_stored_args, data_file)
+            stored_args = MSCommandLine.parse_MSOrganiser_args(["--Config", config_file])
+            self.assertEqual(stored_args["Output_Options"], ["Area"])
+            self.assertIs(stored_args["Transpose_Results"], False)
+
+    def tearDown(self):
+        if hasattr(self, 'patcher'):
+            self.patcher.stop()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,14 @@
 import unittest
 from unittest.mock import patch
 import os
+import tempfile
 import pandas as pd
 import openpyxl
 from MSOrganiser import concatenate_along_columns_workflow
+from MSOrganiser import get_concatenated_Long_Table
+from MSOrganiser import output_concatenated_long_table
+from MSLongTable import ConcatenatedLongTableBuilder
+from MSRawData import AgilentMSRawData
 from MSDataOutput import MSDataOutput
 
 # Note that for these widetableform column files, each column file may not necessarily have the ISTD
@@ -27,6 +32,9 @@ WIDETABLEFORMCOLUMN_MULTIPLEISTD_CONCATENATERESULTS_LONGTABLE_FILENAME = os.path
 WIDETABLEFORMCOLUMN_MULTIPLEISTD_CONCATENATERESULTS_LONGTABLE_WITH_ANNOT_FILENAME = os.path.join(os.path.dirname(__file__),"testdata", 
                                                                                     "test_concatenate_column_multipleISTD", 
                                                                                     "WideTableFormColumn_Concatenate_LongTable_with_Annot.xlsx")
+WIDETABLEFORMCOLUMN_MULTIPLEISTD_CONCATENATERESULTS_LONGTABLE_WITH_ANNOT_CSV_FILENAME = os.path.join(os.path.dirname(__file__),"testdata", 
+                                                                                        "test_concatenate_column_multipleISTD", 
+                                                                                        "WideTableFormColumn_Concatenate_LongTable_with_Annot.csv")
 
 WIDETABLEFORMCOLUMN1_FILENAME = os.path.join(os.path.dirname(__file__),"testdata", 
                                              "test_concatenate_column", "WideTableFormColumn1.csv")
@@ -114,7 +122,8 @@ class Concatenation_By_Column_Test(unittest.TestCase):
                                           sheet_name = "Long_Table",
                                           allow_multiple_istd = False)
         ExcelData_df = ExcelData_df.fillna('')
-        self.__compare_df(concatenate_df_list[data_index],ExcelData_df)
+        Long_Table_df = get_concatenated_Long_Table(stored_args, concatenate_df_list[data_index])
+        self.__compare_df(Long_Table_df,ExcelData_df)
 
     def test_concatenate_by_columns_LongTable_with_Annot(self):
         """Check if the software is able to from the two input raw data with same samples but different transitions
@@ -145,7 +154,38 @@ class Concatenation_By_Column_Test(unittest.TestCase):
                                           sheet_name = "Long_Table",
                                           allow_multiple_istd = False)
         ExcelData_df = ExcelData_df.fillna('')
-        self.__compare_df(concatenate_df_list[data_index],ExcelData_df)
+        Long_Table_df = get_concatenated_Long_Table(stored_args, concatenate_df_list[data_index])
+        self.__compare_df(Long_Table_df,ExcelData_df)
+
+    def test_concatenate_by_columns_parsed_once(self):
+        """Check if the software reads each of the two input raw data only once when
+
+        * Extracting the Area and RT and concatenating by column
+        * Calculating the normalised Area and concentation using the concatenated Area
+        * Creating a Long Table with Annotation
+
+        """
+        stored_args = {
+            'MS_Files': [WIDETABLEFORMCOLUMN1_FILENAME, WIDETABLEFORMCOLUMN2_FILENAME], 
+            'MS_FileType': 'Agilent Wide Table in csv', 
+            'Output_Directory': 'D:\\MSOrganiser', 
+            'Output_Options': ['Area', 'RT', 'normArea by ISTD', 'normConc by ISTD'], 
+            'Annot_File': WIDETABLEFORMCOLUMN_ANNOTATION, 
+            'Output_Format': 'Excel', 
+            'Concatenate': 'Concatenate along Transition Name (columns)', 
+            'Transpose_Results': False, 
+            'Allow_Multiple_ISTD': False, 
+            'Long_Table': True, 
+            'Long_Table_Annot': True, 
+            'Testing': False
+            }
+
+        mock_print = self.patcher.start()
+
+        with patch('MSAnalysis.AgilentMSRawData', wraps = AgilentMSRawData) as mock_rawdata:
+            [PDFReport, concatenate_df_list, concatenate_df_sheet_name] = concatenate_along_columns_workflow(stored_args,testing = True)
+            get_concatenated_Long_Table(stored_args, concatenate_df_list[concatenate_df_sheet_name.index("Long_Table")])
+            self.assertEqual(mock_rawdata.call_count, 2)
 
     def test_concatenate_by_columns_transpose(self):
         """Check if the software is able to from the two input raw data with same samples but different transitions
@@ -269,7 +309,8 @@ class Concatenation_By_Column_Test(unittest.TestCase):
                                           sheet_name = "Long_Table",
                                           allow_multiple_istd = True)
         ExcelData_df = ExcelData_df.fillna('')
-        self.__compare_df(concatenate_df_list[data_index],ExcelData_df)
+        Long_Table_df = get_concatenated_Long_Table(stored_args, concatenate_df_list[data_index])
+        self.__compare_df(Long_Table_df,ExcelData_df)
 
     def test_concatenate_by_columns_multiple_ISTD_LongTable_with_Annot(self):
         """Check if the software is able to from the two input raw data with same samples but different transitions
@@ -309,7 +350,43 @@ class Concatenation_By_Column_Test(unittest.TestCase):
                                           sheet_name = "Long_Table",
                                           allow_multiple_istd = True)
         ExcelData_df = ExcelData_df.fillna('')
-        self.__compare_df(concatenate_df_list[data_index],ExcelData_df)
+        Long_Table_df = get_concatenated_Long_Table(stored_args, concatenate_df_list[data_index])
+        self.__compare_df(Long_Table_df,ExcelData_df)
+
+    def test_concatenate_by_columns_multiple_ISTD_LongTable_with_Annot_csv(self):
+        """Check if the software is able to from the two input raw data with same samples but different transitions
+
+        * Extract the Area and RT and concatenate by column
+        * Calculate the normalised Area and concentation using the concatenated Area and multiple ISTD
+        * Write the Long Table with Annotation to a csv file from the concatenated data, one input file at a time
+        * The csv file is the same as the one written by merging the Long Table of each input file
+
+        """
+        with tempfile.TemporaryDirectory() as output_directory:
+            stored_args = {
+                'MS_Files': [WIDETABLEFORMCOLUMN1_MULTIPLEISTD_FILENAME, WIDETABLEFORMCOLUMN2_MULTIPLEISTD_FILENAME], 
+                'MS_FileType': 'Agilent Wide Table in csv', 
+                'Output_Directory': output_directory, 
+                'Output_Options': ['Area', 'RT', 'normArea by ISTD', 'normConc by ISTD'], 
+                'Annot_File': WIDETABLEFORMCOLUMN_MULTIPLEISTD_ANNOTATION, 
+                'Output_Format': 'csv', 
+                'Concatenate': 'Concatenate along Transition Name (columns)', 
+                'Transpose_Results': False, 
+                'Allow_Multiple_ISTD': True, 
+                'Long_Table': True, 
+                'Long_Table_Annot': True, 
+                'Testing': False
+                }
+
+            mock_print = self.patcher.start()
+
+            [PDFReport, concatenate_df_list, concatenate_df_sheet_name] = concatenate_along_columns_workflow(stored_args,testing = True)
+            data_index = concatenate_df_sheet_name.index("Long_Table")
+            self.assertIsInstance(concatenate_df_list[data_index], ConcatenatedLongTableBuilder)
+            output_concatenated_long_table(stored_args, concatenate_df_list, concatenate_df_sheet_name)
+            with open(os.path.join(output_directory, "Concatenated_Long_Table_with_Annot.csv")) as long_table_file:
+                with open(WIDETABLEFORMCOLUMN_MULTIPLEISTD_CONCATENATERESULTS_LONGTABLE_WITH_ANNOT_CSV_FILENAME) as expected_file:
+                    self.assertEqual(long_table_file.read(), expected_file.read())
 
     def test_concatenate_by_columns_multiple_ISTD_transpose(self):
         """Check if the software is able to from the two input raw data with same samples but different transitions
@@ -369,6 +446,40 @@ class Concatenation_By_Column_Test(unittest.TestCase):
 
                 self.__compare_df(concatenate_df_list[data_index],ExcelData_df)
 
+    def test_concatenate_by_columns_parallel(self):
+        """Check if the software gives the same results from the two input raw data
+
+        * When the files are read one after another
+        * When the files are read in a pool of two workers
+
+        """
+        stored_args = {
+            'MS_Files': [WIDETABLEFORMCOLUMN1_FILENAME, WIDETABLEFORMCOLUMN2_FILENAME], 
+            'MS_FileType': 'Agilent Wide Table in csv', 
+            'Output_Directory': 'D:\\MSOrganiser', 
+            'Output_Options': ['Area', 'normArea by ISTD', 'normConc by ISTD'], 
+            'Annot_File': WIDETABLEFORMCOLUMN_ANNOTATION, 
+            'Output_Format': 'Excel', 
+            'Concatenate': 'Concatenate along Transition Name (columns)', 
+            'Transpose_Results': False, 
+            'Allow_Multiple_ISTD': False, 
+            'Long_Table': True, 
+            'Long_Table_Annot': False, 
+            'Testing': False
+            }
+        [PDFReport, concatenate_df_list, concatenate_df_sheet_name] = concatenate_along_columns_workflow(stored_args,testing = True)
+
+        stored_args['Number_of_Workers'] = 2
+        [PDFReport, parallel_concatenate_df_list, parallel_concatenate_df_sheet_name] = concatenate_along_columns_workflow(stored_args,testing = True)
+
+        self.assertEqual(concatenate_df_sheet_name, parallel_concatenate_df_sheet_name)
+        for data_index in range(len(concatenate_df_list)):
+            if concatenate_df_sheet_name[data_index] == "Long_Table":
+                pd.testing.assert_frame_equal(get_concatenated_Long_Table(stored_args, concatenate_df_list[data_index]),
+                                              get_concatenated_Long_Table(stored_args, parallel_concatenate_df_list[data_index]))
+            else:
+                pd.testing.assert_frame_equal(concatenate_df_list[data_index], parallel_concatenate_df_list[data_index])
+
     def __compare_df(self,MSData_df,ExcelData_df):
         MSData_df = MSData_df.apply(pd.to_numeric, errors='ignore', downcast = 'float')
         ExcelData_df = ExcelData_df.apply(pd.to_numeric, errors='ignore', downcast = 'float')
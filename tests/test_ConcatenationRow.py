@@ -1,9 +1,14 @@
 import unittest
 from unittest.mock import patch
 import os
+import tempfile
 import pandas as pd
 import openpyxl
 from MSOrganiser import concatenate_along_rows_workflow
+from MSOrganiser import get_concatenated_Long_Table
+from MSOrganiser import output_concatenated_long_table
+from MSLongTable import ConcatenatedLongTableBuilder
+from MSRawData import AgilentMSRawData
 from MSDataOutput import MSDataOutput
 
 WIDETABLEFORMROW1_MULTIPLEISTD_FILENAME = os.path.join(os.path.dirname(__file__),"testdata", 
@@ -35,6 +40,8 @@ WIDETABLEFORMROW_CONCATENATERESULTS_LONGTABLE_FILENAME = os.path.join(os.path.di
                                                                       "test_concatenate_row", "WideTableFormRow_Concatenate_LongTable.xlsx")
 WIDETABLEFORMROW_CONCATENATERESULTS_LONGTABLE_WITH_ANNOT_FILENAME = os.path.join(os.path.dirname(__file__),"testdata", 
                                                                                  "test_concatenate_row", "WideTableFormRow_Concatenate_LongTable_with_Annot.xlsx")
+WIDETABLEFORMROW_CONCATENATERESULTS_LONGTABLE_WITH_ANNOT_CSV_FILENAME = os.path.join(os.path.dirname(__file__),"testdata", 
+                                                                                     "test_concatenate_row", "WideTableFormRow_Concatenate_LongTable_with_Annot.csv")
 
 
 class Concatenation_By_Row_Test(unittest.TestCase):
@@ -103,7 +110,8 @@ class Concatenation_By_Row_Test(unittest.TestCase):
                                           sheet_name = "Long_Table",
                                           allow_multiple_istd = False)
         ExcelData_df = ExcelData_df.fillna('')
-        self.__compare_df(concatenate_df_list[data_index],ExcelData_df)
+        Long_Table_df = get_concatenated_Long_Table(stored_args, concatenate_df_list[data_index])
+        self.__compare_df(Long_Table_df,ExcelData_df)
 
     def test_concatenate_by_rows_LongTable_with_Annot(self):
         """Check if the software is able to from the two input raw data with different samples but same transitions
@@ -133,7 +141,70 @@ class Concatenation_By_Row_Test(unittest.TestCase):
                                           sheet_name = "Long_Table",
                                           allow_multiple_istd = False)
         ExcelData_df = ExcelData_df.fillna('')
-        self.__compare_df(concatenate_df_list[data_index],ExcelData_df)
+        Long_Table_df = get_concatenated_Long_Table(stored_args, concatenate_df_list[data_index])
+        self.__compare_df(Long_Table_df,ExcelData_df)
+
+    def test_concatenate_by_rows_LongTable_with_Annot_csv(self):
+        """Check if the software is able to from the two input raw data with different samples but same transitions
+
+        * Extract the Area and RT and concatenate by row
+        * Calculate the normalised Area and concentation using the concatenated Area
+        * Write the Long Table with Annotation to a csv file from the concatenated data, one input file at a time
+        * The csv file is the same as the one written by merging the Long Table of each input file
+
+        """
+        with tempfile.TemporaryDirectory() as output_directory:
+            stored_args = {
+                'MS_Files': [WIDETABLEFORMROW1_FILENAME, WIDETABLEFORMROW2_FILENAME], 
+                'MS_FileType': 'Agilent Wide Table in csv', 
+                'Output_Directory': output_directory, 
+                'Output_Options': ['Area', 'RT', 'normArea by ISTD', 'normConc by ISTD'], 
+                'Annot_File': WIDETABLEFORMROW_ANNOTATION, 
+                'Output_Format': 'csv', 
+                'Concatenate': 'Concatenate along Sample Name (rows)', 
+                'Transpose_Results': False, 
+                'Allow_Multiple_ISTD': False, 
+                'Long_Table': True, 
+                'Long_Table_Annot': True, 
+                'Testing': False
+                }
+            [PDFReport, concatenate_df_list, concatenate_df_sheet_name] = concatenate_along_rows_workflow(stored_args,testing = True)
+            data_index = concatenate_df_sheet_name.index("Long_Table")
+            self.assertIsInstance(concatenate_df_list[data_index], ConcatenatedLongTableBuilder)
+            output_concatenated_long_table(stored_args, concatenate_df_list, concatenate_df_sheet_name)
+            with open(os.path.join(output_directory, "Concatenated_Long_Table_with_Annot.csv")) as long_table_file:
+                with open(WIDETABLEFORMROW_CONCATENATERESULTS_LONGTABLE_WITH_ANNOT_CSV_FILENAME) as expected_file:
+                    self.assertEqual(long_table_file.read(), expected_file.read())
+
+    def test_concatenate_by_rows_parsed_once(self):
+        """Check if the software reads each of the two input raw data only once when
+
+        * Extracting the Area and RT and concatenating by row
+        * Calculating the normalised Area and concentation using the concatenated Area
+        * Creating a Long Table with Annotation
+
+        """
+        stored_args = {
+            'MS_Files': [WIDETABLEFORMROW1_FILENAME, WIDETABLEFORMROW2_FILENAME], 
+            'MS_FileType': 'Agilent Wide Table in csv', 
+            'Output_Directory': 'D:\\MSOrganiser', 
+            'Output_Options': ['Area', 'RT', 'normArea by ISTD', 'normConc by ISTD'], 
+            'Annot_File': WIDETABLEFORMROW_ANNOTATION, 
+            'Output_Format': 'Excel', 
+            'Concatenate': 'Concatenate along Sample Name (rows)', 
+            'Transpose_Results': False, 
+            'Allow_Multiple_ISTD': False, 
+            'Long_Table': True, 
+            'Long_Table_Annot': True, 
+            'Testing': False
+            }
+
+        mock_print = self.patcher.start()
+
+        with patch('MSAnalysis.AgilentMSRawData', wraps = AgilentMSRawData) as mock_rawdata:
+            [PDFReport, concatenate_df_list, concatenate_df_sheet_name] = concatenate_along_rows_workflow(stored_args,testing = True)
+            get_concatenated_Long_Table(stored_args, concatenate_df_list[concatenate_df_sheet_name.index("Long_Table")])
+            self.assertEqual(mock_rawdata.call_count, 2)
 
     def test_concatenate_by_rows_transpose(self):
         """Check if the software is able to from the two input raw data with different samples but same transitions
@@ -255,7 +326,8 @@ class Concatenation_By_Row_Test(unittest.TestCase):
                                           sheet_name = "Long_Table",
                                           allow_multiple_istd = True)
         ExcelData_df = ExcelData_df.fillna('')
-        self.__compare_df(concatenate_df_list[data_index],ExcelData_df)
+        Long_Table_df = get_concatenated_Long_Table(stored_args, concatenate_df_list[data_index])
+        self.__compare_df(Long_Table_df,ExcelData_df)
 
     def test_concatenate_by_rows_multiple_ISTD_LongTable_with_Annot(self):
         """Check if the software is able to from the two input raw data with different samples but same transitions
@@ -295,7 +367,8 @@ class Concatenation_By_Row_Test(unittest.TestCase):
                                           sheet_name = "Long_Table",
                                           allow_multiple_istd = True)
         ExcelData_df = ExcelData_df.fillna('')
-        self.__compare_df(concatenate_df_list[data_index],ExcelData_df)
+        Long_Table_df = get_concatenated_Long_Table(stored_args, concatenate_df_list[data_index])
+        self.__compare_df(Long_Table_df,ExcelData_df)
 
     def test_concatenate_by_rows_multiple_ISTD_transpose(self):
         """Check if the software is able to from the two input raw data with different samples but same transitions
@@ -355,6 +428,40 @@ class Concatenation_By_Row_Test(unittest.TestCase):
 
                 self.__compare_df(concatenate_df_list[data_index],ExcelData_df)
 
+    def test_concatenate_by_rows_parallel(self):
+        """Check if the software gives the same results from the two input raw data
+
+        * When the files are read one after another
+        * When the files are read in a pool of two workers
+
+        """
+        stored_args = {
+            'MS_Files': [WIDETABLEFORMROW1_FILENAME, WIDETABLEFORMROW2_FILENAME], 
+            'MS_FileType': 'Agilent Wide Table in csv', 
+            'Output_Directory': 'D:\\MSOrganiser', 
+            'Output_Options': ['Area', 'normArea by ISTD', 'normConc by ISTD'], 
+            'Annot_File': WIDETABLEFORMROW_ANNOTATION, 
+            'Output_Format': 'Excel', 
+            'Concatenate': 'Concatenate along Sample Name (rows)', 
+            'Transpose_Results': False, 
+            'Allow_Multiple_ISTD': False, 
+            'Long_Table': True, 
+            'Long_Table_Annot': False, 
+            'Testing': False
+            }
+        [PDFReport, concatenate_df_list, concatenate_df_sheet_name] = concatenate_along_rows_workflow(stored_args,testing = True)
+
+        stored_args['Number_of_Workers'] = 2
+        [PDFReport, parallel_concatenate_df_list, parallel_concatenate_df_sheet_name] = concatenate_along_rows_workflow(stored_args,testing = True)
+
+        self.assertEqual(concatenate_df_sheet_name, parallel_concatenate_df_sheet_name)
+        for data_index in range(len(concatenate_df_list)):
+            if concatenate_df_sheet_name[data_index] == "Long_Table":
+                pd.testing.assert_frame_equal(get_concatenated_Long_Table(stored_args, concatenate_df_list[data_index]),
+                                              get_concatenated_Long_Table(stored_args, parallel_concatenate_df_list[data_index]))
+            else:
+                pd.testing.assert_frame_equal(concatenate_df_list[data_index], parallel_concatenate_df_list[data_index])
+
     def __compare_df(self,MSData_df,ExcelData_df):
         MSData_df = MSData_df.apply(pd.to_numeric, errors='ignore', downcast = 'float')
         ExcelData_df = ExcelData_df.apply(pd.to_numeric, errors='ignore', downcast = 'float')
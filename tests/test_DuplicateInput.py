@@ -6,6 +6,9 @@ import numpy as np
 from unittest.mock import patch
 from MSDuplicateCheck import check_duplicated_columns_in_wide_data
 from MSDuplicateCheck import check_duplicated_sample_names_in_wide_data
+from MSDuplicateCheck import find_duplicated_names
+from MSDuplicateCheck import get_duplicated_column_report
+from MSConcatenate import ConcatenationBuilder
 from MSOrganiser import concatenate_along_columns_workflow
 from MSOrganiser import concatenate_along_rows_workflow
 from MSOrganiser import no_concatenate_workflow
@@ -337,7 +340,7 @@ class Duplicate_Input_Test(unittest.TestCase):
 
         * Extract the Area
         * Concatenate the Area by column
-        * Find duplicate columns
+        * Find duplicate columns and the input files they are found in
 
         """
         stored_args = {
@@ -357,7 +360,10 @@ class Duplicate_Input_Test(unittest.TestCase):
         }
 
         duplicated_column_name_list = ['LPC 18:0', 'MHC d18:1/24:1']
-        duplicated_column_name_string = ", ".join(duplicated_column_name_list)
+        # Each duplicated column name is followed by the input files it is found in
+        source_string = " (found in " + os.path.basename(WIDETABLEFORMDUPLICATECOLUMN1_FILENAME) + ", " + \
+                        os.path.basename(WIDETABLEFORMDUPLICATECOLUMN2_FILENAME) + ")"
+        duplicated_column_name_string = ", ".join([column_name + source_string for column_name in duplicated_column_name_list])
         output_option = 'column concatenated Area'
 
         mock_print = self.patcher.start()
@@ -388,7 +394,7 @@ class Duplicate_Input_Test(unittest.TestCase):
 
         * Extract the Area
         * Concatenate the Area by row
-        * Find duplicate rows
+        * Find duplicate rows and the input files they are found in
 
         """
         stored_args = {
@@ -409,7 +415,10 @@ class Duplicate_Input_Test(unittest.TestCase):
 
         output_option = 'row concatenated Area'
         duplicated_sample_name_list = ['3_30m', '1_untreated']
-        duplicated_sample_name_string = ", ".join(duplicated_sample_name_list)
+        # Each duplicated sample name is followed by the input files it is found in
+        source_string = " (found in " + os.path.basename(WIDETABLEFORMDUPLICATEROW1_FILENAME) + ", " + \
+                        os.path.basename(WIDETABLEFORMDUPLICATEROW2_FILENAME) + ")"
+        duplicated_sample_name_string = ", ".join([sample_name + source_string for sample_name in duplicated_sample_name_list])
 
         mock_print = self.patcher.start()
 
@@ -430,6 +439,158 @@ class Duplicate_Input_Test(unittest.TestCase):
 
         mock_print = self.patcher.stop()
 
+    def test_builder_duplicate_row(self):
+        """Check if the concatenation builder is able to find duplicate rows (sample name) 
+           while collecting the data frames of several input files to concatenate by rows.
+
+        * Add three data frames with unique sample names in each of them
+        * Able to detect that the duplicated rows are Sample2 and Sample1, in the order they are first seen
+        * Without duplicates, the data frames are concatenated by rows in the order they are added
+        """
+        output_option = 'row concatenated Area'
+        duplicated_sample_name_list = ['Sample2', 'Sample1']
+        duplicated_sample_name_string = ", ".join(duplicated_sample_name_list)
+
+        Area_df_list = [pd.DataFrame({'Sample_Name' : ['Sample3', 'Sample2'], 'LPC 18:0' : [1.0, 2.0]}),
+                        pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample4'], 'LPC 18:0' : [3.0, 4.0]}),
+                        pd.DataFrame({'Sample_Name' : ['Sample2', 'Sample1'], 'LPC 18:0' : [5.0, 6.0]})]
+
+        Area_Concatenation = ConcatenationBuilder(concatenation_type = "rows",
+                                                  output_option = output_option,
+                                                  logger = None, ingui = True)
+        for Area_df in Area_df_list:
+            Area_Concatenation.add(Area_df)
+
+        self.assertEqual(Area_Concatenation.get_duplicated_sample_names(), duplicated_sample_name_list)
+        self.assertEqual(Area_Concatenation.get_duplicated_column_names(), [])
+
+        mock_print = self.patcher.start()
+
+        with self.assertRaises(SystemExit) as cm:
+            Area_Concatenation.get_concatenated_df()
+
+        # Ensure that the system ends with a -1 to indicate an error
+        self.assertEqual(cm.exception.code, -1)
+
+        mock_print.assert_called_with('In the ' + output_option + ' data frame, ' + 
+                                      'there are sample names in the output files that are duplicated. ' +
+                                      'The data in these duplicated row names may be different. ' +
+                                      'Please check the input files especially if you are concatenating by rows. ' , 
+                                      'Duplicated sample names are ' + duplicated_sample_name_string, 
+                                      flush = True)
+
+        mock_print = self.patcher.stop()
+
+        Area_Concatenation = ConcatenationBuilder(concatenation_type = "rows",
+                                                  output_option = output_option,
+                                                  logger = None, ingui = True)
+        for Area_df in Area_df_list[0:2]:
+            Area_Concatenation.add(Area_df)
+        concatenate_Area_df = Area_Concatenation.get_concatenated_df()
+        self.assertEqual(concatenate_Area_df['Sample_Name'].tolist(), ['Sample3', 'Sample2', 'Sample1', 'Sample4'])
+        self.assertEqual(concatenate_Area_df['LPC 18:0'].tolist(), [1.0, 2.0, 3.0, 4.0])
+
+    def test_builder_duplicate_column(self):
+        """Check if the concatenation builder is able to find duplicate columns (transition name) 
+           while collecting the data frames of several input files to concatenate by columns.
+
+        * Add three data frames with unique transition names in each of them
+        * Able to detect that the duplicated column is LPC 18:0
+        * Only the Sample_Name column of the first data frame is kept
+        """
+        output_option = 'column concatenated Area'
+        duplicated_column_name_list = ['LPC 18:0']
+        duplicated_column_name_string = ", ".join(duplicated_column_name_list)
+
+        Area_df_list = [pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2'], 'LPC 18:0' : [1.0, 2.0]}),
+                        pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2'], 'LPC 20:0' : [3.0, 4.0]}),
+                        pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2'], 'LPC 18:0' : [5.0, 6.0]})]
+
+        Area_Concatenation = ConcatenationBuilder(concatenation_type = "columns",
+                                                  output_option = output_option,
+                                                  logger = None, ingui = True)
+        for Area_df in Area_df_list:
+            Area_Concatenation.add(Area_df)
+
+        self.assertEqual(Area_Concatenation.get_duplicated_column_names(), duplicated_column_name_list)
+        self.assertEqual(Area_Concatenation.get_duplicated_sample_names(), [])
+
+        mock_print = self.patcher.start()
+
+        with self.assertRaises(SystemExit) as cm:
+            Area_Concatenation.get_concatenated_df()
+
+        # Ensure that the system ends with a -1 to indicate an error
+        self.assertEqual(cm.exception.code, -1)
+
+        mock_print.assert_called_with('In the ' + output_option + ' data frame, ' + 
+                                      'there are column names (Transition_Name) in the output files that are duplicated. ' +
+                                      'The data in these duplicated column names may be different. ' +
+                                      'Please check the input files especially if you are concatenating by columns. ' + 
+                                      'Duplicated columns are ' + duplicated_column_name_string, 
+                                      flush = True)
+
+        mock_print = self.patcher.stop()
+
+        Area_Concatenation = ConcatenationBuilder(concatenation_type = "columns",
+                                                  output_option = output_option,
+                                                  logger = None, ingui = True)
+        for Area_df in Area_df_list[0:2]:
+            Area_Concatenation.add(Area_df)
+        concatenate_Area_df = Area_Concatenation.get_concatenated_df()
+        self.assertEqual(concatenate_Area_df.columns.tolist(), ['Sample_Name', 'LPC 18:0', 'LPC 20:0'])
+
+    def test_duplicate_report(self):
+        """Check if the software is able to give a structured report of the duplicated names
+
+        * The duplicated names are given in the order they first appear with the number of times they appear
+        * The input files of each duplicated name are given when they are known
+        * A data frame with unique column names gives an empty report
+        * The report of a column index is cached and not found again
+        * The concatenation builder reports the input files of the duplicated column names
+        """
+
+        name_list = ['LPC 18:0', 'LPC 17:0 (IS)', 'LPC 20:0', 'LPC 17:0 (IS)', 'LPC 18:0', 'LPC 18:0']
+        source_list = ['File1.csv', 'File1.csv', 'File1.csv', 'File2.csv', 'File2.csv', 'File3.csv']
+
+        duplicate_report = find_duplicated_names(name_list, source_list)
+        self.assertTrue(duplicate_report.has_duplicates())
+        self.assertEqual(duplicate_report.names, ['LPC 18:0', 'LPC 17:0 (IS)'])
+        self.assertEqual(duplicate_report.counts, {'LPC 18:0' : 3, 'LPC 17:0 (IS)' : 2})
+        self.assertEqual(duplicate_report.sources, {'LPC 18:0' : ['File1.csv', 'File2.csv', 'File3.csv'],
+                                                    'LPC 17:0 (IS)' : ['File1.csv', 'File2.csv']})
+
+        duplicate_report = find_duplicated_names(name_list)
+        self.assertEqual(duplicate_report.names, ['LPC 18:0', 'LPC 17:0 (IS)'])
+        self.assertEqual(duplicate_report.sources, {})
+
+        Area_df = pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2'], 'LPC 18:0' : [1.0, 2.0], 'LPC 20:0' : [3.0, 4.0]})
+        duplicate_report = get_duplicated_column_report(Area_df)
+        self.assertFalse(duplicate_report.has_duplicates())
+        self.assertEqual(duplicate_report.names, [])
+
+        Area_df = pd.DataFrame([['Sample1', 1.0, 2.0], ['Sample2', 3.0, 4.0]],
+                               columns = ['Sample_Name', 'LPC 18:0', 'LPC 18:0'])
+        duplicate_report = check_duplicated_columns_in_wide_data(Area_df[['Sample_Name']], 'Area')
+        self.assertFalse(duplicate_report.has_duplicates())
+        duplicate_report = get_duplicated_column_report(Area_df)
+        self.assertEqual(duplicate_report.counts, {'LPC 18:0' : 2})
+        with patch('MSDuplicateCheck.find_duplicated_names') as mock_find_duplicated_names:
+            self.assertIs(get_duplicated_column_report(Area_df), duplicate_report)
+            mock_find_duplicated_names.assert_not_called()
+
+        Area_Concatenation = ConcatenationBuilder(concatenation_type = "columns",
+                                                  output_option = 'column concatenated Area',
+                                                  logger = None, ingui = True)
+        Area_Concatenation.add(pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2'], 'LPC 18:0' : [1.0, 2.0]}), source = 'File1.csv')
+        Area_Concatenation.add(pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2'], 'LPC 20:0' : [3.0, 4.0]}), source = 'File2.csv')
+        Area_Concatenation.add(pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2'], 'LPC 18:0' : [5.0, 6.0]}), source = 'File3.csv')
+        duplicate_report = Area_Concatenation.get_duplicated_column_report()
+        self.assertEqual(duplicate_report.names, ['LPC 18:0'])
+        self.assertEqual(duplicate_report.counts, {'LPC 18:0' : 2})
+        self.assertEqual(duplicate_report.sources, {'LPC 18:0' : ['File1.csv', 'File3.csv']})
+        self.assertFalse(Area_Concatenation.get_duplicated_sample_name_report().has_duplicates())
+
     def tearDown(self):
         self.patcher.stop()
 
@@ -1,5 +1,6 @@
 import unittest
 import os
+import pandas as pd
 from unittest.mock import patch
 from Annotation import MS_Template
 from MSCalculate import ISTD_Operations
@@ -235,6 +236,139 @@ class ISTDAnnot_Test(unittest.TestCase):
                                       flush=True)
 
 
+    def test_create_ISTD_Conc(self):
+        """Check if the software is able to map the ISTD concentration in the ISTD_Annot sheet 
+           to every sample of each transition name
+
+        * Each transition name column has the concentration of its ISTD for every sample
+        * Transition names not in the ISTD_Annot sheet have NaN
+        * With multiple ISTD, the concentration is mapped by both the transition name and its ISTD
+        """
+
+        Area_df = pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2', 'Sample3'],
+                                'LPC 18:0' : [1.0, 2.0, 3.0],
+                                'LPC 22:0' : [4.0, 5.0, 6.0],
+                                'LPC 17:0 (IS)' : [7.0, 8.0, 9.0]})
+
+        ISTD_Annot_df = pd.DataFrame({'Transition_Name' : ['LPC 18:0', 'LPC 17:0 (IS)', 'LPC 20:0'],
+                                      'Transition_Name_ISTD' : ['LPC 17:0 (IS)', 'LPC 17:0 (IS)', 'LPC 17:0 (IS)'],
+                                      'ISTD_Conc_[nM]' : [50, 50, 50]})
+
+        ISTD_Conc_df = ISTD_Operations._create_ISTD_Conc_from_Transition_Name_Annot(Area_df,ISTD_Annot_df,'ISTD_Conc_[nM]',
+                                                                                    logger = None, ingui = True,
+                                                                                    allow_multiple_istd = False)
+
+        self.assertEqual(ISTD_Conc_df.columns.tolist(), Area_df.columns.tolist())
+        self.assertEqual(ISTD_Conc_df['Sample_Name'].tolist(), ['Sample1', 'Sample2', 'Sample3'])
+        self.assertEqual(ISTD_Conc_df['LPC 18:0'].tolist(), [50.0, 50.0, 50.0])
+        self.assertEqual(ISTD_Conc_df['LPC 17:0 (IS)'].tolist(), [50.0, 50.0, 50.0])
+        self.assertTrue(ISTD_Conc_df['LPC 22:0'].isna().all())
+        self.assertTrue((ISTD_Conc_df.dtypes.iloc[1:] == 'float64').all())
+
+        # Multiple ISTD case
+        Area_df.columns = pd.MultiIndex.from_tuples([('Sample_Name', ''), 
+                                                     ('LPC 18:0', 'LPC 17:0 (IS)'), 
+                                                     ('LPC 22:0', ''),
+                                                     ('LPC 17:0 (IS)', 'LPC 17:0 (IS)')],
+                                                    names=["Transition_Name", "Transition_Name_ISTD"])
+        ISTD_Annot_df = pd.DataFrame({'Transition_Name' : ['LPC 18:0', 'LPC 18:0', 'LPC 17:0 (IS)'],
+                                      'Transition_Name_ISTD' : ['LPC 19:0 (IS)', 'LPC 17:0 (IS)', 'LPC 17:0 (IS)'],
+                                      'ISTD_Conc_[nM]' : [20.0, 50.0, 50.0]})
+
+        ISTD_Conc_df = ISTD_Operations._create_ISTD_Conc_from_Transition_Name_Annot(Area_df,ISTD_Annot_df,'ISTD_Conc_[nM]',
+                                                                                    logger = None, ingui = True,
+                                                                                    allow_multiple_istd = True)
+
+        self.assertEqual(ISTD_Conc_df[('LPC 18:0', 'LPC 17:0 (IS)')].tolist(), [50.0, 50.0, 50.0])
+        self.assertEqual(ISTD_Conc_df[('LPC 17:0 (IS)', 'LPC 17:0 (IS)')].tolist(), [50.0, 50.0, 50.0])
+        self.assertTrue(ISTD_Conc_df[('LPC 22:0', '')].isna().all())
+
+    def test_getConc_by_ISTD(self):
+        """Check if the software is able to calculate the concentration
+           from the normalised area, the ISTD concentration and the ISTD to sample amount ratio
+
+        * Each value is normArea x ISTD concentration x ISTD to sample amount ratio of its sample
+        * The ratio follows the Sample_Name when the Sample_Annot sheet lists the samples of more than one data file
+        * The ISTD concentration and ratio data frames are empty when they are not needed
+        """
+
+        normArea_df = pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2', 'Sample3'],
+                                    'LPC 18:0' : [1.0, 2.0, 3.0],
+                                    'LPC 22:0' : [4.0, 5.0, 6.0]})
+
+        ISTD_Annot_df = pd.DataFrame({'Transition_Name' : ['LPC 18:0'],
+                                      'Transition_Name_ISTD' : ['LPC 17:0 (IS)'],
+                                      'ISTD_Conc_[nM]' : [50]})
+
+        # Same samples in two data files, as when concatenating by columns
+        Sample_Annot_df = pd.DataFrame({'Data_File_Name' : ['File1.csv', 'File1.csv', 'File1.csv',
+                                                            'File2.csv', 'File2.csv', 'File2.csv'],
+                                        'Sample_Name' : ['Sample1', 'Sample2', 'Sample3',
+                                                         'Sample1', 'Sample2', 'Sample3'],
+                                        'Sample_Amount' : [10, 50, 5, 10, 50, 5],
+                                        'Sample_Amount_Unit' : ['uL'] * 6,
+                                        'ISTD_Mixture_Volume_[uL]' : [100, 50, 10, 100, 50, 10],
+                                        'Concentration_Unit' : ['nM'] * 6})
+
+        [Conc_df, ISTD_Conc_df, ISTD_Samp_Ratio_df] = ISTD_Operations.getConc_by_ISTD(normArea_df,ISTD_Annot_df,Sample_Annot_df,
+                                                                                       logger = None, ingui = True,
+                                                                                       allow_multiple_istd = False,
+                                                                                       allow_multiple_data_file_path = True)
+
+        self.assertEqual(Conc_df.columns.tolist(), normArea_df.columns.tolist())
+        self.assertEqual(Conc_df['Sample_Name'].tolist(), ['Sample1', 'Sample2', 'Sample3'])
+        self.assertEqual(Conc_df['LPC 18:0'].tolist(), [500.0, 100.0, 300.0])
+        self.assertTrue(Conc_df['LPC 22:0'].isna().all())
+        self.assertEqual(ISTD_Conc_df['LPC 18:0'].tolist(), [50.0, 50.0, 50.0])
+        self.assertEqual(ISTD_Samp_Ratio_df['LPC 18:0'].tolist(), [10.0, 1.0, 2.0])
+        self.assertEqual(ISTD_Samp_Ratio_df.shape, normArea_df.shape)
+
+        [Conc_df, ISTD_Conc_df, ISTD_Samp_Ratio_df] = ISTD_Operations.getConc_by_ISTD(normArea_df,ISTD_Annot_df,Sample_Annot_df,
+                                                                                       logger = None, ingui = True,
+                                                                                       allow_multiple_istd = False,
+                                                                                       allow_multiple_data_file_path = True,
+                                                                                       output_intermediate_data = False)
+
+        self.assertEqual(Conc_df['LPC 18:0'].tolist(), [500.0, 100.0, 300.0])
+        self.assertTrue(ISTD_Conc_df.empty)
+        self.assertTrue(ISTD_Samp_Ratio_df.empty)
+
+    def test_getConc_by_ISTD_Conflicting_Ratio(self):
+        """Check if the software skips the concentration calculation when a sample
+           has different ISTD to sample amount ratios in different data files
+
+        * Sample2 has a Sample_Amount of 50 in File1.csv and 25 in File2.csv
+        * The concentration is not calculated and the conflicting rows are printed
+        """
+
+        normArea_df = pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2'],
+                                    'LPC 18:0' : [1.0, 2.0]})
+
+        ISTD_Annot_df = pd.DataFrame({'Transition_Name' : ['LPC 18:0'],
+                                      'Transition_Name_ISTD' : ['LPC 17:0 (IS)'],
+                                      'ISTD_Conc_[nM]' : [50]})
+
+        Sample_Annot_df = pd.DataFrame({'Data_File_Name' : ['File1.csv', 'File1.csv', 'File2.csv', 'File2.csv'],
+                                        'Sample_Name' : ['Sample1', 'Sample2', 'Sample1', 'Sample2'],
+                                        'Sample_Amount' : [10, 50, 10, 25],
+                                        'Sample_Amount_Unit' : ['uL'] * 4,
+                                        'ISTD_Mixture_Volume_[uL]' : [100, 50, 100, 50],
+                                        'Concentration_Unit' : ['nM'] * 4})
+
+        with patch('MSCalculate.print') as mock_print:
+            [Conc_df, ISTD_Conc_df, ISTD_Samp_Ratio_df] = ISTD_Operations.getConc_by_ISTD(normArea_df,ISTD_Annot_df,Sample_Annot_df,
+                                                                                           logger = None, ingui = True,
+                                                                                           allow_multiple_istd = False,
+                                                                                           allow_multiple_data_file_path = True)
+
+        mock_print.assert_any_call('Skipping step to get normConc. Sample Annotation data frame has Sample_Name with ' +
+                                   'different Sample_Amount or ISTD_Mixture_Volume_[uL] in different Data_File_Name.',
+                                   flush = True)
+        self.assertIn('Sample2', mock_print.call_args[0][0])
+        self.assertNotIn('Sample1', mock_print.call_args[0][0])
+        self.assertEqual(Conc_df['Sample_Name'].tolist(), ['Sample1', 'Sample2'])
+        self.assertTrue(Conc_df['LPC 18:0'].isna().all())
+
     def tearDown(self):
         self.patcher.stop()
 
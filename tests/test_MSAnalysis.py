@@ -1,9 +1,13 @@
 import unittest
 from unittest.mock import patch
 import os
+import tempfile
 import pandas as pd
 import openpyxl
 from MSAnalysis import MS_Analysis
+from MSLongTable import LongTableBuilder
+from MSRawData import AgilentMSRawData
+from MSDataOutput import MSDataOutput_csv
 from MSOrganiser import concatenate_along_rows_workflow
 
 WIDETABLEFORM_FILENAME = os.path.join(os.path.dirname(__file__),"testdata", 'WideTableForm.csv')
@@ -182,7 +186,135 @@ class Agilent_Test(unittest.TestCase):
         MyLongTableDataWithAnnot.get_Analyte_Concentration('normConc by ISTD', outputdata = False)
         Long_Table_df = MyLongTableDataWithAnnot.get_Long_Table()
         self.__compare_df('Long_Table',Long_Table_df,LongTableDataWithAnnotResults)
-           
+
+    def test_LongTableBuilder(self):
+        """Check if the LongTableBuilder gives the same long table as melting and merging the output options
+
+        * Area and RT of WideTableForm.csv with a sample and a transition left out of RT
+        * normArea with multiple ISTD, which repeats the rows for every Transition_Name_ISTD
+        * The same long table when RT has a duplicated sample name
+        """
+
+        MyData = MS_Analysis(MS_FilePath = WIDETABLEFORM_FILENAME,
+                             MS_FileType = 'Agilent Wide Table in csv',
+                             ingui = True)
+        Area_df = MyData.get_from_Input_Data('Area')
+        RT_df = MyData.get_from_Input_Data('RT')
+        RT_df = RT_df.drop(columns = RT_df.columns[-1]).iloc[1:]
+
+        Transition_Name_list = Area_df.columns[1:].tolist()
+        normArea_df = pd.DataFrame(Area_df.iloc[:, [1, 1, 2]].to_numpy(),
+                                   columns = pd.MultiIndex.from_tuples([(Transition_Name_list[0], "ISTD_1"),
+                                                                        (Transition_Name_list[0], "ISTD_2"),
+                                                                        (Transition_Name_list[1], "ISTD_1")]))
+        normArea_df.insert(0, ("Sample_Name", ""), Area_df["Sample_Name"].to_numpy())
+
+        for RT_duplicated_df in [RT_df, pd.concat([RT_df, RT_df.iloc[[0]]])]:
+            Long_Table_df = pd.melt(Area_df, id_vars = ["Sample_Name"], var_name = "Transition_Name", value_name = "Area")
+            RT_Long_Table_df = pd.melt(RT_duplicated_df, id_vars = ["Sample_Name"], var_name = "Transition_Name", value_name = "RT")
+            Long_Table_df = pd.merge(Long_Table_df, RT_Long_Table_df, on = ["Sample_Name","Transition_Name"], how = 'left')
+            normArea_Long_Table_df = pd.melt(normArea_df, id_vars = ["Sample_Name"],
+                                             var_name = ["Transition_Name","Transition_Name_ISTD"], value_name = "normArea")
+            Long_Table_df = pd.merge(Long_Table_df, normArea_Long_Table_df, on = ["Sample_Name","Transition_Name"], how = 'left')
+            Long_Table_df = Long_Table_df.drop_duplicates().reset_index(drop = True)
+
+            MyLongTable = LongTableBuilder()
+            MyLongTable.add(Area_df, "Area")
+            MyLongTable.add(RT_duplicated_df, "RT")
+            MyLongTable.add(normArea_df, "normArea", allow_multiple_istd = True)
+            pd.testing.assert_frame_equal(MyLongTable.get_long_table_df().reset_index(drop = True), Long_Table_df)
+
+    def test_iterLongTable(self):
+        """Check if the software gives the same LongTable with Annotations a few rows at a time from WideTableForm.csv
+
+        * The data frames of MS_Analysis.iter_Long_Table together give MS_Analysis.get_Long_Table
+        * The csv file written by MSDataOutput_csv.df_chunks_to_file is the same as the one written by MSDataOutput_csv.df_to_file
+        """
+
+        MyLongTableDataWithAnnot = MS_Analysis(MS_FilePath = WIDETABLEFORM_FILENAME,
+                                               MS_FileType = 'Agilent Wide Table in csv',
+                                               Annotation_FilePath = WIDETABLEFORM_ANNOTATION,
+                                               ingui = True,
+                                               longtable = True,
+                                               longtable_annot = True)
+
+        MyLongTableDataWithAnnot.get_from_Input_Data('Area', outputdata = False)
+        MyLongTableDataWithAnnot.get_Normalised_Area('normArea by ISTD', outputdata = False)
+        MyLongTableDataWithAnnot.get_Analyte_Concentration('normConc by ISTD', outputdata = False)
+        Long_Table_df = MyLongTableDataWithAnnot.get_Long_Table()
+
+        Long_Table_chunk_list = list(MyLongTableDataWithAnnot.iter_Long_Table(chunk_size = 7))
+        self.assertGreater(len(Long_Table_chunk_list), 1)
+        pd.testing.assert_frame_equal(pd.concat(Long_Table_chunk_list, ignore_index = True), Long_Table_df)
+
+        with tempfile.TemporaryDirectory() as output_directory:
+            DfLongOutput = MSDataOutput_csv(output_directory, "Whole.csv", result_name = "", logger = None, ingui = False)
+            DfLongOutput.df_to_file("Long_Table", Long_Table_df)
+            DfLongChunkOutput = MSDataOutput_csv(output_directory, "Chunks.csv", result_name = "", logger = None, ingui = False)
+            DfLongChunkOutput.df_chunks_to_file("Long_Table", MyLongTableDataWithAnnot.iter_Long_Table(chunk_size = 7))
+            with open(os.path.join(output_directory, "Whole_Long_Table.csv")) as whole_file:
+                with open(os.path.join(output_directory, "Chunks_Long_Table.csv")) as chunk_file:
+                    self.assertEqual(whole_file.read(), chunk_file.read())
+
+    def test_InputData_parsed_once(self):
+        """Check if the software reads WideTableForm.csv only once when
+
+        * Extracting several output options using MS_Analysis.get_from_Input_Data
+        * Calculating the normalised area using MS_Analysis.get_Normalised_Area
+        * Reading the file again after MS_Analysis.release_InputData_cache is called
+        """
+
+        MyData = MS_Analysis(MS_FilePath = WIDETABLEFORM_FILENAME,
+                             MS_FileType = 'Agilent Wide Table in csv',
+                             Annotation_FilePath = WIDETABLEFORM_ANNOTATION,
+                             ingui = True)
+
+        with patch('MSAnalysis.AgilentMSRawData', wraps = AgilentMSRawData) as mock_rawdata:
+            for output_option in ['Area', 'RT', 'FWHM']:
+                MyData.get_from_Input_Data(output_option)
+            MyData.get_Normalised_Area('normArea by ISTD')
+            self.assertEqual(mock_rawdata.call_count, 1)
+
+            MyData.release_InputData_cache()
+            MyData.get_from_Input_Data('Area')
+            self.assertEqual(mock_rawdata.call_count, 2)
+
+    def test_getTables(self):
+        """Check if the software is able to extract several output options in one pass 
+        using MS_Analysis.get_tables_from_Input_Data from these datasets
+
+        * WideTableForm.csv
+        * CompoundTableForm.csv
+        * SciExTestData.txt
+        """
+
+        InputDataList = [WIDETABLEFORM_FILENAME,
+                         COMPOUNDTABLEFORM_FILENAME,
+                         SCIEX_FILENAME]
+
+        DataResultList = [WIDETABLEFORM_RESULTS_FILENAME,
+                          COMPOUNDTABLEFORM_RESULTS_FILENAME,
+                          SCIEX_RESULTS_FILENAME]
+
+        MSFileTypeList = ['Agilent Wide Table in csv',
+                          'Agilent Compound Table in csv',
+                          'Multiquant Long Table in txt']
+
+        OutputOptionsList = [['Area', 'RT', 'FWHM'],
+                             ['Area', 'RT'],
+                             ['Area', 'RT', 'FWHM']]
+
+        for i in range(len(InputDataList)):
+            MyData = MS_Analysis(MS_FilePath = InputDataList[i],
+                                 MS_FileType = MSFileTypeList[i],
+                                 ingui = True)
+            DataResults = openpyxl.load_workbook(DataResultList[i])
+            Output_df_dict = MyData.get_tables_from_Input_Data(OutputOptionsList[i])
+            self.assertEqual(list(Output_df_dict.keys()), OutputOptionsList[i])
+            for output_option in OutputOptionsList[i]:
+                self.__compare_df(output_option,Output_df_dict[output_option],DataResults)
+            DataResults.close()
+
     def tearDown(self):
         self.patcher.stop()
 
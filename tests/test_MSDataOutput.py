@@ -0,0 +1,144 @@
+import unittest
+from unittest.mock import patch
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import openpyxl
+from openpyxl.utils import get_column_letter
+from MSDataOutput import MSDataOutput, MSDataOutput_Excel
+
+class Transpose_Test(unittest.TestCase):
+
+    def test_transpose_MSdata(self):
+        """Check if the software transposes the data with samples as columns and keeps the values numeric
+
+        * Transition_Name as the first column
+        * (Transition_Name, Transition_Name_ISTD) as the first two columns
+        * Data with text values gives the same data frame as before
+        """
+
+        Area_df = pd.DataFrame({"Sample_Name" : ["Sample_1", " Sample_2 "],
+                                "LPC 14:0" : [1.5, np.nan],
+                                "LPC 15:0" : [2, 3]})
+
+        expected_df = pd.DataFrame({"Transition_Name" : ["LPC 14:0", "LPC 15:0"],
+                                    "Sample_1" : [1.5, 2.0],
+                                    "Sample_2" : [np.nan, 3.0]})
+        transposed_df = MSDataOutput.transpose_MSdata(Area_df)
+        pd.testing.assert_frame_equal(transposed_df, expected_df)
+
+        multiple_istd_Area_df = Area_df.copy()
+        multiple_istd_Area_df.columns = pd.MultiIndex.from_tuples([("Sample_Name", ""), ("LPC 14:0", "IS_1"), ("LPC 14:0", "IS_2")],
+                                                                  names = ["Transition_Name","Transition_Name_ISTD"])
+        expected_df.insert(1, "Transition_Name_ISTD", ["IS_1", "IS_2"])
+        expected_df["Transition_Name"] = ["LPC 14:0", "LPC 14:0"]
+        transposed_df = MSDataOutput.transpose_MSdata(multiple_istd_Area_df, allow_multiple_istd = True)
+        pd.testing.assert_frame_equal(transposed_df, expected_df)
+
+        #Text values are transposed cell by cell and numbers are converted back afterwards
+        Area_df["Comment"] = ["a", "b"]
+        expected_df = pd.DataFrame({"Transition_Name" : ["LPC 14:0", "LPC 15:0", "Comment"],
+                                    "Sample_1" : [1.5, 2, "a"],
+                                    "Sample_2" : [np.nan, 3, "b"]})
+        transposed_df = MSDataOutput.transpose_MSdata(Area_df)
+        pd.testing.assert_frame_equal(transposed_df, expected_df)
+
+class Excel_Output_Test(unittest.TestCase):
+
+    def test_column_widths(self):
+        """Check if the software sets the width of each column of the Excel sheet from the longest value or column name
+
+        * A column of text and a column of integers
+        * Columns of floats with more rows than MSDataOutput_Excel.max_width_sample_rows,
+          with their largest, smallest and most negative value in rows that are not sampled
+        * The same sheet with (Transition_Name, Transition_Name_ISTD) as column names
+        """
+
+        Area_df = pd.DataFrame({"Sample_Name" : ["Sample_" + str(i) for i in range(50)],
+                                "Number" : np.arange(50),
+                                "LPC 14:0" : np.full(50, 1.5),
+                                "LPC 15:0" : np.full(50, 2.25),
+                                "LPC 16:0" : np.full(50, 3.125)})
+        Area_df.loc[7, "Sample_Name"] = "Sample_with_a_long_name"
+        Area_df.loc[13, "LPC 14:0"] = 123456789.125
+        Area_df.loc[17, "LPC 15:0"] = 0.000012345
+        Area_df.loc[23, "LPC 16:0"] = -98765.4321
+
+        multiple_istd_Area_df = Area_df.drop(columns = ["Number"]).set_index("Sample_Name")
+        multiple_istd_Area_df.columns = pd.MultiIndex.from_tuples([(Transition_Name, "IS") for Transition_Name in multiple_istd_Area_df.columns],
+                                                                  names = ["Transition_Name","Transition_Name_ISTD"])
+
+        with tempfile.TemporaryDirectory() as output_directory:
+            with patch.object(MSDataOutput_Excel, 'max_width_sample_rows', 5):
+                DfOutput = MSDataOutput_Excel(output_directory, "Widths.csv", result_name = "Results", logger = None, ingui = False)
+                DfOutput.start_writer()
+                DfOutput.df_to_file("Area", Area_df)
+                DfOutput.df_to_file("normArea_by_ISTD", multiple_istd_Area_df, allow_multiple_istd = True)
+                DfOutput.end_writer()
+
+            Results = openpyxl.load_workbook(os.path.join(output_directory, "Widths_Results.xlsx"))
+
+            #The width is the number of characters of the longest value or column name plus 6
+            worksheet = Results["Area"]
+            for i, expected_width in enumerate([29, 12, 19, 16, 17]):
+                self.assertEqual(worksheet.column_dimensions[get_column_letter(i + 1)].width, expected_width)
+
+            #The index column comes first and its width is the number of characters of the longest index value plus 5
+            worksheet = Results["normArea_by_ISTD"]
+            for i, expected_width in enumerate([28, 19, 16, 17]):
+                self.assertEqual(worksheet.column_dimensions[get_column_letter(i + 1)].width, expected_width)
+
+            Results.close()
+
+    def test_write_only(self):
+        """Check if the software gives the same Excel file when the sheets are streamed in write only mode
+
+        * Values, including NaN and infinity, in a sheet without and with (Transition_Name, Transition_Name_ISTD) as column names
+        * Bold column names and index values
+        * Merged cells of a Transition_Name with more than one Transition_Name_ISTD
+        * Column widths
+        """
+
+        Area_df = pd.DataFrame({"Sample_Name" : ["Sample_1", "Sample_2", "Sample_3"],
+                                "LPC 14:0" : [1.5, np.nan, np.inf],
+                                "LPC 15:0" : [2.25, -np.inf, 0.125],
+                                "LPC 16:0" : [3.125, 4.0, 5.5]})
+
+        multiple_istd_Area_df = Area_df.copy()
+        multiple_istd_Area_df.columns = pd.MultiIndex.from_tuples([("Sample_Name", ""), ("LPC 14:0", "IS_1"), ("LPC 14:0", "IS_2"), ("LPC 16:0", "IS_1")],
+                                                                  names = ["Transition_Name","Transition_Name_ISTD"])
+
+        Results = {}
+        with tempfile.TemporaryDirectory() as output_directory:
+            for write_only in [False, True]:
+                with patch.object(MSDataOutput_Excel, 'write_only', write_only):
+                    DfOutput = MSDataOutput_Excel(output_directory, "WriteOnly.csv", result_name = str(write_only), logger = None, ingui = False)
+                    DfOutput.start_writer()
+                    DfOutput.df_to_file("Area", Area_df)
+                    DfOutput.df_to_file("normArea_by_ISTD", multiple_istd_Area_df, allow_multiple_istd = True)
+                    DfOutput.end_writer()
+                Results[write_only] = openpyxl.load_workbook(os.path.join(output_directory, "WriteOnly_" + str(write_only) + ".xlsx"))
+
+            self.assertEqual(Results[True].sheetnames, ["Area", "normArea_by_ISTD"])
+            for sheet_name in Results[True].sheetnames:
+                expected_worksheet = Results[False][sheet_name]
+                worksheet = Results[True][sheet_name]
+                self.assertEqual([[(cell.value, cell.font.b) for cell in row] for row in worksheet.iter_rows()],
+                                 [[(cell.value, cell.font.b) for cell in row] for row in expected_worksheet.iter_rows()])
+                self.assertEqual(sorted(str(merged_cell) for merged_cell in worksheet.merged_cells.ranges),
+                                 sorted(str(merged_cell) for merged_cell in expected_worksheet.merged_cells.ranges))
+                for column_letter in ["A", "B", "C", "D"]:
+                    self.assertEqual(worksheet.column_dimensions[column_letter].width,
+                                     expected_worksheet.column_dimensions[column_letter].width)
+
+            #Check a few cells directly
+            self.assertEqual(Results[True]["Area"]["B4"].value, "inf")
+            self.assertIsNone(Results[True]["Area"]["B3"].value)
+            self.assertIn("C1:D1", [str(merged_cell) for merged_cell in Results[True]["normArea_by_ISTD"].merged_cells.ranges])
+
+            for write_only in [False, True]:
+                Results[write_only].close()
+
+if __name__ == '__main__':
+    unittest.main()
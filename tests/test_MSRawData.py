@@ -1,9 +1,11 @@
 import unittest
 import os
 import pandas as pd
+import numpy as np
 import openpyxl
 from MSRawData import AgilentMSRawData
 from MSRawData import SciexMSRawData
+from MSRawData import AgilentHeaderIndex
 from MSDataOutput import MSDataOutput
 
 WIDETABLEFORM_FILENAME = os.path.join(os.path.dirname(__file__),"testdata", 'WideTableForm.csv')
@@ -146,5 +148,118 @@ class Agilent_Test(unittest.TestCase):
         data = list(data)
         return pd.DataFrame(data, columns=cols)
 
+class Get_Tables_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.WideData = AgilentMSRawData(WIDETABLEFORM_FILENAME,ingui=False)
+        self.CompoundData = AgilentMSRawData(COMPOUNDTABLEFORM_FILENAME,ingui=False)
+        self.CompoundData_Qualifier = AgilentMSRawData(COMPOUNDTABLEFORM_QUALIFIER_FILENAME,ingui=False)
+        self.SciexData = SciexMSRawData(SCIEX_FILENAME,ingui=False)
+
+    def test_get_tables(self):
+        """Check if the software gives the same tables with get_tables and get_table for:
+
+        * Area, RT and FWHM from WideTableForm.csv using AgilentMSRawData.get_tables
+        * Area, RT and Precursor Ion from CompoundTableForm.csv using AgilentMSRawData.get_tables
+        * Area and Precursor Ion from CompoundTableForm_Qualifier.csv using AgilentMSRawData.get_tables
+        * Area, RT and FWHM from SciExTestData.txt using SciexMSRawData.get_tables
+        """
+
+        for MSDataObject, column_names in [(self.WideData, ['Area', 'RT', 'FWHM']),
+                                           (self.CompoundData, ['Area', 'RT', 'Precursor Ion']),
+                                           (self.CompoundData_Qualifier, ['Area', 'Precursor Ion']),
+                                           (self.SciexData, ['Area', 'RT', 'FWHM'])]:
+            table_dict = MSDataObject.get_tables(column_names)
+            self.assertEqual(list(table_dict.keys()), column_names)
+            for column_name in column_names:
+                self.assertFalse(table_dict[column_name].empty)
+                pd.testing.assert_frame_equal(table_dict[column_name], MSDataObject.get_table(column_name))
+
+class AgilentCompound_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.CompoundData = AgilentMSRawData(COMPOUNDTABLEFORM_FILENAME,ingui=False)
+        self.CompoundData_Qualifier = AgilentMSRawData(COMPOUNDTABLEFORM_QUALIFIER_FILENAME,ingui=False)
+
+        self.CompoundDataResults = openpyxl.load_workbook(COMPOUNDTABLEFORM_RESULTS_FILENAME)
+        self.CompoundData_QualifierResults = openpyxl.load_workbook(COMPOUNDTABLEFORM_QUALIFIER_RESULTS_FILENAME)
+
+    def test_CompoundData_Blocks(self):
+        """Check if the software is able to do the following with CompoundTableForm.csv and CompoundTableForm_Qualifier.csv:
+
+        * Extract Area and RT from the compound blocks of every sample using AgilentMSRawData.get_table
+        * Put each qualifier as a column named Qualifier (transition) after its transition
+        * Give the compound method Precursor Ion to every sample
+        """
+
+        self.assertEqual("CompoundTableForm",self.CompoundData_Qualifier.DataForm)
+        self.__compare_tables("Area",self.CompoundData,self.CompoundDataResults)
+        self.__compare_tables("RT",self.CompoundData,self.CompoundDataResults)
+        self.__compare_tables("Area",self.CompoundData_Qualifier,self.CompoundData_QualifierResults)
+
+        Area_df = self.CompoundData_Qualifier.get_table("Area")
+        self.assertEqual(Area_df.columns[:4].tolist(), ['Sample_Name', 'Sph d16:1',
+                                                        'Qualifier (272.2 -> 236.1)', 'Qualifier (272.2 -> 224.1)'])
+
+        Precursor_Ion_df = self.CompoundData_Qualifier.get_table("Precursor Ion")
+        self.assertEqual(Precursor_Ion_df.shape, Area_df.shape)
+        self.assertTrue((Precursor_Ion_df["Sph d16:1"] == Precursor_Ion_df["Sph d16:1"].iloc[0]).all())
+
+    def test_CompoundData_Missing_Option(self):
+        """Check if the software gives an empty data frame with no rows and no columns
+        when the output option is not in CompoundTableForm_Qualifier.csv
+
+        * RT is not exported in CompoundTableForm_Qualifier.csv
+        """
+
+        RT_df = self.CompoundData_Qualifier.get_table("RT")
+        self.assertTrue(RT_df.empty)
+        self.assertEqual(RT_df.shape, (0, 0))
+        self.assertEqual(self.CompoundData_Qualifier.get_tables(["RT"])["RT"].shape, (0, 0))
+
+    def tearDown(self):
+        self.CompoundDataResults.close()
+        self.CompoundData_QualifierResults.close()
+
+    def __compare_tables(self,table_name,MSDataObject,ExcelWorkbook):
+        '''Check if the pandas data frame (MSDataObject) has the same values as the table in ExcelWorkbook'''
+        ws = ExcelWorkbook[table_name]
+        data = ws.values
+        cols = next(data)
+        ExcelWorkbook = pd.DataFrame(list(data), columns=cols).apply(pd.to_numeric, errors='ignore', downcast = 'float')
+        MSDataObject = MSDataObject.get_table(table_name).apply(pd.to_numeric, errors='ignore', downcast = 'float')
+        pd.testing.assert_frame_equal(MSDataObject,ExcelWorkbook)
+
+class AgilentHeaderIndex_Test(unittest.TestCase):
+
+    def setUp(self):
+        group_row = pd.Series(["Compound Method", "Compound Method", "BQC01", "BQC01",
+                               "Qualifier 1 Method", "Qualifier 1 Results",
+                               "Qualifier 2 Method", "Qualifier 2 Results",
+                               "BQC02", "BQC02",
+                               "Qualifier 1 Method", "Qualifier 1 Results",
+                               "Qualifier 2 Method", "Qualifier 2 Results"])
+        field_row = pd.Series(["Name", "Transition", "Data File", "Area",
+                               "Transition", "Area", "Transition", "Area",
+                               "Data File", "Area",
+                               "Transition", "Area", "Transition", np.nan])
+        self.HeaderIndex = AgilentHeaderIndex(group_row, field_row)
+
+    def test_get_positions(self):
+        """Check if AgilentHeaderIndex is able to
+
+        * Find the column positions of a given group and field
+        * Find the column positions of a given qualifier number
+        * Ignore columns with no header text
+        """
+
+        self.assertEqual(self.HeaderIndex.get_positions(group="Compound Method", field="Name"), [0])
+        self.assertEqual(self.HeaderIndex.get_positions(field="Data File"), [2, 8])
+        self.assertEqual(self.HeaderIndex.get_positions(group="Qualifier Method", field="Transition"), [4, 6, 10, 12])
+        self.assertEqual(self.HeaderIndex.get_positions(group="Qualifier Method", field="Transition", qualifier=2), [6, 12])
+        self.assertEqual(self.HeaderIndex.get_positions(group="Qualifier Results", field="Area", qualifier=2), [7])
+        self.assertEqual(self.HeaderIndex.get_qualifier_numbers(group="Qualifier Method", field="Transition"), [1, 2])
+        self.assertEqual(self.HeaderIndex.get_positions(group="Sample", field="Data File"), [])
+
 if __name__ == '__main__':
     unittest.main()
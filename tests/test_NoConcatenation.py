@@ -1,9 +1,15 @@
 import unittest
 from unittest.mock import patch
 import os
+import json
+import logging
+import logging.handlers
+import tempfile
 import pandas as pd
 import openpyxl
 from MSOrganiser import no_concatenate_workflow
+from MSOrganiser import set_annotation_snapshot
+from Annotation import MS_Template
 from MSDataOutput import MSDataOutput
 
 WIDETABLEFORMROW1_MULTIPLEISTD_FILENAME = os.path.join(os.path.dirname(__file__),"testdata", 
@@ -399,6 +405,153 @@ class NoConcatenation_Test(unittest.TestCase):
 
                 self.__compare_df(file_data[data_index],ExcelData_df)
 
+    def test_no_concatenate_parallel(self):
+        """Check if the software gives the same results from the two input raw data
+
+        * When the files are processed one after another
+        * When the files are processed in a pool of two workers
+
+        """
+        stored_args = {
+            'MS_Files': [WIDETABLEFORMROW1_FILENAME, WIDETABLEFORMROW2_FILENAME], 
+            'MS_FileType': 'Agilent Wide Table in csv', 
+            'Output_Directory': 'D:\\MSOrganiser', 
+            'Output_Options': ['Area', 'normArea by ISTD', 'normConc by ISTD'], 
+            'Annot_File': WIDETABLEFORMROW_ANNOTATION, 
+            'Output_Format': 'Excel', 
+            'Concatenate': 'No Concatenate', 
+            'Transpose_Results': False, 
+            'Allow_Multiple_ISTD': False, 
+            'Long_Table': True, 
+            'Long_Table_Annot': False, 
+            'Testing': False
+        }
+
+        [file_data_list, file_name] = no_concatenate_workflow(stored_args,testing = True)
+
+        stored_args['Number_of_Workers'] = 2
+        [parallel_file_data_list, parallel_file_name] = no_concatenate_workflow(stored_args,testing = True)
+
+        self.assertEqual(file_name, parallel_file_name)
+        for [file_data, sheet_names], [parallel_file_data, parallel_sheet_names] in zip(file_data_list, parallel_file_data_list):
+            self.assertEqual(sheet_names, parallel_sheet_names)
+            for data_index in range(len(file_data)):
+                pd.testing.assert_frame_equal(file_data[data_index], parallel_file_data[data_index])
+
+    def test_no_concatenate_parallel_failed_file(self):
+        """Check if the software, when processing files in a pool of two workers
+
+        * Still processes the other input files when one input file fails
+        * Stops the program after all input files are processed
+
+        """
+        stored_args = {
+            'MS_Files': [WIDETABLEFORMROW1_FILENAME, WIDETABLEFORMROW1_FILENAME + ".missing"], 
+            'MS_FileType': 'Agilent Wide Table in csv', 
+            'Output_Directory': 'D:\\MSOrganiser', 
+            'Output_Options': ['Area'], 
+            'Annot_File': WIDETABLEFORMROW_ANNOTATION, 
+            'Output_Format': 'Excel', 
+            'Concatenate': 'No Concatenate', 
+            'Transpose_Results': False, 
+            'Allow_Multiple_ISTD': False, 
+            'Long_Table': False, 
+            'Long_Table_Annot': False, 
+            'Testing': False,
+            'Number_of_Workers': 2
+        }
+
+        with patch('MSParallel.print') as mock_print:
+            with self.assertRaises(SystemExit) as cm:
+                no_concatenate_workflow(stored_args,testing = True)
+            self.assertEqual(cm.exception.code, -1)
+            mock_print.assert_called_with('1 out of the input files could not be processed.', flush=True)
+
+    def test_no_concatenate_parallel_annotation_snapshot(self):
+        """Check if the software, when processing files in a pool of two workers started with spawn
+
+        * Creates the snapshot in Annot_Snapshot_Directory again in the workers when it is not valid
+        * Reads the annotation sheets from the snapshot in the workers in a later run
+        * Stops using the snapshot in a later run without Annot_Snapshot_Directory
+
+        """
+        with tempfile.TemporaryDirectory() as snapshot_directory:
+            stored_args = {
+                'MS_Files': [WIDETABLEFORMROW1_FILENAME, WIDETABLEFORMROW2_FILENAME], 
+                'MS_FileType': 'Agilent Wide Table in csv', 
+                'Output_Directory': 'D:\\MSOrganiser', 
+                'Output_Options': ['Area', 'normArea by ISTD'], 
+                'Annot_File': WIDETABLEFORMROW_ANNOTATION, 
+                'Output_Format': 'Excel', 
+                'Concatenate': 'No Concatenate', 
+                'Transpose_Results': False, 
+                'Allow_Multiple_ISTD': False, 
+                'Long_Table': False, 
+                'Long_Table_Annot': False, 
+                'Testing': False,
+                'Number_of_Workers': 2,
+                'Annot_Snapshot_Directory': snapshot_directory
+            }
+
+            with patch.object(MS_Template, 'snapshot_directory', snapshot_directory):
+                snapshot_filepath = MS_Template(WIDETABLEFORMROW_ANNOTATION, "Sample_Annot", 
+                                                logger = None, ingui = True).get_snapshot_filepath()
+            with open(snapshot_filepath, "w", encoding = "utf-8") as snapshot_file:
+                snapshot_file.write("Not a snapshot")
+
+            # Collect the log messages sent back by the workers
+            logger = logging.getLogger("test_no_concatenate_parallel_annotation_snapshot")
+            logger.setLevel(logging.INFO)
+            log_handler = logging.handlers.BufferingHandler(capacity = 10000)
+            logger.handlers = [log_handler]
+
+            # Workers started with spawn do not inherit the class attributes of MS_Template set in this process
+            with patch('MSParallel.START_METHOD', "spawn"):
+                [results, _] = no_concatenate_workflow(stored_args, logger = logger, testing = True)
+
+                log_messages = [record.getMessage() for record in log_handler.buffer]
+                self.assertTrue(any("The snapshot " + snapshot_filepath + " is out of date" in message
+                                    for message in log_messages))
+                with open(snapshot_filepath, "r", encoding = "utf-8") as snapshot_file:
+                    snapshot_lines = snapshot_file.readlines()
+                header = json.loads(snapshot_lines[0])
+                self.assertEqual(header["format_version"], MS_Template.SNAPSHOT_FORMAT_VERSION)
+                self.assertEqual(header["sheetnames"], MS_Template.ANNOTATION_SHEETS)
+
+                # Change the ISTD of LPC 14:0 in the snapshot only. 
+                # The workers give the new normArea when they read the snapshot instead of the workbook
+                Transition_Name_Annot = json.loads(snapshot_lines[1])
+                self.assertEqual(Transition_Name_Annot["columns"][0][1], "LPC 14:0")
+                Transition_Name_Annot["columns"][1][1] = "MHC d18:1/16:0d3 (IS)"
+                snapshot_lines[1] = json.dumps(Transition_Name_Annot) + "\n"
+                with open(snapshot_filepath, "w", encoding = "utf-8") as snapshot_file:
+                    snapshot_file.writelines(snapshot_lines)
+
+                log_handler.flush()
+                [snapshot_results, _] = no_concatenate_workflow(stored_args, logger = logger, testing = True)
+                self.assertFalse(any("is out of date" in record.getMessage() for record in log_handler.buffer))
+
+            for [file_data, sheet_names], [snapshot_file_data, _] in zip(results, snapshot_results):
+                Area_df = file_data[sheet_names.index("Area")]
+                normArea_df = file_data[sheet_names.index("normArea_by_ISTD")]
+                snapshot_normArea_df = snapshot_file_data[sheet_names.index("normArea_by_ISTD")]
+                pd.testing.assert_series_equal(snapshot_normArea_df["LPC 14:0"], 
+                                               Area_df["LPC 14:0"] / Area_df["MHC d18:1/16:0d3 (IS)"],
+                                               check_dtype = False, check_names = False)
+                pd.testing.assert_frame_equal(snapshot_normArea_df.drop(columns = "LPC 14:0"), 
+                                              normArea_df.drop(columns = "LPC 14:0"))
+            self.assertFalse(MS_Template.use_snapshot)
+            logger.handlers = []
+
+            with patch.object(MS_Template, 'use_snapshot', False), \
+                 patch.object(MS_Template, 'snapshot_directory', None):
+                set_annotation_snapshot(stored_args)
+                self.assertTrue(MS_Template.use_snapshot)
+                self.assertEqual(MS_Template.snapshot_directory, snapshot_directory)
+                set_annotation_snapshot(dict(stored_args, Annot_Snapshot_Directory = None))
+                self.assertFalse(MS_Template.use_snapshot)
+                self.assertIsNone(MS_Template.snapshot_directory)
+
     def __compare_df(self,MSData_df,ExcelData_df):
         MSData_df = MSData_df.apply(pd.to_numeric, errors='ignore', downcast = 'float')
         ExcelData_df = ExcelData_df.apply(pd.to_numeric, errors='ignore', downcast = 'float')
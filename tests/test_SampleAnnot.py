@@ -1,5 +1,6 @@
 import unittest
 import os
+import pandas as pd
 from unittest.mock import patch
 from MSCalculate import ISTD_Operations
 from MSAnalysis import MS_Analysis
@@ -60,6 +61,9 @@ WIDETABLEFORM_ANNOTATION_WITH_MISSING_SAMPLES = os.path.join(os.path.dirname(__f
                                                              "testdata", "test_sample_annot", 
                                                              "WideTableForm_Annotation_WithMissingSamples.xlsx")
 
+WIDETABLEFORMCOLUMN_ANNOTATION = os.path.join(os.path.dirname(__file__),"testdata", 
+                                              "test_concatenate_column", "WideTableFormColumn_Annotation.xlsx")
+
 class SampleAnnot_Test(unittest.TestCase):
     # See https://realpython.com/lessons/mocking-print-unit-tests/
     # for more details on mock
@@ -234,6 +238,42 @@ class SampleAnnot_Test(unittest.TestCase):
                                       'Please correct the Sample Annotation sheet or the input file name.',
                                       flush = True)
 
+    def test_filter_by_Data_File_Name(self):
+        """Check if the software is able to take the Sample Annotation data of the given MSFilePath
+
+        * Only the rows of the given MSFilePath are taken, in the order of the Sample_Annot sheet
+        * Every row is taken when no MSFilePath is given
+        * Reading the Sample Annotation data of one MSFilePath does not change the data read for the next one
+
+        """
+        All_Sample_Annot_df = ISTD_Operations.read_Sample_Annot(filepath = WIDETABLEFORMCOLUMN_ANNOTATION,
+                                                                MS_FilePathList = [],
+                                                                column_name = "Area",
+                                                                logger = None,
+                                                                ingui = False)
+        self.assertEqual(All_Sample_Annot_df["Data_File_Name"].unique().tolist(),
+                         ["WideTableFormColumn1.csv", "WideTableFormColumn2.csv"])
+
+        for MS_FilePathList in [["WideTableFormColumn2.csv"],
+                                ["WideTableFormColumn1.csv"],
+                                ["WideTableFormColumn2.csv", "WideTableFormColumn1.csv"]]:
+            Sample_Annot_df = ISTD_Operations.read_Sample_Annot(filepath = WIDETABLEFORMCOLUMN_ANNOTATION,
+                                                                MS_FilePathList = MS_FilePathList,
+                                                                column_name = "Area",
+                                                                logger = None,
+                                                                ingui = False)
+            Expected_Sample_Annot_df = All_Sample_Annot_df[All_Sample_Annot_df["Data_File_Name"].isin(MS_FilePathList)]
+            pd.testing.assert_frame_equal(Sample_Annot_df, Expected_Sample_Annot_df)
+
+        # Adding a column to the data read should not change the data read next time
+        All_Sample_Annot_df["ISTD_to_Sample_Amount_Ratio"] = 1
+        Sample_Annot_df = ISTD_Operations.read_Sample_Annot(filepath = WIDETABLEFORMCOLUMN_ANNOTATION,
+                                                            MS_FilePathList = [],
+                                                            column_name = "Area",
+                                                            logger = None,
+                                                            ingui = False)
+        self.assertNotIn("ISTD_to_Sample_Amount_Ratio", Sample_Annot_df.columns)
+
     def test_warn_sample_in_MSFilePath_but_not_in_SampleAnnot(self):
         """Check if the software is able to list samples in a given MSFilePath that is not in the Sample Annotation data
 
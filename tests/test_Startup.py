@@ -0,0 +1,28 @@
+import unittest
+import os
+import sys
+import subprocess
+
+PACKAGE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Startup_Test(unittest.TestCase):
+
+    def test_lazy_import(self):
+        """Check if the software starts without importing the report, Excel and interface packages
+
+        * weasyprint, openpyxl, gooey and wx are not imported with MSOrganiser or the command line entry point MSCommandLine
+        """
+
+        #The import time depends on the machine, it is checked against IMPORT_TIME_BUDGET by benchmarks/MSBenchmark.py
+        heavy_module_list = ["weasyprint", "openpyxl", "gooey", "wx"]
+        script = ("import sys\n"
+                  "import MSOrganiser\n"
+                  "import MSCommandLine\n"
+                  "print(','.join(module for module in " + repr(heavy_module_list) + " if module in sys.modules))\n")
+        result = subprocess.run([sys.executable, "-c", script],
+                                cwd = PACKAGE_DIRECTORY, capture_output = True, text = True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,12 @@
 import unittest
 import os
+import shutil
+import tempfile
+import json
+import numpy as np
+import pandas as pd
 from unittest.mock import patch
+import Annotation
 from Annotation import MS_Template
 from MSCalculate import ISTD_Operations
 from MSAnalysis import MS_Analysis
@@ -37,6 +43,9 @@ WIDETABLEFORM_ANNOTATION_WITH_ISTD_NOT_IN_ISTD_ANNOT = os.path.join(os.path.dirn
                                                                     "testdata", "test_transition_annot", 
                                                                     "WideTableForm_Annotation_ISTD_not_in_ISTDAnnot.xlsx")
 
+WIDETABLEFORM_ANNOTATION = os.path.join(os.path.dirname(__file__),
+                                        "testdata", "WideTableForm_Annotation.xlsx")
+
 WIDETABLEFORM_FILENAME = os.path.join(os.path.dirname(__file__),
                                       "testdata", "test_transition_annot",
                                       "WideTableForm.csv")
@@ -563,6 +572,305 @@ class TransitionNameAnnot_Test(unittest.TestCase):
                                       flush = True)
   
 
+    def test_create_Transition_Name_dict(self):
+        """Check if the software is able to map each transition name in the input data 
+           to its ISTD in the Transition_Name_Annot sheet
+
+        * Transition names with a valid ISTD are mapped to it
+        * Transition names with a blank ISTD, missing from the Transition_Name_Annot sheet
+          or whose ISTD is not in the input data are reported in the ISTD report
+        * With multiple ISTD, every ISTD of a transition name is kept in the order of the Transition_Name_Annot sheet
+        """
+
+        self.patcher = patch('MSCalculate.print')
+        mock_print = self.patcher.start()
+
+        Area_df = pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2'],
+                                'LPC 18:0' : [1.0, 2.0],
+                                'LPC 18:1' : [3.0, 4.0],
+                                'LPC 20:0' : [5.0, 6.0],
+                                'LPC 22:0' : [7.0, 8.0],
+                                'LPC 17:0 (IS)' : [9.0, 10.0],
+                                'LPC 19:0 (IS)' : [11.0, 12.0]})
+
+        Transition_Name_Annot_df = pd.DataFrame({'Transition_Name' : ['LPC 17:0 (IS)', 'LPC 19:0 (IS)',
+                                                                      'LPC 18:0', 'LPC 18:0', 
+                                                                      'LPC 18:1', 'LPC 20:0'],
+                                                 'Transition_Name_ISTD' : ['LPC 17:0 (IS)', 'LPC 19:0 (IS)',
+                                                                           'LPC 19:0 (IS)', 'LPC 17:0 (IS)', 
+                                                                           np.nan, 'LPC 21:0 (IS)']})
+
+        [ISTD_report,Transition_Name_dict] = ISTD_Operations.create_Transition_Name_dict(Transition_Name_df = Area_df,
+                                                                                         Transition_Name_Annot_df = Transition_Name_Annot_df,
+                                                                                         logger = False, 
+                                                                                         ingui = True,
+                                                                                         allow_multiple_istd = True)
+
+        self.assertEqual(Transition_Name_dict, {'LPC 18:0' : ['LPC 19:0 (IS)', 'LPC 17:0 (IS)'],
+                                                'LPC 18:1' : [],
+                                                'LPC 20:0' : ['LPC 21:0 (IS)'],
+                                                'LPC 22:0' : [''],
+                                                'LPC 17:0 (IS)' : ['LPC 17:0 (IS)'],
+                                                'LPC 19:0 (IS)' : ['LPC 19:0 (IS)']})
+
+        self.assertEqual(ISTD_report.loc["!Blank Transition_Name_ISTD in Transition_Name_Annot sheet", 'Transition_Name'], 'LPC 18:1')
+        self.assertEqual(ISTD_report.loc["!Missing Transition_Name in Transition_Name_Annot sheet", 'Transition_Name'], 'LPC 22:0')
+        self.assertEqual(ISTD_report.loc["!Missing Transition_Name_ISTD in input data", 'Transition_Name'], 'LPC 20:0')
+        self.assertEqual(ISTD_report.loc["LPC 17:0 (IS)", 'Transition_Name'].tolist(), ['LPC 17:0 (IS)', 'LPC 18:0'])
+
+        # Only the first ISTD is used when multiple ISTD is not allowed
+        [ISTD_report,Transition_Name_dict] = ISTD_Operations.create_Transition_Name_dict(Transition_Name_df = Area_df,
+                                                                                         Transition_Name_Annot_df = Transition_Name_Annot_df,
+                                                                                         logger = False, 
+                                                                                         ingui = True,
+                                                                                         allow_multiple_istd = False)
+
+        self.assertEqual(Transition_Name_dict, {'LPC 18:0' : 'LPC 19:0 (IS)',
+                                                'LPC 18:1' : None,
+                                                'LPC 20:0' : 'LPC 21:0 (IS)',
+                                                'LPC 22:0' : None,
+                                                'LPC 17:0 (IS)' : 'LPC 17:0 (IS)',
+                                                'LPC 19:0 (IS)' : 'LPC 19:0 (IS)'})
+
+    def test_normalise_by_ISTD(self):
+        """Check if the software is able to normalise each transition by its ISTD
+
+        * Transitions are divided by the ISTD given in Transition_Name_dict
+        * Division by an ISTD of zero gives NaN instead of infinity
+        * Transitions without an ISTD or whose ISTD is not in the input data give NaN with a warning
+        """
+
+        self.patcher = patch('MSCalculate.print')
+        mock_print = self.patcher.start()
+
+        Area_df = pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2'],
+                                'LPC 18:0' : [2.0, 4.0],
+                                'LPC 18:1' : [3.0, 0.0],
+                                'LPC 20:0' : [5.0, 6.0],
+                                'LPC 17:0 (IS)' : [1.0, 0.0]})
+
+        Transition_Name_dict = {'LPC 18:0' : 'LPC 17:0 (IS)',
+                                'LPC 18:1' : 'LPC 17:0 (IS)',
+                                'LPC 20:0' : 'LPC 21:0 (IS)',
+                                'LPC 17:0 (IS)' : None}
+
+        [norm_Area_df,ISTD_Area] = ISTD_Operations.normalise_by_ISTD(Area_df,Transition_Name_dict,
+                                                                     logger = False,
+                                                                     ingui = True,
+                                                                     allow_multiple_istd = False)
+
+        mock_print.assert_called_with('LPC 21:0 (IS) cannot be found in the input data frame. ' + 
+                                      'Ignore normalisation in this column LPC 20:0',
+                                      flush = True)
+
+        self.assertEqual(norm_Area_df.columns.tolist(), Area_df.columns.tolist())
+        self.assertEqual(norm_Area_df['Sample_Name'].tolist(), ['Sample1', 'Sample2'])
+        self.assertEqual(norm_Area_df['LPC 18:0'].tolist()[0], 2.0)
+        self.assertTrue(np.isnan(norm_Area_df['LPC 18:0'].tolist()[1]))
+        self.assertEqual(norm_Area_df['LPC 18:1'].tolist()[0], 3.0)
+        self.assertTrue(np.isnan(norm_Area_df['LPC 18:1'].tolist()[1]))
+        self.assertTrue(norm_Area_df['LPC 20:0'].isna().all())
+        self.assertTrue(norm_Area_df['LPC 17:0 (IS)'].isna().all())
+        self.assertEqual(ISTD_Area['LPC 18:0'].tolist(), [1.0, 0.0])
+        self.assertTrue(ISTD_Area['LPC 20:0'].isna().all())
+
+    def test_expand_Transition_Name_df(self):
+        """Check if the software is able to expand the input data so that it can be normalised by multiple ISTD
+
+        * Each transition name has one column for each of its ISTD, in the order of Transition_Name_dict
+        * A transition name without ISTD has one column with a blank ISTD
+        * The values are the same as the input data and keep their data type
+        """
+
+        Area_df = pd.DataFrame({'Sample_Name' : ['Sample1', 'Sample2'],
+                                'LPC 18:0' : [1, 2],
+                                'LPC 22:0' : [3.5, 4.5],
+                                'LPC 17:0 (IS)' : [5, 6],
+                                'LPC 19:0 (IS)' : [7, 8]})
+
+        Transition_Name_dict = {'LPC 18:0' : ['LPC 19:0 (IS)', 'LPC 17:0 (IS)'],
+                                'LPC 22:0' : [],
+                                'LPC 17:0 (IS)' : ['LPC 17:0 (IS)'],
+                                'LPC 19:0 (IS)' : ['LPC 19:0 (IS)']}
+
+        expanded_Area_df = ISTD_Operations.expand_Transition_Name_df(Area_df,Transition_Name_dict,
+                                                                     logger = False, 
+                                                                     ingui = True)
+
+        self.assertEqual(expanded_Area_df.columns.tolist(), [('Sample_Name', ''),
+                                                             ('LPC 18:0', 'LPC 19:0 (IS)'),
+                                                             ('LPC 18:0', 'LPC 17:0 (IS)'),
+                                                             ('LPC 22:0', ''),
+                                                             ('LPC 17:0 (IS)', 'LPC 17:0 (IS)'),
+                                                             ('LPC 19:0 (IS)', 'LPC 19:0 (IS)')])
+        self.assertEqual(list(expanded_Area_df.columns.names), ["Transition_Name", "Transition_Name_ISTD"])
+        self.assertEqual(expanded_Area_df[('Sample_Name', '')].tolist(), ['Sample1', 'Sample2'])
+        self.assertEqual(expanded_Area_df[('LPC 18:0', 'LPC 19:0 (IS)')].tolist(), [1, 2])
+        self.assertEqual(expanded_Area_df[('LPC 18:0', 'LPC 17:0 (IS)')].tolist(), [1, 2])
+        self.assertEqual(expanded_Area_df[('LPC 22:0', '')].tolist(), [3.5, 4.5])
+        self.assertTrue(pd.api.types.is_integer_dtype(expanded_Area_df[('LPC 18:0', 'LPC 19:0 (IS)')]))
+
+    def test_read_annotation_workbook_once(self):
+        """Check if the software is able to read the annotation workbook once 
+           for all the annotation sheets
+
+        * The workbook is loaded once when the three annotation sheets are read by different MS_Template objects
+        * Each sheet is the same as the one read without the cache
+        * The workbook is loaded again when it has been modified
+        """
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            annotation_file = os.path.join(temp_dir, "WideTableForm_Annotation.xlsx")
+            shutil.copyfile(WIDETABLEFORM_ANNOTATION, annotation_file)
+
+            MS_Template.clear_workbook_cache()
+            with patch('Annotation.load_workbook', wraps = Annotation.load_workbook) as mock_load_workbook:
+                Transition_Name_Annot_df = MS_Template(annotation_file, "Transition_Name_Annot",
+                                                       logger = None, ingui = True).Read_Transition_Name_Annot_Sheet()
+                ISTD_Annot_df = MS_Template(annotation_file, "ISTD_Annot",
+                                            logger = None, ingui = True).Read_ISTD_Annot_Sheet()
+                Sample_Annot_df = MS_Template(annotation_file, "Sample_Annot",
+                                              logger = None, ingui = True).Read_Sample_Annot_Sheet()
+                self.assertEqual(mock_load_workbook.call_count, 1)
+
+                # Read the sheets again without the cache
+                MS_Template.clear_workbook_cache()
+                pd.testing.assert_frame_equal(Transition_Name_Annot_df,
+                                              MS_Template(annotation_file, "Transition_Name_Annot",
+                                                          logger = None, ingui = True).Read_Transition_Name_Annot_Sheet())
+                pd.testing.assert_frame_equal(ISTD_Annot_df,
+                                              MS_Template(annotation_file, "ISTD_Annot",
+                                                          logger = None, ingui = True).Read_ISTD_Annot_Sheet())
+                pd.testing.assert_frame_equal(Sample_Annot_df,
+                                              MS_Template(annotation_file, "Sample_Annot",
+                                                          logger = None, ingui = True).Read_Sample_Annot_Sheet())
+                self.assertEqual(mock_load_workbook.call_count, 2)
+
+                # Change the modification time as if the workbook has been saved again
+                file_stat = os.stat(annotation_file)
+                os.utime(annotation_file, ns = (file_stat.st_atime_ns, file_stat.st_mtime_ns + 1000000000))
+                MS_Template(annotation_file, "Sample_Annot",
+                            logger = None, ingui = True).Read_Sample_Annot_Sheet()
+                self.assertEqual(mock_load_workbook.call_count, 3)
+
+            MS_Template.clear_workbook_cache()
+
+    def test_read_annotation_workbook_read_only(self):
+        """Check if the software is able to stream the annotation sheets in read only mode
+
+        * Each annotation sheet is the same as the one read from the whole workbook
+        * Formatted empty rows at the end of a sheet are not kept
+        """
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            annotation_file = os.path.join(temp_dir, "WideTableForm_Annotation.xlsx")
+
+            # Add formatted rows with no data at the end of the Sample_Annot sheet
+            wb = Annotation.load_workbook(WIDETABLEFORM_ANNOTATION)
+            worksheet = wb["Sample_Annot"]
+            for row_number in range(worksheet.max_row + 1, worksheet.max_row + 101):
+                worksheet.cell(row = row_number, column = 1).number_format = "@"
+            wb.save(annotation_file)
+            wb.close()
+
+            annotation_df_list = []
+            for read_only_workbook in [True, False]:
+                MS_Template.clear_workbook_cache()
+                with patch.object(MS_Template, 'read_only_workbook', read_only_workbook):
+                    annotation_df_list.append([MS_Template(annotation_file, "Transition_Name_Annot",
+                                                           logger = None, ingui = True).Read_Transition_Name_Annot_Sheet(),
+                                               MS_Template(annotation_file, "ISTD_Annot",
+                                                           logger = None, ingui = True).Read_ISTD_Annot_Sheet(),
+                                               MS_Template(annotation_file, "Sample_Annot",
+                                                           logger = None, ingui = True).Read_Sample_Annot_Sheet()])
+            MS_Template.clear_workbook_cache()
+
+            for read_only_df, full_df in zip(annotation_df_list[0], annotation_df_list[1]):
+                pd.testing.assert_frame_equal(read_only_df, full_df)
+
+    def test_read_annotation_snapshot(self):
+        """Check if the software is able to keep a snapshot of the annotation sheets for later runs
+
+        * The snapshot is written in the snapshot directory when the workbook is read
+        * A later run loads the snapshot instead of the workbook and gives the same sheets
+        * The snapshot is a json file whose header has the snapshot format version, the MSOrganiser version, 
+          read_only_workbook and the hash of the workbook
+        * A snapshot of another format version, MSOrganiser version or read_only_workbook, 
+          of a modified workbook or that is not valid is created again
+        """
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            annotation_file = os.path.join(temp_dir, "WideTableForm_Annotation.xlsx")
+            snapshot_directory = os.path.join(temp_dir, "snapshot")
+            shutil.copyfile(WIDETABLEFORM_ANNOTATION, annotation_file)
+
+            with patch.object(MS_Template, 'use_snapshot', True), \
+                 patch.object(MS_Template, 'snapshot_directory', snapshot_directory), \
+                 patch('Annotation.load_workbook', wraps = Annotation.load_workbook) as mock_load_workbook:
+
+                MS_Template.clear_workbook_cache()
+                Sample_Annot = MS_Template(annotation_file, "Sample_Annot", logger = None, ingui = True)
+                Sample_Annot_df = Sample_Annot.Read_Sample_Annot_Sheet()
+                snapshot_filepath = Sample_Annot.get_snapshot_filepath()
+                self.assertEqual(os.path.dirname(snapshot_filepath), snapshot_directory)
+                self.assertTrue(os.path.isfile(snapshot_filepath))
+                self.assertEqual(mock_load_workbook.call_count, 1)
+
+                # A later run
+                MS_Template.clear_workbook_cache()
+                pd.testing.assert_frame_equal(Sample_Annot_df, Sample_Annot.Read_Sample_Annot_Sheet())
+                MS_Template(annotation_file, "ISTD_Annot", logger = None, ingui = True).Read_ISTD_Annot_Sheet()
+                self.assertEqual(mock_load_workbook.call_count, 1)
+
+                with open(snapshot_filepath, "r", encoding = "utf-8") as snapshot_file:
+                    header = json.loads(snapshot_file.readline())
+                self.assertEqual(header["format_version"], MS_Template.SNAPSHOT_FORMAT_VERSION)
+                self.assertEqual(header["msorganiser_version"], Annotation.get_msorganiser_version())
+                self.assertNotEqual(header["msorganiser_version"], "unknown")
+                self.assertTrue(header["read_only_workbook"])
+                self.assertEqual(header["sheetnames"], MS_Template.ANNOTATION_SHEETS)
+
+                # A later run with another snapshot format version, MSOrganiser version or read_only_workbook
+                for patcher in [patch.object(MS_Template, 'SNAPSHOT_FORMAT_VERSION', 0),
+                                patch('Annotation.get_msorganiser_version', return_value = '0.0.0'),
+                                patch.object(MS_Template, 'read_only_workbook', False)]:
+                    MS_Template.clear_workbook_cache()
+                    mock_load_workbook.reset_mock()
+                    with patcher:
+                        pd.testing.assert_frame_equal(Sample_Annot_df, Sample_Annot.Read_Sample_Annot_Sheet())
+                    self.assertEqual(mock_load_workbook.call_count, 1)
+
+                # Write the snapshot of this version again
+                MS_Template.clear_workbook_cache()
+                Sample_Annot.Read_Sample_Annot_Sheet()
+                with open(snapshot_filepath, "r", encoding = "utf-8") as snapshot_file:
+                    header = json.loads(snapshot_file.readline())
+
+                # A later run with a snapshot that is not valid
+                for invalid_snapshot in [b"\x80\x04\x95", 
+                                         (json.dumps(header) + "\n" + json.dumps({"sheetname" : "Transition_Name_Annot",
+                                                                                  "number_of_rows" : 1,
+                                                                                  "columns" : [[{"type" : "object"}]]})).encode("utf-8")]:
+                    MS_Template.clear_workbook_cache()
+                    with open(snapshot_filepath, "wb") as snapshot_file:
+                        snapshot_file.write(invalid_snapshot)
+                    mock_load_workbook.reset_mock()
+                    pd.testing.assert_frame_equal(Sample_Annot_df, Sample_Annot.Read_Sample_Annot_Sheet())
+                    self.assertEqual(mock_load_workbook.call_count, 1)
+
+                # A later run after the workbook is modified
+                MS_Template.clear_workbook_cache()
+                wb = Annotation.load_workbook(annotation_file)
+                wb["Sample_Annot"]["C2"].value = "Modified_Sample_Name"
+                wb.save(annotation_file)
+                wb.close()
+                mock_load_workbook.reset_mock()
+                Modified_Sample_Annot_df = Sample_Annot.Read_Sample_Annot_Sheet()
+                self.assertEqual(mock_load_workbook.call_count, 1)
+                self.assertEqual(Modified_Sample_Annot_df["Sample_Name"].iloc[0], "Modified_Sample_Name")
+
+            MS_Template.clear_workbook_cache()
+
     def tearDown(self):
         self.patcher.stop()
 if __name__ == '__main__':